@@ -0,0 +1,6 @@
+from backend.api.app import app, initialize_app
+from backend.api.asgi_bridge import ThreadedWsgiToAsgi
+
+initialize_app()
+
+application = ThreadedWsgiToAsgi(app)
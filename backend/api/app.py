@@ -1,30 +1,395 @@
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, request, jsonify, send_from_directory
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
+from werkzeug.security import safe_join
+from werkzeug.serving import make_server
+from werkzeug.wsgi import FileWrapper
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 import asyncio
-from typing import Dict, Any
-import uuid
+import atexit
+import collections
+import hashlib
+import io
+import mimetypes
+import os
+import threading
+import time
+from typing import Dict, Any, Callable, Optional
+from dataclasses import asdict, fields
 
-from config.config import Config
-from backend.core.device_manager import get_device, get_device_info
+import aiohttp
+import numpy as np
+import orjson
+import torch
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+try:
+    from flask_compress import Compress
+    FLASK_COMPRESS_AVAILABLE = True
+except ImportError:
+    FLASK_COMPRESS_AVAILABLE = False
+
+try:
+    import zstandard
+    ZSTANDARD_AVAILABLE = True
+except ImportError:
+    ZSTANDARD_AVAILABLE = False
+
+from config.config import get_config
+from backend.core.device_manager import get_device, get_device_info, clear_cache, initialize_device
+from backend.core.object_pool import ObjectPool
+from backend.core.registry import SpecRegistry
 from backend.core.llm_manager import (
     LLMManager, OpenAIProvider, AnthropicProvider, 
-    LocalLLMProvider, OpenRouterProvider, NetworkedLLMProvider
+    LocalLLMProvider, OpenRouterProvider, NetworkedLLMProvider, VLLMLocalProvider,
+    close_http_client
 )
 from backend.models.generator import create_generator
 from backend.utils.slicer import Slicer, SlicerConfig
-from backend.utils.model_downloader import model_downloader
+from backend.utils.model_downloader import model_downloader, create_progress_callback
+from backend.utils.image_io import open_image
+from backend.utils.mesh_io import write_binary_ply, encode_binary_ply, trimesh_to_arrays
+from backend.utils.artifact_store import ArtifactStore, ARTIFACT_SCHEME
+from backend.api.schemas import (
+    MSGSPEC_AVAILABLE, RequestValidationError, parse_request, decode_request, GeneratePromptRequest, CreateGeneratorRequest,
+    TextTo3DRequest, RunGeneratorRequest, ImageTo3DRequest, CreateSlicerRequest, RunSlicerRequest,
+    LoadMeshRequest, SliceRequest,
+    SlicerExportRequest, DownloadModelRequest, DownloadModelUrlRequest, AutoDownloadRequest,
+    TestConnectionRequest
+)
+
+# The API writes into OUTPUT_DIR and STATE_DIR, so it makes sure they exist
+Config = get_config()
+
+JSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+def _json_default(obj: Any) -> Any:
+    # orjson only handles C-contiguous arrays natively
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, os.PathLike):
+        return os.fspath(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+class ORJSONProvider(DefaultJSONProvider):
+    # Backs jsonify() and request.get_json(); numpy arrays/scalars (slicer
+    # statistics) are encoded without a Python conversion pass
+    def dumps(self, obj: Any, **kwargs) -> str:
+        return orjson.dumps(obj, default=_json_default, option=JSON_OPTIONS).decode()
+    
+    def loads(self, s, **kwargs) -> Any:
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs) -> Response:
+        # Skip the str round trip of the base implementation
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=_json_default, option=JSON_OPTIONS)
+        return self._app.response_class(body, mimetype=self.mimetype)
 
 app = Flask(__name__, static_folder='../../frontend/web', static_url_path='/static')
+app.json = ORJSONProvider(app)
+# X-Sendfile hands the path to the front-end server (Apache, lighttpd)
+app.use_x_sendfile = Config.SENDFILE_MODE == 'x-sendfile'
+# Werkzeug spools multipart file parts to temporary files; this bounds the
+# total request size so an upload cannot fill the disk or the heap
+app.config['MAX_CONTENT_LENGTH'] = Config.MAX_UPLOAD_SIZE or None
 CORS(app)
 
-llm_manager = LLMManager()
-generators = {}
-slicers = {}
+if FLASK_COMPRESS_AVAILABLE:
+    # Only generated bodies are compressed: streamed output files are passed
+    # through untouched so sendfile and range requests keep working
+    app.config.update(
+        COMPRESS_MIMETYPES=['application/json', 'application/msgpack', 'text/plain'],
+        COMPRESS_ALGORITHM=['zstd', 'br', 'gzip'],
+        COMPRESS_LEVEL=4,
+        COMPRESS_BR_LEVEL=4,
+        COMPRESS_ZSTD_LEVEL=3,
+        COMPRESS_MIN_SIZE=1024
+    )
+    Compress(app)
+
+def _parse_json(cls):
+    # Decode the raw body directly: no mimetype/charset checks, and Werkzeug
+    # does not keep a cached copy of the buffer
+    body = request.get_data(cache=False)
+    if body and MSGSPEC_AVAILABLE:
+        # Decodes and type-checks in one pass, without an intermediate dict
+        return decode_request(cls, body)
+    try:
+        data = orjson.loads(body) if body else None
+    except orjson.JSONDecodeError:
+        raise RequestValidationError('Request body is not valid JSON')
+    return parse_request(cls, data)
+
+@app.errorhandler(RequestValidationError)
+def handle_validation_error(e):
+    return jsonify({'error': str(e)}), 400
+
+@app.errorhandler(413)
+def handle_too_large(e):
+    return jsonify({'error': f'Upload exceeds {Config.MAX_UPLOAD_SIZE} bytes'}), 413
+
+def _unload_generator(generator) -> None:
+    generator.unload()
+    clear_cache()
+
+llm_manager = LLMManager(
+    prompt_cache_ttl=Config.LLM_CACHE_TTL,
+    prompt_cache_dir=Config.LLM_CACHE_DIR or None
+)
+generators = ObjectPool(
+    create_generator,
+    max_size=Config.MAX_GENERATORS,
+    on_evict=_unload_generator,
+    ttl=Config.GENERATOR_TTL
+)
+slicers = ObjectPool(
+    Slicer,
+    max_size=Config.MAX_SLICERS,
+    reset=lambda slicer, config: slicer.reset(config),
+    ttl=Config.SLICER_TTL
+)
+jobs = {}
+job_finished_at = {}
+artifacts = ArtifactStore(os.path.join(Config.OUTPUT_DIR, 'artifacts')) if Config.ARTIFACT_STORE else None
+
+# Config directories are already absolute strings, which is also what file
+# serving needs: Flask resolves relative directories against the package
+OUTPUT_DIR = Config.OUTPUT_DIR
+
+# Creation parameters, shared on disk so any server process can rebuild an
+# object that was created (or evicted) elsewhere
+generator_specs = SpecRegistry(os.path.join(Config.STATE_DIR, 'generators'))
+slicer_specs = SpecRegistry(os.path.join(Config.STATE_DIR, 'slicers'))
+
+# Async job status and results, mirrored to disk so a poll that reaches
+# another server process still finds the job
+job_states = SpecRegistry(os.path.join(Config.STATE_DIR, 'jobs'))
+
+def _lookup_generator(generator_id: str, pin: bool = False):
+    if not generator_id:
+        return None
+    
+    generator = generators.get(generator_id, pin=pin)
+    if generator is None:
+        with generators.creation_lock(generator_id):
+            # Another request may have rebuilt it while we waited
+            generator = generators.get(generator_id, pin=pin)
+            spec = generator_specs.get(generator_id) if generator is None else None
+            if spec is not None:
+                key = (spec['type'], spec['model_path'])
+                generator = generators.acquire(generator_id, key, spec['type'], spec['model_path'], pin=pin)
+    return generator
+
+def _lookup_slicer(slicer_id: str, pin: bool = False):
+    if not slicer_id:
+        return None
+    
+    slicer = slicers.get(slicer_id, pin=pin)
+    if slicer is None:
+        with slicers.creation_lock(slicer_id):
+            slicer = slicers.get(slicer_id, pin=pin)
+            spec = slicer_specs.get(slicer_id) if slicer is None else None
+            if spec is not None:
+                slicer = slicers.acquire(slicer_id, None, SlicerConfig(**spec['config']), pin=pin)
+                if spec.get('mesh_path') and _load_slicer_mesh(slicer, spec['mesh_path']):
+                    # Restore the layers the creating process saved; slicing
+                    # again here would block this request for the whole slice
+                    if spec.get('sliced'):
+                        slicer.load_layers(_slicer_layers_path(slicer_id))
+    return slicer
+
+def _slicer_layers_path(slicer_id: str) -> str:
+    return os.path.join(slicer_specs.directory, f"{Path(slicer_id).name}.layers.npz")
+
+def _delete_slicer_layers(slicer_id: str) -> None:
+    try:
+        os.unlink(_slicer_layers_path(slicer_id))
+    except OSError:
+        pass
+
+@app.before_request
+def _prune_pools():
+    # Idle objects are dropped; their specs stay so they can be rebuilt
+    generators.prune()
+    slicers.prune()
+    _prune_jobs()
+
+def release_all() -> None:
+    generators.release_all()
+    slicers.release_all()
+
+atexit.register(release_all)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                # GPU jobs are serialized; CPU jobs share half the cores
+                if Config.INFERENCE_WORKERS > 0:
+                    max_workers = Config.INFERENCE_WORKERS
+                elif get_device().type in ('cuda', 'mps'):
+                    max_workers = 1
+                else:
+                    max_workers = max(1, (os.cpu_count() or 2) // 2)
+                _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='ai3d-job')
+    return _executor
+
+_event_loop = None
+_event_loop_lock = threading.Lock()
+
+def _get_event_loop() -> asyncio.AbstractEventLoop:
+    global _event_loop
+    if _event_loop is None:
+        with _event_loop_lock:
+            if _event_loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name='ai3d-async', daemon=True).start()
+                _event_loop = loop
+    return _event_loop
+
+def run_async(coro):
+    # LLM clients keep their connection pools on this loop, so every request
+    # must run on it rather than on a fresh per-request loop
+    return asyncio.run_coroutine_threadsafe(coro, _get_event_loop()).result()
+
+ID_POOL_SIZE = 256
+_id_pool = collections.deque()
+
+def next_id() -> str:
+    # One urandom call yields IDs for the next ID_POOL_SIZE creations
+    try:
+        return _id_pool.popleft()
+    except IndexError:
+        block = os.urandom(16 * ID_POOL_SIZE).hex()
+        _id_pool.extend(block[i:i + 32] for i in range(32, len(block), 32))
+        return block[:32]
+
+_http_session = None
+
+async def _get_http_session() -> aiohttp.ClientSession:
+    # Only touched from the app event loop, so no locking is needed
+    global _http_session
+    if _http_session is None or _http_session.closed:
+        _http_session = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=5),
+            connector=aiohttp.TCPConnector(limit_per_host=20)
+        )
+    return _http_session
+
+async def _probe_url(url: str) -> int:
+    session = await _get_http_session()
+    async with session.get(url) as response:
+        return response.status
+
+async def _close_http_clients() -> None:
+    if _http_session is not None and not _http_session.closed:
+        await _http_session.close()
+    await close_http_client()
+
+@atexit.register
+def _shutdown_event_loop() -> None:
+    # Close pooled connections cleanly instead of leaving them to the GC
+    if _event_loop is not None and _event_loop.is_running():
+        try:
+            asyncio.run_coroutine_threadsafe(_close_http_clients(), _event_loop).result(timeout=5)
+        except Exception as e:
+            print(f"Error closing HTTP clients: {e}")
+
+_next_job_prune = 0.0
+
+def _prune_jobs(interval: float = 1.0) -> None:
+    # Finished results are kept for JOB_TTL seconds so clients can poll them
+    global _next_job_prune
+    now = time.monotonic()
+    if now < _next_job_prune:
+        return
+    _next_job_prune = now + interval
+    
+    cutoff = now - Config.JOB_TTL
+    for job_id, finished_at in list(job_finished_at.items()):
+        if finished_at < cutoff:
+            job_finished_at.pop(job_id, None)
+            jobs.pop(job_id, None)
+            job_states.delete(job_id)
+
+def _pinned(pool: ObjectPool, obj: Any, fn: Callable, pinned: bool = False) -> Callable:
+    # The pool must not evict (and unload) obj while the job is queued or
+    # running. pinned=True takes over the pin from get/acquire(pin=True);
+    # call run.release() if the job is never submitted
+    if not pinned:
+        pool.pin(obj)
+    held = [True]
+    def release():
+        try:
+            held.pop()
+        except IndexError:
+            return
+        pool.unpin(obj)
+    def run(*args):
+        try:
+            return fn(*args)
+        finally:
+            release()
+    run.release = release
+    return run
+
+def _put_job_state(job_id: str, state: Dict[str, Any]) -> None:
+    try:
+        # Round-trip through orjson so numpy values in results are plain JSON
+        job_states.put(job_id, orjson.loads(orjson.dumps(state, default=_json_default, option=JSON_OPTIONS)))
+    except Exception as e:
+        print(f"Error recording state of job {job_id}: {e}")
+
+def _recorded(job_id: str, fn: Callable) -> Callable:
+    def run(*args):
+        _put_job_state(job_id, {'status': 'running'})
+        try:
+            result = fn(*args)
+        except Exception as e:
+            _put_job_state(job_id, {'status': 'error', 'error': str(e)})
+            raise
+        _put_job_state(job_id, {'status': 'done', 'result': result})
+        return result
+    return run
+
+def _dispatch_job(is_async: bool, fn: Callable, *args, **response_fields):
+    # response_fields are added to the 202 body, e.g. the ID of an object
+    # created for the job so clients can follow it while the job runs
+    if not is_async:
+        return jsonify(_get_executor().submit(fn, *args).result())
+    
+    job_id = next_id()
+    _put_job_state(job_id, {'status': 'queued'})
+    future = _get_executor().submit(_recorded(job_id, fn), *args)
+    jobs[job_id] = future
+    future.add_done_callback(lambda _: job_finished_at.__setitem__(job_id, time.monotonic()))
+    return jsonify({'job_id': job_id, 'status': 'queued', **response_fields}), 202
 
 def init_llm_providers():
     if Config.LOCAL_LLM_ENABLED:
-        llm_manager.add_provider('local', LocalLLMProvider(Config.LOCAL_LLM_PATH, Config.LOCAL_LLM_TYPE), priority=1)
+        local_provider = None
+        if Config.LOCAL_LLM_TYPE == 'vllm':
+            local_provider = VLLMLocalProvider(Config.LOCAL_LLM_PATH, Config.LOCAL_LLM_QUANTIZATION)
+            if not local_provider.available:
+                print("Falling back to transformers for the local LLM")
+                local_provider = None
+        if local_provider is None:
+            local_provider = LocalLLMProvider(
+                Config.LOCAL_LLM_PATH, Config.LOCAL_LLM_TYPE, Config.LOCAL_LLM_QUANTIZATION,
+                compile_model=Config.LOCAL_LLM_COMPILE
+            )
+        llm_manager.add_provider('local', local_provider, priority=1)
         print("Local LLM provider added (highest priority)")
     
     if Config.NETWORKED_LLM_URL:
@@ -35,79 +400,148 @@ def init_llm_providers():
         )
         print(f"Networked LLM provider added: {Config.NETWORKED_LLM_URL}")
     
-    if Config.API_KEYS['anthropic']:
+    if 'anthropic' in Config.API_KEYS:
         llm_manager.add_provider('anthropic', AnthropicProvider(Config.API_KEYS['anthropic']), priority=90)
         print("Anthropic provider added")
     
-    if Config.API_KEYS['openrouter']:
+    if 'openrouter' in Config.API_KEYS:
         llm_manager.add_provider('openrouter', OpenRouterProvider(Config.API_KEYS['openrouter']), priority=80)
         print("OpenRouter provider added")
     
-    if Config.API_KEYS['openai']:
+    if 'openai' in Config.API_KEYS:
         llm_manager.add_provider('openai', OpenAIProvider(Config.API_KEYS['openai']), priority=100)
         print("OpenAI provider added")
 
+_app_initialized = False
+_app_init_lock = threading.Lock()
+
+def initialize_app() -> None:
+    # Entry points (run_server, wsgi.py, asgi.py) may each reach this
+    global _app_initialized
+    with _app_init_lock:
+        if _app_initialized:
+            return
+        initialize_device(Config.GPU_MEMORY_FRACTION)
+        init_llm_providers()
+        llm_manager.start_health_checks(_get_event_loop())
+        _app_initialized = True
+
+# Monitoring polls these endpoints constantly; memory counters are allowed
+# to be this many seconds stale
+DEVICE_INFO_TTL = 10.0
+
+# (expires_at, device info body, health body)
+_device_info_cache = None
+
+def _device_info_bodies():
+    global _device_info_cache
+    now = time.monotonic()
+    if _device_info_cache is None or now >= _device_info_cache[0]:
+        info = get_device_info()
+        _device_info_cache = (
+            now + DEVICE_INFO_TTL,
+            orjson.dumps(info, option=JSON_OPTIONS),
+            orjson.dumps({'status': 'healthy', 'device': info}, option=JSON_OPTIONS)
+        )
+    return _device_info_cache
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
-    return jsonify({
-        'status': 'healthy',
-        'device': get_device_info()
-    })
+    return Response(_device_info_bodies()[2], mimetype='application/json')
 
 @app.route('/api/device/info', methods=['GET'])
 def device_info():
-    return jsonify(get_device_info())
+    return Response(_device_info_bodies()[1], mimetype='application/json')
 
-@app.route('/api/llm/providers', methods=['GET'])
-def list_llm_providers():
-    providers = list(llm_manager.providers.keys())
-    available = {k: v.available for k, v in llm_manager.providers.items()}
-    
+# (availability snapshot, encoded body); rebuilt only when LLMManager
+# refreshes its snapshot or a provider is added
+_providers_cache = None
+
+def _build_providers_payload(available: Dict[str, bool]) -> bytes:
     provider_details = []
     for priority, name in llm_manager.provider_priority:
-        provider = llm_manager.providers.get(name)
-        if provider:
+        if name in available:
             provider_details.append({
                 'name': name,
-                'available': provider.available,
+                'available': available[name],
                 'priority': priority
             })
     
-    available_provider = llm_manager.get_available_provider()
-    
-    return jsonify({
-        'providers': providers,
+    return orjson.dumps({
+        'providers': list(llm_manager.providers.keys()),
         'available': available,
         'details': provider_details,
-        'auto_selected': available_provider,
+        'auto_selected': llm_manager.get_available_provider(),
         'default': Config.DEFAULT_LLM
     })
 
+@app.route('/api/llm/providers', methods=['GET'])
+def list_llm_providers():
+    global _providers_cache
+    available = llm_manager.availability()
+    
+    cache = _providers_cache
+    if cache is None or cache[0] is not available:
+        cache = (available, _build_providers_payload(available))
+        _providers_cache = cache
+    
+    return Response(cache[1], mimetype='application/json')
+
 @app.route('/api/llm/generate-prompt', methods=['POST'])
-async def generate_3d_prompt():
-    data = request.json
-    user_input = data.get('input', '')
-    provider = data.get('provider', Config.DEFAULT_LLM)
+def generate_3d_prompt():
+    req = _parse_json(GeneratePromptRequest)
+    user_input = req.input
+    provider = req.provider
     
     if not user_input:
         return jsonify({'error': 'Input is required'}), 400
     
     try:
-        result = await llm_manager.generate_3d_prompt(provider, user_input)
+        result = run_async(llm_manager.generate_3d_prompt(provider, user_input))
         return jsonify(result)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def iter_async(agen):
+    # Drive an async generator on the app event loop from a sync WSGI body
+    loop = _get_event_loop()
+    try:
+        while True:
+            try:
+                yield asyncio.run_coroutine_threadsafe(agen.__anext__(), loop).result()
+            except StopAsyncIteration:
+                return
+    finally:
+        asyncio.run_coroutine_threadsafe(agen.aclose(), loop).result()
+
+@app.route('/api/llm/generate-prompt/stream', methods=['POST'])
+def generate_3d_prompt_stream():
+    # One JSON object per line, growing as the LLM writes it; the last line
+    # is the final prompt
+    req = _parse_json(GeneratePromptRequest)
+    if not req.input:
+        return jsonify({'error': 'Input is required'}), 400
+    
+    def lines():
+        try:
+            for partial in iter_async(llm_manager.generate_3d_prompt_stream(req.provider, req.input)):
+                yield orjson.dumps(partial) + b'\n'
+        except Exception as e:
+            yield orjson.dumps({'error': str(e)}) + b'\n'
+    
+    # direct_passthrough keeps compression middleware from buffering the body
+    return Response(lines(), mimetype='application/x-ndjson', direct_passthrough=True)
+
 @app.route('/api/generator/create', methods=['POST'])
 def create_generator_endpoint():
-    data = request.json
-    generator_id = str(uuid.uuid4())
-    model_type = data.get('type', 'text-to-3d')
-    model_path = data.get('model_path')
+    req = _parse_json(CreateGeneratorRequest)
+    generator_id = next_id()
+    model_type = req.type
+    model_path = req.model_path
     
     try:
-        generator = create_generator(model_type, model_path)
-        generators[generator_id] = generator
+        generators.acquire(generator_id, (model_type, model_path), model_type, model_path)
+        generator_specs.put(generator_id, {'type': model_type, 'model_path': model_path})
         return jsonify({
             'generator_id': generator_id,
             'model_type': model_type,
@@ -116,113 +550,185 @@ def create_generator_endpoint():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _call_generator(method: Callable, **kwargs) -> Any:
+    # inference_mode is thread-local, so it has to be entered on the worker
+    with torch.inference_mode():
+        return method(**kwargs)
+
+def _save_mesh(filename: str, vertices, faces, colors=None) -> str:
+    if artifacts is not None:
+        artifacts.put(filename, encode_binary_ply(vertices, faces, colors))
+        return ARTIFACT_SCHEME + filename
+    
+    output_path = os.path.join(OUTPUT_DIR, filename)
+    write_binary_ply(output_path, vertices, faces, colors)
+    _write_zstd_copy(output_path)
+    return output_path
+
+def _write_zstd_copy(path: str) -> None:
+    # Compressed once here, then served to every zstd-capable client
+    if not ZSTANDARD_AVAILABLE or Config.OUTPUT_ZSTD_LEVEL <= 0:
+        return
+    
+    try:
+        compressor = zstandard.ZstdCompressor(level=Config.OUTPUT_ZSTD_LEVEL)
+        with open(path, 'rb') as src, open(path + '.zst.tmp', 'wb') as dst:
+            compressor.copy_stream(src, dst, size=os.fstat(src.fileno()).st_size)
+        os.replace(path + '.zst.tmp', path + '.zst')
+    except OSError as e:
+        print(f"Error writing compressed copy of {path}: {e}")
+
+def _run_text_to_3d(generator, generator_id: str, prompt: str, guidance_scale: float,
+                    num_inference_steps: int, frame_size: int) -> Dict[str, Any]:
+    mesh = _call_generator(
+        generator.generate_mesh,
+        prompt=prompt,
+        guidance_scale=guidance_scale,
+        num_inference_steps=num_inference_steps,
+        frame_size=frame_size
+    )
+    
+    if mesh is None:
+        raise RuntimeError('Failed to generate mesh')
+    
+    try:
+        mesh_path = _save_mesh(f"{generator_id}_mesh.ply", *generator.mesh_to_arrays(mesh))
+    except Exception as e:
+        raise RuntimeError(f'Failed to export mesh: {str(e)}')
+    
+    return {
+        'success': True,
+        'mesh_path': mesh_path,
+        'output_filename': f"{generator_id}_mesh.ply",
+        'output_url': output_url(f"{generator_id}_mesh.ply")
+    }
+
+@app.route('/api/generator/release/<generator_id>', methods=['POST'])
+def release_generator(generator_id):
+    released = generators.release(generator_id)
+    if not generator_specs.delete(generator_id) and not released:
+        return jsonify({'error': 'Invalid generator ID'}), 400
+    return jsonify({'success': True, 'generator_id': generator_id})
+
 @app.route('/api/generator/text-to-3d', methods=['POST'])
 def text_to_3d():
-    data = request.json
-    generator_id = data.get('generator_id')
+    req = _parse_json(TextTo3DRequest)
+    if not req.prompt:
+        return jsonify({'error': 'Prompt is required'}), 400
     
-    if not generator_id or generator_id not in generators:
+    generator_id = req.generator_id
+    generator = _lookup_generator(generator_id, pin=True)
+    if generator is None:
         return jsonify({'error': 'Invalid generator ID'}), 400
     
-    prompt = data.get('prompt', '')
-    guidance_scale = data.get('guidance_scale', Config.DEFAULT_GUIDANCE_SCALE)
-    num_inference_steps = data.get('num_inference_steps', Config.DEFAULT_INFERENCE_STEPS)
-    frame_size = data.get('frame_size', Config.DEFAULT_FRAME_SIZE)
-    
-    if not prompt:
+    job = _pinned(generators, generator, _run_text_to_3d, pinned=True)
+    try:
+        return _dispatch_job(
+            req.is_async, job, generator, generator_id,
+            req.prompt, req.guidance_scale, req.num_inference_steps, req.frame_size
+        )
+    except Exception as e:
+        job.release()
+        return jsonify({'error': str(e)}), 500
+
+def _run_generator(generator, generator_id: str, prompt: str, guidance_scale: float,
+                   num_inference_steps: int, frame_size: int) -> Dict[str, Any]:
+    try:
+        result = _run_text_to_3d(generator, generator_id, prompt, guidance_scale, num_inference_steps, frame_size)
+    finally:
+        # Back on the free list, so the next run with the same model reuses
+        # the loaded pipeline instead of building a new one
+        generators.release(generator_id)
+    result['generator_id'] = generator_id
+    return result
+
+@app.route('/api/generator/run', methods=['POST'])
+def run_generator():
+    # create + text-to-3d in one round trip. The generator is only held for
+    # this job, so no spec is recorded and the ID only names the output
+    req = _parse_json(RunGeneratorRequest)
+    if not req.prompt:
         return jsonify({'error': 'Prompt is required'}), 400
     
+    generator_id = next_id()
     try:
-        generator = generators[generator_id]
-        mesh = generator.generate_mesh(
-            prompt=prompt,
-            guidance_scale=guidance_scale,
-            num_inference_steps=num_inference_steps,
-            frame_size=frame_size
+        generator = generators.acquire(generator_id, (req.type, req.model_path), req.type, req.model_path, pin=True)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    
+    job = _pinned(generators, generator, _run_generator, pinned=True)
+    try:
+        return _dispatch_job(
+            req.is_async, job, generator, generator_id,
+            req.prompt, req.guidance_scale, req.num_inference_steps, req.frame_size,
+            generator_id=generator_id
         )
-        
-        if mesh is None:
-            return jsonify({'error': 'Failed to generate mesh'}), 500
-        
-        output_path = Config.OUTPUT_DIR / f"{generator_id}_mesh.ply"
-        success = generator.export_mesh_to_ply(mesh, output_path)
-        
-        if success:
-            return jsonify({
-                'success': True,
-                'mesh_path': str(output_path),
-                'output_filename': f"{generator_id}_mesh.ply"
-            })
-        else:
-            return jsonify({'error': 'Failed to export mesh'}), 500
     except Exception as e:
+        job.release()
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/generator/image-to-3d', methods=['POST'])
-def image_to_3d():
-    data = request.json
-    generator_id = data.get('generator_id')
+def _run_image_to_3d(generator, generator_id: str, image, resolution: int,
+                     threshold: float) -> Dict[str, Any]:
+    mesh = _call_generator(
+        generator.generate_mesh_from_image,
+        image=image,
+        resolution=resolution,
+        threshold=threshold
+    )
     
-    if not generator_id or generator_id not in generators:
-        return jsonify({'error': 'Invalid generator ID'}), 400
+    if mesh is None:
+        raise RuntimeError('Failed to generate mesh')
+    
+    try:
+        mesh_path = _save_mesh(f"{generator_id}_image_mesh.ply", *trimesh_to_arrays(mesh))
+    except Exception as e:
+        raise RuntimeError(f'Failed to save mesh: {str(e)}')
     
+    return {
+        'success': True,
+        'mesh_path': mesh_path,
+        'output_filename': f"{generator_id}_image_mesh.ply",
+        'output_url': output_url(f"{generator_id}_image_mesh.ply")
+    }
+
+@app.route('/api/generator/image-to-3d', methods=['POST'])
+def image_to_3d():
+    # Uploads are multipart, so parameters normally come from the form fields
+    req = parse_request(ImageTo3DRequest, request.get_json(silent=True) or request.form.to_dict())
     if 'image' not in request.files:
         return jsonify({'error': 'Image file is required'}), 400
     
     image_file = request.files['image']
-    resolution = data.get('resolution', Config.MESH_RESOLUTION)
-    threshold = data.get('threshold', 25.0)
     
     try:
-        from PIL import Image
-        import io
-        
-        image = Image.open(io.BytesIO(image_file.read()))
-        
-        generator = generators[generator_id]
-        mesh = generator.generate_mesh_from_image(
-            image=image,
-            resolution=resolution,
-            threshold=threshold
+        image = open_image(image_file.stream, min_size=req.resolution)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    
+    generator_id = req.generator_id
+    generator = _lookup_generator(generator_id, pin=True)
+    if generator is None:
+        return jsonify({'error': 'Invalid generator ID'}), 400
+    
+    job = _pinned(generators, generator, _run_image_to_3d, pinned=True)
+    try:
+        return _dispatch_job(
+            req.is_async, job, generator, generator_id,
+            image, req.resolution, req.threshold
         )
-        
-        if mesh is None:
-            return jsonify({'error': 'Failed to generate mesh'}), 500
-        
-        output_path = Config.OUTPUT_DIR / f"{generator_id}_image_mesh.ply"
-        
-        try:
-            import trimesh
-            trimesh.Trimesh(vertices=mesh.vertices, faces=mesh.faces).export(str(output_path))
-            
-            return jsonify({
-                'success': True,
-                'mesh_path': str(output_path),
-                'output_filename': f"{generator_id}_image_mesh.ply"
-            })
-        except Exception as e:
-            return jsonify({'error': f'Failed to save mesh: {str(e)}'}), 500
     except Exception as e:
+        job.release()
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/slicer/create', methods=['POST'])
 def create_slicer_endpoint():
-    data = request.json
-    slicer_id = str(uuid.uuid4())
-    
-    config = SlicerConfig(
-        layer_height=data.get('layer_height', 0.2),
-        first_layer_height=data.get('first_layer_height', None),
-        nozzle_diameter=data.get('nozzle_diameter', 0.4),
-        fill_density=data.get('fill_density', 0.2),
-        fill_pattern=data.get('fill_pattern', 'grid'),
-        perimeter_count=data.get('perimeter_count', 2),
-        top_solid_layers=data.get('top_solid_layers', 3),
-        bottom_solid_layers=data.get('bottom_solid_layers', 3)
-    )
+    slicer_id = next_id()
+    
+    config_params = asdict(_parse_json(CreateSlicerRequest))
+    config = SlicerConfig(**config_params)
     
-    slicer = Slicer(config)
-    slicers[slicer_id] = slicer
+    slicers.acquire(slicer_id, None, config)
+    slicer_specs.put(slicer_id, {'config': config_params, 'mesh_path': None})
     
     return jsonify({
         'slicer_id': slicer_id,
@@ -233,23 +739,32 @@ def create_slicer_endpoint():
         }
     })
 
+@app.route('/api/slicer/release/<slicer_id>', methods=['POST'])
+def release_slicer(slicer_id):
+    released = slicers.release(slicer_id)
+    _delete_slicer_layers(slicer_id)
+    if not slicer_specs.delete(slicer_id) and not released:
+        return jsonify({'error': 'Invalid slicer ID'}), 400
+    return jsonify({'success': True, 'slicer_id': slicer_id})
+
 @app.route('/api/slicer/load', methods=['POST'])
 def load_mesh_to_slicer():
-    data = request.json
-    slicer_id = data.get('slicer_id')
-    mesh_path = data.get('mesh_path')
+    req = _parse_json(LoadMeshRequest)
+    slicer_id = req.slicer_id
+    mesh_path = req.mesh_path
     
-    if not slicer_id or slicer_id not in slicers:
+    slicer = _lookup_slicer(slicer_id)
+    if slicer is None:
         return jsonify({'error': 'Invalid slicer ID'}), 400
     
     if not mesh_path:
         return jsonify({'error': 'Mesh path is required'}), 400
     
     try:
-        slicer = slicers[slicer_id]
-        success = slicer.load_mesh(mesh_path)
+        success = _load_slicer_mesh(slicer, mesh_path)
         
         if success:
+            slicer_specs.update(slicer_id, mesh_path=mesh_path, sliced=False)
             stats = slicer.get_statistics()
             return jsonify({
                 'success': True,
@@ -260,37 +775,140 @@ def load_mesh_to_slicer():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _load_slicer_mesh(slicer: Slicer, mesh_path: str) -> bool:
+    if artifacts is not None and mesh_path.startswith(ARTIFACT_SCHEME):
+        data = artifacts.read(mesh_path[len(ARTIFACT_SCHEME):])
+        if data is None:
+            return False
+        return slicer.load_mesh(io.BytesIO(data), file_type='ply')
+    return slicer.load_mesh(mesh_path)
+
+def _run_slice_mesh(slicer: Slicer, slicer_id: str) -> Dict[str, Any]:
+    layers = slicer.slice_mesh()
+    # Shared with other server processes, which load the layers instead of
+    # slicing again
+    try:
+        slicer.save_layers(_slicer_layers_path(slicer_id))
+        slicer_specs.update(slicer_id, sliced=True)
+    except OSError as e:
+        print(f"Error saving layers of slicer {slicer_id}: {e}")
+    
+    return {
+        'success': True,
+        'total_layers': len(layers),
+        'statistics': slicer.get_statistics()
+    }
+
 @app.route('/api/slicer/slice', methods=['POST'])
 def slice_mesh():
-    data = request.json
-    slicer_id = data.get('slicer_id')
-    
-    if not slicer_id or slicer_id not in slicers:
+    req = _parse_json(SliceRequest)
+    slicer = _lookup_slicer(req.slicer_id, pin=True)
+    if slicer is None:
         return jsonify({'error': 'Invalid slicer ID'}), 400
     
+    job = _pinned(slicers, slicer, _run_slice_mesh, pinned=True)
     try:
-        slicer = slicers[slicer_id]
-        layers = slicer.slice_mesh()
-        
-        return jsonify({
-            'success': True,
-            'total_layers': len(layers),
-            'statistics': slicer.get_statistics()
-        })
+        return _dispatch_job(req.is_async, job, slicer, req.slicer_id)
     except Exception as e:
+        job.release()
         return jsonify({'error': str(e)}), 500
 
+def _run_slicer(slicer: Slicer, slicer_id: str, mesh_path: str) -> Dict[str, Any]:
+    if not _load_slicer_mesh(slicer, mesh_path):
+        raise RuntimeError('Failed to load mesh')
+    slicer_specs.update(slicer_id, mesh_path=mesh_path, sliced=False)
+    
+    result = _run_slice_mesh(slicer, slicer_id)
+    result['slicer_id'] = slicer_id
+    return result
+
+@app.route('/api/slicer/run', methods=['POST'])
+def run_slicer():
+    # create + load + slice in one round trip
+    req = _parse_json(RunSlicerRequest)
+    if not req.mesh_path:
+        return jsonify({'error': 'Mesh path is required'}), 400
+    
+    slicer_id = next_id()
+    config_params = {f.name: getattr(req, f.name) for f in fields(CreateSlicerRequest)}
+    slicer = slicers.acquire(slicer_id, None, SlicerConfig(**config_params), pin=True)
+    job = _pinned(slicers, slicer, _run_slicer, pinned=True)
+    
+    try:
+        slicer_specs.put(slicer_id, {'config': config_params, 'mesh_path': None})
+        return _dispatch_job(
+            req.is_async, job, slicer, slicer_id, req.mesh_path,
+            slicer_id=slicer_id
+        )
+    except Exception as e:
+        job.release()
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/slicer/progress/<slicer_id>', methods=['GET'])
+def get_slicer_progress(slicer_id):
+    # Only the process running the slice knows its progress, so a slicer is
+    # never rebuilt here
+    slicer = slicers.get(slicer_id)
+    if slicer is None:
+        return jsonify({'error': 'Invalid slicer ID'}), 404
+    return jsonify({'slicer_id': slicer_id, 'progress': slicer.progress})
+
+def _wants_msgpack() -> bool:
+    if not MSGPACK_AVAILABLE:
+        return False
+    fmt = request.args.get('format')
+    if fmt:
+        return fmt == 'msgpack'
+    return request.accept_mimetypes.best_match(['application/json', 'application/msgpack']) == 'application/msgpack'
+
+def _pack_ndarray(obj: Any) -> Any:
+    # Polylines as raw little-endian float32: about 2.5x smaller than JSON text
+    if isinstance(obj, np.ndarray):
+        data = np.ascontiguousarray(obj, dtype='<f4')
+        return {'__nd__': True, 'dtype': '<f4', 'shape': list(data.shape), 'data': data.tobytes()}
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not msgpack serializable")
+
+def _set_layer_cache_headers(response: Response, etag: str) -> None:
+    # Re-slicing changes the layers under the same URL, so browsers must
+    # revalidate every time; a match costs a 304 and no encoding
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    response.vary.add('Accept')
+
 @app.route('/api/slicer/layer/<slicer_id>/<int:layer_index>', methods=['GET'])
 def get_layer_preview(slicer_id, layer_index):
-    if slicer_id not in slicers:
+    slicer = _lookup_slicer(slicer_id)
+    if slicer is None:
         return jsonify({'error': 'Invalid slicer ID'}), 400
     
     try:
-        slicer = slicers[slicer_id]
-        layer_data = slicer.get_layer_preview(layer_index)
+        use_msgpack = _wants_msgpack()
+        etag = None
+        if slicer.slice_hash and 0 <= layer_index < len(slicer.layers):
+            etag = f"{slicer.slice_hash}-{layer_index}-{'msgpack' if use_msgpack else 'json'}"
+            # Scrubbing back over a layer is answered before any encoding
+            if request.if_none_match.contains(etag):
+                response = Response(status=304)
+                _set_layer_cache_headers(response, etag)
+                return response
+        
+        # Arrays go straight to the encoder instead of through tolist()
+        layer_data = slicer.get_layer_preview(layer_index, as_lists=False)
         
         if layer_data:
-            return jsonify(layer_data)
+            if use_msgpack:
+                response = Response(
+                    msgpack.packb(layer_data, default=_pack_ndarray),
+                    mimetype='application/msgpack'
+                )
+            else:
+                response = jsonify(layer_data)
+            if etag:
+                _set_layer_cache_headers(response, etag)
+            return response
         else:
             return jsonify({'error': 'Layer not found'}), 404
     except Exception as e:
@@ -298,22 +916,21 @@ def get_layer_preview(slicer_id, layer_index):
 
 @app.route('/api/slicer/export/gcode', methods=['POST'])
 def export_gcode():
-    data = request.json
-    slicer_id = data.get('slicer_id')
-    output_filename = data.get('output_filename', 'output.gcode')
+    req = _parse_json(SlicerExportRequest)
+    output_filename = req.output_filename or 'output.gcode'
     
-    if not slicer_id or slicer_id not in slicers:
+    slicer = _lookup_slicer(req.slicer_id)
+    if slicer is None:
         return jsonify({'error': 'Invalid slicer ID'}), 400
     
     try:
-        slicer = slicers[slicer_id]
-        output_path = Config.OUTPUT_DIR / output_filename
-        success = slicer.export_to_gcode(str(output_path))
+        output_path = os.path.join(OUTPUT_DIR, output_filename)
+        success = slicer.export_to_gcode(output_path)
         
         if success:
             return jsonify({
                 'success': True,
-                'output_path': str(output_path)
+                'output_path': output_path
             })
         else:
             return jsonify({'error': 'Failed to export G-code'}), 500
@@ -322,46 +939,165 @@ def export_gcode():
 
 @app.route('/api/slicer/export/json', methods=['POST'])
 def export_slicer_json():
-    data = request.json
-    slicer_id = data.get('slicer_id')
-    output_filename = data.get('output_filename', 'slicer_data.json')
+    req = _parse_json(SlicerExportRequest)
+    output_filename = req.output_filename or 'slicer_data.json'
     
-    if not slicer_id or slicer_id not in slicers:
+    slicer = _lookup_slicer(req.slicer_id)
+    if slicer is None:
         return jsonify({'error': 'Invalid slicer ID'}), 400
     
     try:
-        slicer = slicers[slicer_id]
-        output_path = Config.OUTPUT_DIR / output_filename
-        success = slicer.export_to_json(str(output_path))
+        output_path = os.path.join(OUTPUT_DIR, output_filename)
+        success = slicer.export_to_json(output_path)
         
         if success:
             return jsonify({
                 'success': True,
-                'output_path': str(output_path)
+                'output_path': output_path
             })
         else:
             return jsonify({'error': 'Failed to export JSON'}), 500
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job_status(job_id):
+    future = jobs.get(job_id)
+    if future is None:
+        # Queued by another server process
+        state = job_states.get(job_id)
+        if state is None:
+            return jsonify({'error': 'Invalid job ID'}), 404
+        return jsonify({'job_id': job_id, **state})
+    
+    if not future.done():
+        status = 'running' if future.running() else 'queued'
+        return jsonify({'job_id': job_id, 'status': status})
+    
+    try:
+        return jsonify({'job_id': job_id, 'status': 'done', 'result': future.result()})
+    except Exception as e:
+        return jsonify({'job_id': job_id, 'status': 'error', 'error': str(e)})
+
+OUTPUT_CHUNK_SIZE = 1024 * 1024
+
+class OutputFileWrapper(FileWrapper):
+    # Used only when the server provides no wsgi.file_wrapper (sendfile), in
+    # which case Werkzeug would otherwise stream the file in 8 KiB reads
+    def __init__(self, file, buffer_size: int = OUTPUT_CHUNK_SIZE):
+        super().__init__(file, max(buffer_size, OUTPUT_CHUNK_SIZE))
+        if hasattr(os, 'posix_fadvise') and hasattr(file, 'fileno'):
+            try:
+                os.posix_fadvise(file.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            except OSError:
+                pass
+
+OUTPUT_MAX_AGE = 31536000
+
+# path -> (mtime_ns, size, etag); generated files are rewritten in place, so
+# the content hash is recomputed whenever the file changes
+_output_etags: Dict[str, tuple] = {}
+
+def _output_etag(path: str) -> str:
+    st = os.stat(path)
+    cached = _output_etags.get(path)
+    if cached and cached[:2] == (st.st_mtime_ns, st.st_size):
+        return cached[2]
+    
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(OUTPUT_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    etag = digest.hexdigest()[:32]
+    _output_etags[path] = (st.st_mtime_ns, st.st_size, etag)
+    return etag
+
+def output_url(filename: str) -> str:
+    # Versioned URL: the content hash makes it safe to cache forever
+    artifact = artifacts.get(filename) if artifacts is not None else None
+    if artifact is not None:
+        return f"/api/output/{filename}?v={artifact.etag}"
+    path = safe_join(OUTPUT_DIR, filename)
+    return f"/api/output/{filename}?v={_output_etag(path)}"
+
+def _set_output_cache_headers(response: Response, etag: str) -> None:
+    if request.args.get('v') == etag:
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = OUTPUT_MAX_AGE
+        response.cache_control.immutable = True
+
 @app.route('/api/output/<path:filename>', methods=['GET'])
 def serve_output_file(filename):
-    return send_from_directory(Config.OUTPUT_DIR, filename)
+    artifact = artifacts.get(filename) if artifacts is not None else None
+    if artifact is not None:
+        response = Response(
+            artifacts.iter_chunks(artifact, OUTPUT_CHUNK_SIZE),
+            mimetype=artifact.mimetype,
+            direct_passthrough=True
+        )
+        response.content_length = artifact.length
+        response.set_etag(artifact.etag)
+        response.cache_control.no_cache = True
+        _set_output_cache_headers(response, artifact.etag)
+        return response.make_conditional(request)
+    
+    path = safe_join(OUTPUT_DIR, filename)
+    etag = _output_etag(path) if path and os.path.isfile(path) else True
+    
+    if Config.SENDFILE_MODE == 'x-accel' and etag is not True:
+        # nginx serves the bytes from an internal location with sendfile(2)
+        response = Response(mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream')
+        response.headers['X-Accel-Redirect'] = f"{Config.SENDFILE_ACCEL_PREFIX.rstrip('/')}/{filename}"
+        response.last_modified = os.path.getmtime(path)
+        response.set_etag(etag)
+        response.cache_control.no_cache = True
+        _set_output_cache_headers(response, etag)
+        return response.make_conditional(request)
+    
+    # Servers with their own wsgi.file_wrapper (gunicorn, waitress) use sendfile
+    request.environ.setdefault('wsgi.file_wrapper', OutputFileWrapper)
+    
+    if etag is not True and _use_zstd_copy(path):
+        response = send_from_directory(
+            OUTPUT_DIR, filename + '.zst',
+            mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream',
+            etag=f"{etag}-zstd", conditional=True
+        )
+        response.content_encoding = 'zstd'
+        response.vary.add('Accept-Encoding')
+        _set_output_cache_headers(response, etag)
+        return response
+    
+    response = send_from_directory(OUTPUT_DIR, filename, etag=etag, conditional=True)
+    
+    if etag is not True:
+        response.vary.add('Accept-Encoding')
+        _set_output_cache_headers(response, etag)
+    return response
+
+def _use_zstd_copy(path: str) -> bool:
+    # Byte ranges would refer to the compressed file, so those requests get
+    # the original; a copy older than the file is stale and ignored
+    if request.range is not None or 'zstd' not in request.accept_encodings:
+        return False
+    try:
+        return os.stat(path + '.zst').st_mtime_ns >= os.stat(path).st_mtime_ns
+    except OSError:
+        return False
 
 @app.route('/api/models/download', methods=['POST'])
 def download_model():
-    data = request.json
-    repo_id = data.get('repo_id')
-    model_type = data.get('model_type', '3d')
+    req = _parse_json(DownloadModelRequest)
+    repo_id = req.repo_id
+    model_type = req.model_type
     
     if not repo_id:
         return jsonify({'error': 'repo_id is required'}), 400
     
     try:
-        from backend.utils.model_downloader import create_progress_callback
-        
         progress_callback = None
-        if data.get('show_progress', False):
+        if req.show_progress:
             progress_callback = create_progress_callback(f"Downloading {repo_id}")
         
         path = model_downloader.download_model(
@@ -381,18 +1117,16 @@ def download_model():
 
 @app.route('/api/models/download-url', methods=['POST'])
 def download_model_url():
-    data = request.json
-    url = data.get('url')
-    output_name = data.get('output_name')
+    req = _parse_json(DownloadModelUrlRequest)
+    url = req.url
+    output_name = req.output_name
     
     if not url or not output_name:
         return jsonify({'error': 'url and output_name are required'}), 400
     
     try:
-        from backend.utils.model_downloader import create_progress_callback
-        
         progress_callback = None
-        if data.get('show_progress', False):
+        if req.show_progress:
             progress_callback = create_progress_callback(f"Downloading {output_name}")
         
         path = model_downloader.download_model_url(
@@ -411,8 +1145,7 @@ def download_model_url():
 
 @app.route('/api/models/auto-download', methods=['POST'])
 def auto_download_models():
-    data = request.json
-    force = data.get('force', False)
+    force = _parse_json(AutoDownloadRequest).force
     
     try:
         paths = model_downloader.auto_download_required_models(force=force)
@@ -463,28 +1196,27 @@ def get_model_size():
 
 @app.route('/api/llm/test-connection', methods=['POST'])
 def test_llm_connection():
-    data = request.json
-    provider = data.get('provider')
-    url = data.get('url')
+    req = _parse_json(TestConnectionRequest)
+    provider = req.provider
+    url = req.url
     
     if not provider:
         return jsonify({'error': 'provider is required'}), 400
     
     try:
         if provider == 'networked' and url:
-            import requests
             test_url = f"{url}/v1/models" if not url.endswith('/v1') else f"{url}/models"
             
             try:
-                response = requests.get(test_url, timeout=5)
-                available = response.status_code == 200
+                status_code = run_async(_probe_url(test_url))
+                available = status_code == 200
                 
                 return jsonify({
                     'success': True,
                     'provider': provider,
                     'url': url,
                     'available': available,
-                    'status_code': response.status_code
+                    'status_code': status_code
                 })
             except Exception as e:
                 return jsonify({
@@ -504,34 +1236,136 @@ def test_llm_connection():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# Resolved once: the web UI is either shipped with the package or not
+WEB_INDEX = Path(__file__).parent.parent.parent / 'frontend' / 'web' / 'index.html'
+WEB_INDEX_EXISTS = WEB_INDEX.exists()
+
+INDEX_BODY = orjson.dumps({
+    'name': 'AI 3D Model Generator API',
+    'version': '1.0.0',
+    'endpoints': [
+        '/api/health',
+        '/api/device/info',
+        '/api/llm/providers',
+        '/api/llm/generate-prompt',
+        '/api/generator/create',
+        '/api/generator/text-to-3d',
+        '/api/generator/image-to-3d',
+        '/api/generator/release/<generator_id>',
+        '/api/slicer/create',
+        '/api/slicer/release/<slicer_id>',
+        '/api/slicer/load',
+        '/api/slicer/slice',
+        '/api/slicer/layer/<slicer_id>/<layer_index>',
+        '/api/slicer/export/gcode',
+        '/api/slicer/export/json',
+        '/api/jobs/<job_id>'
+    ]
+})
+
 @app.route('/', methods=['GET'])
 def index():
-    web_path = Path(__file__).parent.parent.parent / 'frontend' / 'web' / 'index.html'
-    if web_path.exists():
-        return send_from_directory(str(web_path.parent), 'index.html')
-    return jsonify({
-        'name': 'AI 3D Model Generator API',
-        'version': '1.0.0',
-        'endpoints': [
-            '/api/health',
-            '/api/device/info',
-            '/api/llm/providers',
-            '/api/llm/generate-prompt',
-            '/api/generator/create',
-            '/api/generator/text-to-3d',
-            '/api/generator/image-to-3d',
-            '/api/slicer/create',
-            '/api/slicer/load',
-            '/api/slicer/slice',
-            '/api/slicer/layer/<slicer_id>/<layer_index>',
-            '/api/slicer/export/gcode',
-            '/api/slicer/export/json'
-        ]
-    })
+    if WEB_INDEX_EXISTS:
+        return send_from_directory(str(WEB_INDEX.parent), WEB_INDEX.name)
+    return Response(INDEX_BODY, mimetype='application/json')
+
+def _stop_on(shutdown_event: Optional[threading.Event], stop: Callable[[], None]) -> None:
+    if shutdown_event is not None:
+        def wait_and_stop():
+            shutdown_event.wait()
+            stop()
+        threading.Thread(target=wait_and_stop, name='ai3d-shutdown', daemon=True).start()
+
+def _serve_hypercorn(shutdown_event: Optional[threading.Event] = None) -> bool:
+    try:
+        from hypercorn.asyncio import serve
+        from hypercorn.config import Config as HypercornConfig
+    except ImportError:
+        print("Hypercorn not installed, falling back to Waitress")
+        return False
+    
+    initialize_app()
+    hypercorn_config = HypercornConfig()
+    hypercorn_config.bind = [f"{Config.API_HOST}:{Config.API_PORT}"]
+    
+    async def wait_for_event():
+        await asyncio.get_running_loop().run_in_executor(None, shutdown_event.wait)
+    
+    async def wait_forever():
+        await asyncio.Event().wait()
+    
+    if shutdown_event is not None:
+        shutdown_trigger = wait_for_event
+    elif threading.current_thread() is not threading.main_thread():
+        # Signal handlers can only be installed from the main thread
+        shutdown_trigger = wait_forever
+    else:
+        shutdown_trigger = None
+    
+    from backend.api.asgi_bridge import ThreadedWsgiToAsgi
+    asyncio.run(serve(ThreadedWsgiToAsgi(app), hypercorn_config, shutdown_trigger=shutdown_trigger))
+    return True
+
+def _serve_uvicorn(shutdown_event: Optional[threading.Event] = None) -> bool:
+    try:
+        import uvicorn
+    except ImportError:
+        print("Uvicorn not installed, falling back to Waitress")
+        return False
+    
+    if Config.API_WORKERS > 1 and threading.current_thread() is threading.main_thread():
+        # Worker processes import asgi.py and initialise themselves
+        uvicorn.run('asgi:application', host=Config.API_HOST, port=Config.API_PORT, workers=Config.API_WORKERS)
+    else:
+        initialize_app()
+        from backend.api.asgi_bridge import ThreadedWsgiToAsgi
+        server = uvicorn.Server(uvicorn.Config(ThreadedWsgiToAsgi(app), host=Config.API_HOST, port=Config.API_PORT))
+        _stop_on(shutdown_event, lambda: setattr(server, 'should_exit', True))
+        server.run()
+    return True
 
-def run_server():
-    init_llm_providers()
-    print(f"Starting server on {Config.API_HOST}:{Config.API_PORT}")
+def _serve_waitress(shutdown_event: Optional[threading.Event] = None) -> bool:
+    try:
+        from waitress.server import create_server
+    except ImportError:
+        print("Waitress not installed, falling back to Flask development server")
+        return False
+    
+    initialize_app()
+    # Health, device and job polls get their own threads instead of queueing
+    # behind a long generation request
+    server = create_server(app, host=Config.API_HOST, port=Config.API_PORT, threads=Config.WSGI_THREADS)
+    def stop():
+        # Let in-flight requests finish, then close the sockets on the
+        # server's own select loop rather than from this thread
+        server.task_dispatcher.shutdown()
+        server.trigger.pull_trigger(server.close)
+    
+    _stop_on(shutdown_event, stop)
+    server.run()
+    return True
+
+def run_server(shutdown_event: Optional[threading.Event] = None):
+    # shutdown_event lets an embedding process (the desktop GUI) stop a server
+    # running on a background thread, where signal handlers are unavailable
+    print(f"Starting server on {Config.API_HOST}:{Config.API_PORT} ({Config.API_SERVER})")
+    
+    if not Config.DEBUG:
+        if Config.API_SERVER == 'uvicorn' and _serve_uvicorn(shutdown_event):
+            return
+        if Config.API_SERVER == 'hypercorn' and _serve_hypercorn(shutdown_event):
+            return
+        # Also the fallback when the chosen ASGI server is not installed
+        if Config.API_SERVER != 'flask' and _serve_waitress(shutdown_event):
+            return
+    
+    initialize_app()
+    if shutdown_event is not None:
+        server = make_server(Config.API_HOST, Config.API_PORT, app, threaded=True)
+        _stop_on(shutdown_event, server.shutdown)
+        server.serve_forever()
+        return
+    
     app.run(
         host=Config.API_HOST,
         port=Config.API_PORT,
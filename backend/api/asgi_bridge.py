@@ -0,0 +1,61 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+
+from config.config import Config
+
+_executor = ThreadPoolExecutor(max_workers=Config.WSGI_THREADS, thread_name_prefix='ai3d-wsgi')
+
+class _ThreadedInstance(WsgiToAsgiInstance):
+    # asgiref runs WSGI calls thread-sensitively, i.e. all of them on a single
+    # thread, so one long generation request would block health checks, job
+    # polls and downloads. The WSGI call runs on the pool instead.
+    
+    async def run_wsgi_app(self, body):
+        await sync_to_async(self._run_wsgi_app, thread_sensitive=False, executor=_executor)(body)
+    
+    def _run_wsgi_app(self, body):
+        # Same steps as asgiref's run_wsgi_app, which is only reachable
+        # through its decorator. start_response runs on this thread too.
+        try:
+            environ = self.build_environ(self.scope, body)
+        except ValueError:
+            # Too many duplicate headers
+            self.sync_send({
+                'type': 'http.response.start',
+                'status': 400,
+                'headers': [(b'content-type', b'text/plain')],
+            })
+            self.sync_send({'type': 'http.response.body', 'body': b'Bad Request: Too many duplicate headers'})
+            return
+        
+        output = self.wsgi_application(environ, self.start_response)
+        try:
+            bytes_sent = 0
+            for chunk in output:
+                if not self.response_started:
+                    self.response_started = True
+                    self.sync_send(self.response_start)
+                # Never send more than the declared Content-Length
+                if self.response_content_length is not None:
+                    chunk = chunk[:self.response_content_length - bytes_sent]
+                self.sync_send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+                bytes_sent += len(chunk)
+                if bytes_sent == self.response_content_length:
+                    break
+        finally:
+            # WSGI requires close(); streamed artifacts release their blob here
+            if hasattr(output, 'close'):
+                output.close()
+        
+        if not self.response_started:
+            self.response_started = True
+            self.sync_send(self.response_start)
+        self.sync_send({'type': 'http.response.body'})
+
+class ThreadedWsgiToAsgi(WsgiToAsgi):
+    """WsgiToAsgi that serves concurrent requests on a shared thread pool."""
+    
+    async def __call__(self, scope, receive, send):
+        await _ThreadedInstance(self.wsgi_application)(scope, receive, send)
@@ -0,0 +1,153 @@
+from dataclasses import dataclass, field, fields
+import functools
+from typing import Any, Optional, Type, TypeVar
+
+from config.config import Config
+
+try:
+    import msgspec
+    MSGSPEC_AVAILABLE = True
+except ImportError:
+    MSGSPEC_AVAILABLE = False
+
+T = TypeVar('T')
+
+class RequestValidationError(ValueError):
+    pass
+
+def _coerce(name: str, expected: Any, value: Any) -> Any:
+    # Form fields arrive as strings; JSON numbers may be int where float is expected
+    if expected is bool:
+        if isinstance(value, str):
+            return value.strip().lower() in ('1', 'true', 'yes', 'on')
+        return bool(value)
+    if expected in (int, float):
+        try:
+            return expected(value)
+        except (TypeError, ValueError):
+            raise RequestValidationError(f"'{name}' must be a number")
+    return value
+
+def parse_request(cls: Type[T], data: Any) -> T:
+    if data is None:
+        data = {}
+    if not isinstance(data, dict):
+        raise RequestValidationError('Request body must be a JSON object')
+    
+    kwargs = {}
+    for f in fields(cls):
+        # "async" is a keyword, so the field is stored as is_async
+        key = 'async' if f.name == 'is_async' else f.name
+        value = data.get(key)
+        if value is not None:
+            kwargs[f.name] = _coerce(key, f.type, value)
+    return cls(**kwargs)
+
+@functools.lru_cache(maxsize=None)
+def _struct_for(cls: type):
+    # Every field is optional with a None default; defaults are filled in by
+    # the dataclass itself, exactly as in parse_request
+    return msgspec.defstruct(
+        f"{cls.__name__}Struct",
+        [(f.name, Optional[f.type], None) for f in fields(cls)],
+        rename={'is_async': 'async'}
+    )
+
+def decode_request(cls: Type[T], body: bytes) -> T:
+    """Parse, validate and build a request object straight from raw JSON bytes."""
+    try:
+        decoded = msgspec.json.decode(body, type=_struct_for(cls), strict=False)
+    except msgspec.ValidationError as e:
+        raise RequestValidationError(str(e))
+    except msgspec.DecodeError:
+        raise RequestValidationError('Request body is not valid JSON')
+    
+    kwargs = {}
+    for f in fields(cls):
+        value = getattr(decoded, f.name)
+        if value is not None:
+            kwargs[f.name] = value
+    return cls(**kwargs)
+
+@dataclass
+class JobRequest:
+    is_async: bool = False
+
+@dataclass
+class GeneratePromptRequest:
+    input: str = ''
+    provider: str = field(default_factory=lambda: Config.DEFAULT_LLM)
+
+@dataclass
+class CreateGeneratorRequest:
+    type: str = 'text-to-3d'
+    model_path: Optional[str] = None
+
+@dataclass
+class TextTo3DRequest(JobRequest):
+    generator_id: Optional[str] = None
+    prompt: str = ''
+    guidance_scale: float = field(default_factory=lambda: Config.DEFAULT_GUIDANCE_SCALE)
+    num_inference_steps: int = field(default_factory=lambda: Config.DEFAULT_INFERENCE_STEPS)
+    frame_size: int = field(default_factory=lambda: Config.DEFAULT_FRAME_SIZE)
+
+@dataclass
+class RunGeneratorRequest(TextTo3DRequest):
+    type: str = 'text-to-3d'
+    model_path: Optional[str] = None
+
+@dataclass
+class ImageTo3DRequest(JobRequest):
+    generator_id: Optional[str] = None
+    resolution: int = field(default_factory=lambda: Config.MESH_RESOLUTION)
+    threshold: float = 25.0
+
+@dataclass
+class CreateSlicerRequest:
+    layer_height: float = 0.2
+    first_layer_height: Optional[float] = None
+    nozzle_diameter: float = 0.4
+    fill_density: float = 0.2
+    fill_pattern: str = 'grid'
+    perimeter_count: int = 2
+    top_solid_layers: int = 3
+    bottom_solid_layers: int = 3
+
+@dataclass
+class RunSlicerRequest(CreateSlicerRequest, JobRequest):
+    mesh_path: Optional[str] = None
+
+@dataclass
+class LoadMeshRequest:
+    slicer_id: Optional[str] = None
+    mesh_path: Optional[str] = None
+
+@dataclass
+class SliceRequest(JobRequest):
+    slicer_id: Optional[str] = None
+
+@dataclass
+class SlicerExportRequest:
+    slicer_id: Optional[str] = None
+    output_filename: Optional[str] = None
+
+@dataclass
+class DownloadModelRequest:
+    repo_id: Optional[str] = None
+    model_type: str = '3d'
+    show_progress: bool = False
+
+@dataclass
+class DownloadModelUrlRequest:
+    url: Optional[str] = None
+    output_name: Optional[str] = None
+    show_progress: bool = False
+
+@dataclass
+class AutoDownloadRequest:
+    force: bool = False
+
+@dataclass
+class TestConnectionRequest:
+    provider: Optional[str] = None
+    url: Optional[str] = None
@@ -1,122 +1,196 @@
+import functools
+import threading
+import time
 import torch
 from typing import Optional, Literal
 
-class DeviceManager:
-    _instance = None
-    _device = None
-    
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-        return cls._instance
+from config.config import Config
+
+# Memory counters change constantly; everything else is fixed per device
+DYNAMIC_INFO_TTL = 0.2
+
+# Cache flushes are a memory hint, so they are batched off the request path
+CLEAR_CACHE_INTERVAL = 0.25
+
+_override: Optional[torch.device] = None
+_dynamic_info: Optional[dict] = None
+_dynamic_info_at = 0.0
+_clear_requested = threading.Event()
+_clear_thread: Optional[threading.Thread] = None
+_clear_thread_lock = threading.Lock()
+
+@functools.lru_cache(maxsize=None)
+def detect_device_type() -> Literal['cuda', 'rocm', 'mps', 'cpu']:
+    if torch.cuda.is_available():
+        device_name = torch.cuda.get_device_name(0).lower() if torch.cuda.device_count() > 0 else ''
+        if 'amd' in device_name or 'radeon' in device_name:
+            return 'rocm'
+        return 'cuda'
+    elif torch.backends.mps.is_available():
+        return 'mps'
+    else:
+        return 'cpu'
+
+def _detect_device() -> torch.device:
+    # Config resolves DEVICE=auto to the best available backend
+    device = torch.device(Config.DEVICE)
+    if device.type == 'cuda':
+        device_count = torch.cuda.device_count()
+        if device_count > 0:
+            if device.index is None:
+                device = torch.device('cuda:0')
+            torch.cuda.set_device(device)
+            device_name = torch.cuda.get_device_name(device.index)
+            
+            if 'amd' in device_name.lower() or 'radeon' in device_name.lower():
+                print(f"Using ROCm device (AMD GPU): {device_name}")
+            else:
+                print(f"Using CUDA device: {device_name}")
+            return device
+    elif device.type == 'mps':
+        print("Using MPS device (Apple Silicon)")
+        return torch.device('mps')
     
-    def __init__(self):
-        if self._device is None:
-            self._device = self._detect_device()
+    print("Using CPU device")
+    return torch.device('cpu')
+
+@functools.lru_cache(maxsize=None)
+def get_device() -> torch.device:
+    if _override is not None:
+        return _override
+    return _detect_device()
+
+def initialize_device(memory_fraction: float = 0.9) -> torch.device:
+    # Run driver probing at startup instead of inside the first request
+    device = get_device()
+    get_device_info()
     
-    @classmethod
-    def detect_device_type(cls) -> Literal['cuda', 'rocm', 'mps', 'cpu']:
-        if torch.cuda.is_available():
-            device_name = torch.cuda.get_device_name(0).lower() if torch.cuda.device_count() > 0 else ''
-            if 'amd' in device_name or 'radeon' in device_name:
-                return 'rocm'
-            return 'cuda'
-        elif torch.backends.mps.is_available():
-            return 'mps'
-        else:
-            return 'cpu'
+    if device.type == 'cuda':
+        # Leave headroom so one process cannot starve others sharing the GPU
+        torch.cuda.set_per_process_memory_fraction(memory_fraction, device)
+        torch.backends.cudnn.benchmark = True
+        torch.set_float32_matmul_precision('high')
     
-    def _detect_device(self) -> torch.device:
-        device_type = self.detect_device_type()
-        if device_type == 'cuda':
-            device_count = torch.cuda.device_count()
-            if device_count > 0:
-                device = torch.device(f'cuda:0')
-                torch.cuda.set_device(device)
-                device_name = torch.cuda.get_device_name(0).lower()
-                
-                if 'amd' in device_name or 'radeon' in device_name:
-                    print(f"Using ROCm device (AMD GPU): {torch.cuda.get_device_name(0)}")
-                else:
-                    print(f"Using CUDA device: {torch.cuda.get_device_name(0)}")
-                return device
-        elif device_type == 'mps':
-            print("Using MPS device (Apple Silicon)")
-            return torch.device('mps')
-        
-        print("Using CPU device")
-        return torch.device('cpu')
+    return device
+
+def set_device(device: str) -> None:
+    global _override, _dynamic_info
+    _override = torch.device(device)
+    _dynamic_info = None
+    get_device.cache_clear()
+    get_dtype.cache_clear()
+    _get_static_device_info.cache_clear()
+    _get_upload_stream.cache_clear()
+    print(f"Device set to: {device}")
+
+@functools.lru_cache(maxsize=None)
+def _get_static_device_info() -> dict:
+    device = get_device()
+    info = {
+        'type': device.type,
+        'index': device.index if device.index is not None else 0
+    }
     
-    @classmethod
-    def get_device(cls) -> torch.device:
-        if cls._instance is None:
-            cls._instance = cls()
-        return cls._instance._device
+    if device.type == 'cuda':
+        info.update({
+            'name': torch.cuda.get_device_name(device.index),
+            'memory_total': torch.cuda.get_device_properties(device.index).total_memory,
+            'capability': torch.cuda.get_device_capability(device.index)
+        })
+    elif device.type == 'mps':
+        info['name'] = 'Apple Silicon GPU (MPS)'
     
-    @classmethod
-    def set_device(cls, device: str) -> None:
-        if cls._instance is None:
-            cls._instance = cls()
-        cls._instance._device = torch.device(device)
-        print(f"Device set to: {device}")
+    return info
+
+def get_device_info() -> dict:
+    global _dynamic_info, _dynamic_info_at
+    device = get_device()
+    info = dict(_get_static_device_info())
     
-    @classmethod
-    def get_device_info(cls) -> dict:
-        if cls._instance is None:
-            cls._instance = cls()
-        
-        device = cls._instance._device
-        info = {
-            'type': device.type,
-            'index': device.index if device.index is not None else 0
-        }
-        
-        if device.type == 'cuda':
-            info.update({
-                'name': torch.cuda.get_device_name(device.index),
-                'memory_total': torch.cuda.get_device_properties(device.index).total_memory,
+    if device.type == 'cuda':
+        now = time.monotonic()
+        if _dynamic_info is None or now - _dynamic_info_at >= DYNAMIC_INFO_TTL:
+            _dynamic_info = {
                 'memory_allocated': torch.cuda.memory_allocated(device.index),
-                'memory_reserved': torch.cuda.memory_reserved(device.index),
-                'capability': torch.cuda.get_device_capability(device.index)
-            })
-        elif device.type == 'mps':
-            info['name'] = 'Apple Silicon GPU (MPS)'
-        
-        return info
+                'memory_reserved': torch.cuda.memory_reserved(device.index)
+            }
+            _dynamic_info_at = now
+        info.update(_dynamic_info)
     
-    @classmethod
-    def clear_cache(cls) -> None:
-        if cls._instance is None:
-            cls._instance = cls()
-        
-        if cls._instance._device.type == 'cuda':
-            torch.cuda.empty_cache()
-            torch.cuda.synchronize()
-        elif cls._instance._device.type == 'mps':
-            torch.mps.empty_cache()
-    
-    @classmethod
-    def to_device(cls, tensor: torch.Tensor) -> torch.Tensor:
-        return tensor.to(cls.get_device())
-    
-    @classmethod
-    def get_dtype(cls) -> torch.dtype:
-        device = cls.get_device()
-        if device.type in ['cuda', 'mps']:
-            return torch.float16
-        return torch.float32
+    return info
 
-def get_device() -> torch.device:
-    return DeviceManager.get_device()
+def _empty_cache(device: torch.device) -> None:
+    # empty_cache respects stream semantics, so no device-wide synchronize
+    if device.type == 'cuda':
+        with torch.cuda.device(device):
+            torch.cuda.empty_cache()
+    elif device.type == 'mps':
+        torch.mps.empty_cache()
 
-def get_device_info() -> dict:
-    return DeviceManager.get_device_info()
+def _clear_cache_worker() -> None:
+    while True:
+        _clear_requested.wait()
+        _clear_requested.clear()
+        try:
+            _empty_cache(get_device())
+        except Exception as e:
+            print(f"Error clearing device cache: {e}")
+        # Requests arriving meanwhile are coalesced into the next flush
+        time.sleep(CLEAR_CACHE_INTERVAL)
 
 def clear_cache() -> None:
-    DeviceManager.clear_cache()
+    global _clear_thread
+    if get_device().type not in ('cuda', 'mps'):
+        return
+    
+    if _clear_thread is None:
+        with _clear_thread_lock:
+            if _clear_thread is None:
+                _clear_thread = threading.Thread(target=_clear_cache_worker, name='device-cache', daemon=True)
+                _clear_thread.start()
+    _clear_requested.set()
+
+@functools.lru_cache(maxsize=None)
+def _get_upload_stream() -> Optional[torch.cuda.Stream]:
+    device = get_device()
+    if device.type == 'cuda':
+        return torch.cuda.Stream(device)
+    return None
 
 def to_device(tensor: torch.Tensor) -> torch.Tensor:
-    return DeviceManager.to_device(tensor)
+    # On CUDA, host tensors are pinned and copied on a dedicated upload stream
+    # so the transfer overlaps with compute. Call wait_for_uploads() before
+    # using the result on the current stream.
+    device = get_device()
+    stream = _get_upload_stream()
+    if stream is None:
+        return tensor.to(device, non_blocking=True)
+    
+    if tensor.device.type == 'cpu' and not tensor.is_pinned():
+        tensor = tensor.pin_memory()
+    with torch.cuda.stream(stream):
+        result = tensor.to(device, non_blocking=True)
+    result.record_stream(torch.cuda.current_stream(device))
+    return result
+
+def wait_for_uploads() -> None:
+    stream = _get_upload_stream()
+    if stream is not None:
+        torch.cuda.current_stream(stream.device).wait_stream(stream)
 
+@functools.lru_cache(maxsize=None)
 def get_dtype() -> torch.dtype:
-    return DeviceManager.get_dtype()
+    # BF16 keeps FP32's exponent range (no attention softmax overflow) at FP16
+    # throughput on Ampere+ tensor cores; older GPUs fall back to FP16
+    device = get_device()
+    if device.type == 'cuda':
+        if torch.cuda.get_device_capability(device)[0] >= 8:
+            return torch.bfloat16
+        return torch.float16
+    elif device.type == 'mps':
+        try:
+            torch.zeros(1, dtype=torch.bfloat16, device=device)
+            return torch.bfloat16
+        except (RuntimeError, TypeError):
+            return torch.float16
+    return torch.float32
@@ -1,6 +1,179 @@
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional
-import json
+from collections import OrderedDict
+from typing import AsyncIterator, Dict, List, Optional
+import asyncio
+import bisect
+import copy
+import hashlib
+import importlib.util
+import itertools
+import re
+import time
+
+import orjson
+
+_SYSTEM_PROMPT = """You are a 3D model generation assistant.
+Analyze the user's input and create a detailed prompt for 3D model generation.
+
+Return your response as JSON with these fields:
+- "prompt": The main text-to-3D prompt
+- "negative_prompt": Things to avoid in the 3D model
+- "style": The artistic style (realistic, stylized, cartoon, etc.)
+- "quality": Quality settings (high, medium, low)
+- "guidance_scale": Recommended guidance scale (1-20)
+- "inference_steps": Recommended number of inference steps (10-100)"""
+
+_USER_PROMPT_TEMPLATE = """Convert this user request into a 3D model generation prompt:
+
+User input: {user_input}
+
+Consider:
+- What object should be created?
+- What are the key visual details?
+- What materials should be used?
+- What size and proportions?
+- Any specific poses or orientations?"""
+
+# Returned when a provider's reply is not valid JSON
+_FALLBACK_3D_PROMPT = {
+    "prompt": "",
+    "negative_prompt": "",
+    "style": "realistic",
+    "quality": "high",
+    "guidance_scale": 7.5,
+    "inference_steps": 50
+}
+
+_http_client = None
+
+def _shared_http_client():
+    # One pooled client for every OpenAI-compatible provider, so TCP/TLS
+    # connections are reused (and multiplexed over HTTP/2 when h2 is
+    # installed) instead of each provider keeping its own pool
+    global _http_client
+    if _http_client is None:
+        import httpx
+        import openai
+        http2 = importlib.util.find_spec("h2") is not None
+        # Keeps the SDK's default timeouts where the SDK provides the class
+        client_class = getattr(openai, "DefaultAsyncHttpxClient", httpx.AsyncClient)
+        _http_client = client_class(
+            http2=http2,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=50)
+        )
+    return _http_client
+
+async def close_http_client() -> None:
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+# Shape of a 3D prompt reply, for decoders that can enforce it
+_3D_PROMPT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "prompt": {"type": "string"},
+        "negative_prompt": {"type": "string"},
+        "style": {"type": "string"},
+        "quality": {"type": "string", "enum": ["high", "medium", "low"]},
+        "guidance_scale": {"type": "number", "minimum": 1, "maximum": 20},
+        "inference_steps": {"type": "integer", "minimum": 10, "maximum": 100}
+    },
+    "required": ["prompt", "negative_prompt", "style", "quality", "guidance_scale", "inference_steps"]
+}
+
+def _build_3d_prompt(user_input: str) -> str:
+    return f"{_SYSTEM_PROMPT}\n\n{_USER_PROMPT_TEMPLATE.format(user_input=user_input)}"
+
+def _fallback_3d_prompt(user_input: str) -> Dict:
+    return dict(_FALLBACK_3D_PROMPT, prompt=user_input)
+
+# (model_path, model_type, quantization, compiled) -> loaded LocalLLMProvider
+# state, so providers pointing at the same weights share one copy in VRAM
+_loaded_models: Dict[tuple, Dict] = {}
+
+# Local models often wrap the object in prose or a code fence
+_JSON_OBJECT_RE = re.compile(r"\{.*\}", re.DOTALL)
+
+def _parse_3d_prompt(response: str, user_input: str) -> Dict:
+    match = _JSON_OBJECT_RE.search(response or "")
+    if match:
+        try:
+            result = orjson.loads(match.group())
+            if isinstance(result, dict):
+                return result
+        except orjson.JSONDecodeError:
+            pass
+    return _fallback_3d_prompt(user_input)
+
+class _IncrementalJsonObject:
+    """
+    Finds the first JSON object in streamed text, scanning each character
+    once. feed() returns the object parsed so far whenever another of its
+    top-level members is complete, so callers can act on "prompt" before
+    the model has finished writing the rest.
+    """
+    
+    def __init__(self):
+        self.buffer = ""
+        self.complete: Optional[Dict] = None
+        self._pos = 0
+        self._start = -1
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+    
+    def feed(self, text: str) -> Optional[Dict]:
+        if self.complete is not None:
+            return None
+        
+        self.buffer += text
+        buffer = self.buffer
+        partial = None
+        for i in range(self._pos, len(buffer)):
+            ch = buffer[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = self._depth > 0
+            elif ch == "{" or (ch == "[" and self._depth > 0):
+                if self._depth == 0:
+                    self._start = i
+                self._depth += 1
+            elif ch in "}]" and self._depth > 0:
+                self._depth -= 1
+                if self._depth == 0:
+                    self.complete = self._parse(buffer[self._start:i + 1])
+                    partial = self.complete
+                    break
+            elif ch == "," and self._depth == 1:
+                partial = self._parse(buffer[self._start:i] + "}") or partial
+        self._pos = len(buffer)
+        return partial
+    
+    @staticmethod
+    def _parse(text: str) -> Optional[Dict]:
+        try:
+            value = orjson.loads(text)
+        except orjson.JSONDecodeError:
+            return None
+        return value if isinstance(value, dict) else None
+
+async def _stream_3d_prompt(chunks: AsyncIterator[str], user_input: str) -> AsyncIterator[Dict]:
+    # The last item is always the final result: the whole object, or the
+    # fallback when the reply never contained valid JSON
+    parser = _IncrementalJsonObject()
+    async for text in chunks:
+        partial = parser.feed(text)
+        if partial is not None and partial is not parser.complete:
+            yield partial
+    yield parser.complete if parser.complete is not None else _fallback_3d_prompt(user_input)
 
 class BaseLLMProvider(ABC):
     def __init__(self, api_key: str):
@@ -10,16 +183,36 @@ class BaseLLMProvider(ABC):
     async def generate_text(self, prompt: str, **kwargs) -> str:
         pass
     
-    @abstractmethod
+    async def generate_text_stream(self, prompt: str, **kwargs) -> AsyncIterator[str]:
+        # Providers without a streaming API return the reply as one chunk
+        yield await self.generate_text(prompt, **kwargs)
+    
+    def _3d_prompt_request(self, user_input: str) -> Dict:
+        # generate_text_stream() arguments for a 3D prompt request
+        return {"prompt": _build_3d_prompt(user_input), "temperature": 0.7}
+    
+    async def generate_3d_prompt_stream(self, user_input: str) -> AsyncIterator[Dict]:
+        # Partial results as the reply streams in; the last item is always
+        # the complete prompt
+        chunks = self.generate_text_stream(**self._3d_prompt_request(user_input))
+        async for result in _stream_3d_prompt(chunks, user_input):
+            yield result
+    
     async def generate_3d_prompt(self, user_input: str) -> Dict:
-        pass
+        async for result in self.generate_3d_prompt_stream(user_input):
+            pass
+        return result
+    
+    async def healthcheck(self) -> bool:
+        # Providers whose backend can go away after startup override this
+        return self.available
 
 class OpenAIProvider(BaseLLMProvider):
     def __init__(self, api_key: str):
         super().__init__(api_key)
         try:
             import openai
-            self.client = openai.AsyncOpenAI(api_key=api_key)
+            self.client = openai.AsyncOpenAI(api_key=api_key, http_client=_shared_http_client())
             self.available = True
         except ImportError:
             self.client = None
@@ -36,47 +229,20 @@ class OpenAIProvider(BaseLLMProvider):
         )
         return response.choices[0].message.content
     
-    async def generate_3d_prompt(self, user_input: str) -> Dict:
-        system_prompt = """You are a 3D model generation assistant. 
-        Analyze the user's input and create a detailed prompt for 3D model generation.
-        
-        Return your response as JSON with these fields:
-        - "prompt": The main text-to-3D prompt
-        - "negative_prompt": Things to avoid in the 3D model
-        - "style": The artistic style (realistic, stylized, cartoon, etc.)
-        - "quality": Quality settings (high, medium, low)
-        - "guidance_scale": Recommended guidance scale (1-20)
-        - "inference_steps": Recommended number of inference steps (10-100)"""
-        
-        user_prompt = f"""Convert this user request into a 3D model generation prompt:
-        
-        User input: {user_input}
-        
-        Consider:
-        - What object should be created?
-        - What are the key visual details?
-        - What materials should be used?
-        - What size and proportions?
-        - Any specific poses or orientations?"""
-        
-        response = await self.generate_text(
-            prompt=f"{system_prompt}\n\n{user_prompt}",
-            model="anthropic/claude-3-opus",
-            temperature=0.7
-        )
+    async def generate_text_stream(self, prompt: str, model: str = "gpt-4", **kwargs) -> AsyncIterator[str]:
+        if not self.available:
+            raise RuntimeError("OpenAI library not installed")
         
-        try:
-            return json.loads(response)
-        except json.JSONDecodeError:
-            return {
-                "prompt": user_input,
-                "negative_prompt": "",
-                "style": "realistic",
-                "quality": "high",
-                "guidance_scale": 7.5,
-                "inference_steps": 50
-            }
-
+        stream = await self.client.chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            stream=True,
+            **kwargs
+        )
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    
 class AnthropicProvider(BaseLLMProvider):
     def __init__(self, api_key: str):
         super().__init__(api_key)
@@ -88,157 +254,420 @@ class AnthropicProvider(BaseLLMProvider):
             self.client = None
             self.available = False
     
-    async def generate_text(self, prompt: str, model: str = "claude-3-opus-20240229", **kwargs) -> str:
+    async def generate_text(self, prompt: str, model: str = "claude-3-opus-20240229",
+                            system: Optional[str] = None, **kwargs) -> str:
         if not self.available:
             raise RuntimeError("Anthropic library not installed")
         
+        if system:
+            # A static system block marked cacheable lets the API reuse the
+            # processed prefix across requests instead of re-reading it
+            kwargs["system"] = [{"type": "text", "text": system, "cache_control": {"type": "ephemeral"}}]
+        
         response = await self.client.messages.create(
             model=model,
             max_tokens=4096,
-            messages=[{"role": "user", "content": prompt}]
+            messages=[{"role": "user", "content": prompt}],
+            **kwargs
         )
         return response.content[0].text
     
-    async def generate_3d_prompt(self, user_input: str) -> Dict:
-        system_prompt = """You are a 3D model generation assistant. 
-        Analyze the user's input and create a detailed prompt for 3D model generation.
-        
-        Return your response as JSON with these fields:
-        - "prompt": The main text-to-3D prompt
-        - "negative_prompt": Things to avoid in the 3D model
-        - "style": The artistic style (realistic, stylized, cartoon, etc.)
-        - "quality": Quality settings (high, medium, low)
-        - "guidance_scale": Recommended guidance scale (1-20)
-        - "inference_steps": Recommended number of inference steps (10-100)"""
-        
-        user_prompt = f"""Convert this user request into a 3D model generation prompt:
-        
-        User input: {user_input}
-        
-        Consider:
-        - What object should be created?
-        - What are the key visual details?
-        - What materials should be used?
-        - What size and proportions?
-        - Any specific poses or orientations?"""
-        
-        response = await self.generate_text(
-            prompt=f"{system_prompt}\n\n{user_prompt}",
-            model="claude-3-opus-20240229"
-        )
+    async def generate_text_stream(self, prompt: str, model: str = "claude-3-opus-20240229",
+                                   system: Optional[str] = None, **kwargs) -> AsyncIterator[str]:
+        if not self.available:
+            raise RuntimeError("Anthropic library not installed")
         
-        try:
-            return json.loads(response)
-        except json.JSONDecodeError:
-            return {
-                "prompt": user_input,
-                "negative_prompt": "",
-                "style": "realistic",
-                "quality": "high",
-                "guidance_scale": 7.5,
-                "inference_steps": 50
-            }
+        if system:
+            kwargs["system"] = [{"type": "text", "text": system, "cache_control": {"type": "ephemeral"}}]
+        
+        async with self.client.messages.stream(
+            model=model,
+            max_tokens=4096,
+            messages=[{"role": "user", "content": prompt}],
+            **kwargs
+        ) as stream:
+            async for text in stream.text_stream:
+                yield text
+    
+    def _3d_prompt_request(self, user_input: str) -> Dict:
+        return {"prompt": _USER_PROMPT_TEMPLATE.format(user_input=user_input), "system": _SYSTEM_PROMPT}
 
 class LocalLLMProvider(BaseLLMProvider):
-    def __init__(self, model_path: str, model_type: str = "transformers"):
+    QUANTIZATION_MODES = ("none", "int8", "nf4", "fp8")
+    # Concurrent 3D prompt requests arriving within BATCH_WINDOW seconds of
+    # each other share one batched generate() call
+    BATCH_WINDOW = 0.01
+    MAX_BATCH = 8
+    # Loaded once per model and shared by every provider using it; the lock
+    # keeps them from running forward passes on the same weights concurrently
+    SHARED_STATE = ("tokenizer", "model", "quantization", "compiled", "_json_generator",
+                    "_prefix_ids", "_prefix_cache", "_generate_lock")
+    
+    def __init__(self, model_path: str, model_type: str = "transformers", quantization: str = "none",
+                 compile_model: bool = False):
         super().__init__("")
         self.model_path = model_path
         self.model_type = model_type
+        self.quantization = quantization if quantization in self.QUANTIZATION_MODES else "none"
+        self.compiled = False
+        self._generate_lock = asyncio.Lock()
+        self._batch_queue: Optional[asyncio.Queue] = None
+        
+        model_key = (model_path, model_type, self.quantization, compile_model)
+        shared = _loaded_models.get(model_key)
+        if shared is not None:
+            print(f"Reusing local LLM already loaded from {model_path}")
+            for name, value in shared.items():
+                setattr(self, name, value)
+            self.available = True
+            return
+        
         try:
             from transformers import AutoModelForCausalLM, AutoTokenizer
             import torch
             
-            print(f"Loading local LLM from {model_path} ({model_type})...")
+            print(f"Loading local LLM from {model_path} ({model_type}, quantization: {self.quantization})...")
+            
+            if self.quantization != "none" and not torch.cuda.is_available():
+                print("Quantized loading needs a CUDA device, loading unquantized weights")
+                self.quantization = "none"
             
             if model_type == "glm4":
                 from transformers import AutoModelForCausalLM, AutoTokenizer
                 self.tokenizer = AutoTokenizer.from_pretrained(
                     model_path,
+                    use_fast=True,
+                    padding_side="left",
                     trust_remote_code=True
                 )
                 self.model = AutoModelForCausalLM.from_pretrained(
                     model_path,
                     torch_dtype=torch.float16 if torch.cuda.is_available() else torch.float32,
                     device_map="auto" if torch.cuda.is_available() else None,
-                    trust_remote_code=True
+                    trust_remote_code=True,
+                    attn_implementation="sdpa",
+                    **self._quantization_kwargs(torch)
                 )
             else:
-                self.tokenizer = AutoTokenizer.from_pretrained(model_path)
+                self.tokenizer = AutoTokenizer.from_pretrained(model_path, use_fast=True, padding_side="left")
                 self.model = AutoModelForCausalLM.from_pretrained(
                     model_path,
                     torch_dtype=torch.float16 if torch.cuda.is_available() else torch.float32,
-                    device_map="auto" if torch.cuda.is_available() else None
+                    device_map="auto" if torch.cuda.is_available() else None,
+                    **self._quantization_kwargs(torch)
                 )
             
+            if self.quantization == "fp8":
+                self._quantize_fp8(torch)
+            
+            self.model.eval()
+            if not getattr(self.tokenizer, "is_fast", False):
+                print(f"No fast (Rust) tokenizer for {model_path}, using the slower Python one")
+            if self.tokenizer.pad_token is None:
+                self.tokenizer.pad_token = self.tokenizer.eos_token
+            if compile_model:
+                self.compiled = self._compile_model(torch)
+            self._json_generator = self._build_json_generator()
+            # A compiled model decodes into a static cache, which cannot
+            # continue from a dynamic prefix cache
+            self._prefix_ids, self._prefix_cache = (None, None) if self.compiled else self._build_prefix_cache()
             self.available = True
+            _loaded_models[model_key] = {name: getattr(self, name) for name in self.SHARED_STATE}
             print(f"Local LLM loaded successfully from {model_path}")
         except Exception as e:
             print(f"Failed to load local LLM: {e}")
             self.model = None
+            self._json_generator = None
+            self._prefix_ids, self._prefix_cache = None, None
             self.available = False
     
+    def _compile_model(self, torch) -> bool:
+        # Fixed-size static KV cache + CUDA graphs: each decode step replays
+        # one captured graph instead of dispatching every op from Python
+        if not torch.cuda.is_available() or not hasattr(torch, "compile"):
+            print("torch.compile needs a CUDA device, running the local LLM eagerly")
+            return False
+        if self.quantization in ("int8", "nf4"):
+            print("bitsandbytes weights do not compile, running the local LLM eagerly")
+            return False
+        
+        eager_forward = self.model.forward
+        try:
+            self.model.generation_config.cache_implementation = "static"
+            self.model.forward = torch.compile(self.model.forward, mode="reduce-overhead", dynamic=False)
+            
+            # Compile now rather than inside the first user request
+            print("Compiling local LLM...")
+            inputs = self.tokenizer("Hello", return_tensors="pt").to(self.model.device)
+            with torch.inference_mode():
+                self.model.generate(**inputs, max_new_tokens=4, pad_token_id=self.tokenizer.pad_token_id)
+            return True
+        except Exception as e:
+            print(f"torch.compile failed, running the local LLM eagerly: {e}")
+            self.model.generation_config.cache_implementation = None
+            self.model.forward = eager_forward
+            return False
+    
+    def _build_json_generator(self):
+        # Only tokens that keep the output valid against the schema can be
+        # sampled, so replies are short and always parse
+        try:
+            from outlines import generate, models
+            return generate.json(models.Transformers(self.model, self.tokenizer), orjson.dumps(_3D_PROMPT_SCHEMA).decode())
+        except ImportError:
+            return None
+        except Exception as e:
+            print(f"Constrained JSON decoding unavailable, using free text: {e}")
+            return None
+    
+    def _quantize_fp8(self, torch) -> None:
+        # FP8 weights and dynamically scaled FP8 activations run the linear
+        # layers on FP8 tensor cores, which only Ada/Hopper (sm_89+) have
+        if torch.cuda.get_device_capability() < (8, 9):
+            print("FP8 needs an Ada or Hopper GPU, loading unquantized weights")
+            self.quantization = "none"
+            return
+        
+        from torchao.quantization import quantize_, float8_dynamic_activation_float8_weight, PerRow
+        
+        # The first and last blocks and attention are the most sensitive to
+        # FP8 rounding, so only the other blocks' MLP projections are converted
+        num_layers = getattr(self.model.config, "num_hidden_layers", 0)
+        edge_layers = {0, num_layers - 1}
+        
+        def convert(module, fqn: str) -> bool:
+            if not isinstance(module, torch.nn.Linear) or "attn" in fqn or "attention" in fqn:
+                return False
+            match = re.search(r"\.layers\.(\d+)\.", fqn)
+            return match is not None and int(match.group(1)) not in edge_layers
+        
+        quantize_(self.model, float8_dynamic_activation_float8_weight(granularity=PerRow()), filter_fn=convert)
+    
+    def _quantization_kwargs(self, torch) -> Dict:
+        # Decoding is bound by reading the weights, so smaller weights decode
+        # proportionally faster and need a fraction of the VRAM
+        if self.quantization not in ("int8", "nf4"):
+            return {}
+        
+        from transformers import BitsAndBytesConfig
+        if self.quantization == "int8":
+            return {"quantization_config": BitsAndBytesConfig(load_in_8bit=True)}
+        return {"quantization_config": BitsAndBytesConfig(
+            load_in_4bit=True,
+            bnb_4bit_quant_type="nf4",
+            bnb_4bit_use_double_quant=True,
+            bnb_4bit_compute_dtype=torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+        )}
+    
     async def generate_text(self, prompt: str, **kwargs) -> str:
         if not self.available:
             raise RuntimeError("Local LLM not available")
         
+        # One forward pass on the GPU at a time; waiting requests yield to
+        # the event loop so remote providers keep being served meanwhile
+        async with self._generate_lock:
+            return await asyncio.to_thread(self._blocking_generate, prompt)
+    
+    def _blocking_generate(self, prompt: str) -> str:
         inputs = self.tokenizer(prompt, return_tensors="pt")
-        if hasattr(self.model, 'device'):
-            inputs = {k: v.to(self.model.device) for k, v in inputs.items()}
-        
-        outputs = self.model.generate(
-            **inputs,
-            max_new_tokens=512,
-            temperature=0.7,
-            do_sample=True
-        )
-        
-        response = self.tokenizer.decode(outputs[0], skip_special_tokens=True)
-        return response[len(prompt):]
+        return self._generate_ids(inputs["input_ids"], inputs.get("attention_mask"))
     
-    async def generate_3d_prompt(self, user_input: str) -> Dict:
-        system_prompt = """You are a 3D model generation assistant. 
-        Analyze the user's input and create a detailed prompt for 3D model generation.
-        
-        Return your response as JSON with these fields:
-        - "prompt": The main text-to-3D prompt
-        - "negative_prompt": Things to avoid in the 3D model
-        - "style": The artistic style (realistic, stylized, cartoon, etc.)
-        - "quality": Quality settings (high, medium, low)
-        - "guidance_scale": Recommended guidance scale (1-20)
-        - "inference_steps": Recommended number of inference steps (10-100)"""
+    def _blocking_generate_with_prefix(self, text: str) -> str:
+        # Only the per-request text is tokenized and prefilled; generate()
+        # continues from a copy of the system prompt's cached keys/values
+        import torch
+        
+        user_ids = self.tokenizer(text, add_special_tokens=False, return_tensors="pt").input_ids
+        input_ids = torch.cat([self._prefix_ids, user_ids.to(self._prefix_ids.device)], dim=1)
+        with torch.inference_mode():
+            past_key_values = copy.deepcopy(self._prefix_cache)
+        return self._generate_ids(input_ids, torch.ones_like(input_ids), past_key_values)
+    
+    def _generate_ids(self, input_ids, attention_mask=None, past_key_values=None) -> str:
+        import torch
         
-        user_prompt = f"""Convert this user request into a 3D model generation prompt:
+        if hasattr(self.model, 'device'):
+            input_ids = input_ids.to(self.model.device)
+            if attention_mask is not None:
+                attention_mask = attention_mask.to(self.model.device)
+        
+        with torch.inference_mode():
+            outputs = self.model.generate(
+                input_ids=input_ids,
+                attention_mask=attention_mask,
+                past_key_values=past_key_values,
+                max_new_tokens=512,
+                temperature=0.7,
+                do_sample=True,
+                use_cache=True,
+                pad_token_id=self.tokenizer.eos_token_id
+            )
         
-        User input: {user_input}
+        return self.tokenizer.decode(outputs[0][input_ids.shape[1]:], skip_special_tokens=True)
+    
+    def _blocking_generate_batch(self, prompts: List[str]) -> List[str]:
+        import torch
         
-        Consider:
-        - What object should be created?
-        - What are the key visual details?
-        - What materials should be used?
-        - What size and proportions?
-        - Any specific poses or orientations?"""
+        inputs = self.tokenizer(prompts, return_tensors="pt", padding=True)
+        if hasattr(self.model, 'device'):
+            inputs = {k: v.to(self.model.device) for k, v in inputs.items()}
         
-        full_prompt = f"{system_prompt}\n\n{user_prompt}\n\nResponse:"
+        with torch.inference_mode():
+            outputs = self.model.generate(
+                **inputs,
+                max_new_tokens=512,
+                temperature=0.7,
+                do_sample=True,
+                use_cache=True,
+                pad_token_id=self.tokenizer.pad_token_id
+            )
         
-        response = await self.generate_text(full_prompt)
+        prompt_length = inputs["input_ids"].shape[1]
+        return self.tokenizer.batch_decode(outputs[:, prompt_length:], skip_special_tokens=True)
+    
+    async def _generate_batched(self, full_prompt: str, user_text: str) -> str:
+        loop = asyncio.get_running_loop()
+        if self._batch_queue is None:
+            self._batch_queue = asyncio.Queue()
+            loop.create_task(self._batch_loop(self._batch_queue))
+        
+        future = loop.create_future()
+        self._batch_queue.put_nowait((full_prompt, user_text, future))
+        return await future
+    
+    async def _batch_loop(self, queue: asyncio.Queue) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + self.BATCH_WINDOW
+            while len(batch) < self.MAX_BATCH:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            batch = [item for item in batch if not item[2].cancelled()]
+            if not batch:
+                continue
+            
+            try:
+                async with self._generate_lock:
+                    if len(batch) == 1 and self._prefix_cache is not None:
+                        # Alone, a request is cheapest on top of the cached prefix
+                        responses = [await asyncio.to_thread(self._blocking_generate_with_prefix, batch[0][1])]
+                    else:
+                        responses = await asyncio.to_thread(
+                            self._blocking_generate_batch, [item[0] for item in batch]
+                        )
+            except Exception as e:
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            
+            for (_, _, future), response in zip(batch, responses):
+                if not future.done():
+                    future.set_result(response)
+    
+    def _build_prefix_cache(self):
+        # The system prompt is identical for every 3D prompt request, so its
+        # tokens and attention keys/values are computed once at load time
+        try:
+            import torch
+            
+            prefix_ids = self.tokenizer(f"{_SYSTEM_PROMPT}\n\n", return_tensors="pt").input_ids
+            if hasattr(self.model, 'device'):
+                prefix_ids = prefix_ids.to(self.model.device)
+            with torch.inference_mode():
+                cache = self.model(prefix_ids, use_cache=True).past_key_values
+            return prefix_ids, cache
+        except Exception as e:
+            print(f"Prompt prefix caching unavailable: {e}")
+            return None, None
+    
+    def _blocking_generate_json(self, prompt: str):
+        import torch
         
+        with torch.inference_mode():
+            return self._json_generator(prompt, max_tokens=256)
+    
+    async def generate_3d_prompt(self, user_input: str) -> Dict:
+        full_prompt = f"{_build_3d_prompt(user_input)}\n\nResponse:"
+        
+        if self._json_generator is not None:
+            async with self._generate_lock:
+                result = await asyncio.to_thread(self._blocking_generate_json, full_prompt)
+            if isinstance(result, dict):
+                return result
+            response = result
+        else:
+            if not self.available:
+                raise RuntimeError("Local LLM not available")
+            user_text = f"{_USER_PROMPT_TEMPLATE.format(user_input=user_input)}\n\nResponse:"
+            response = await self._generate_batched(full_prompt, user_text)
+        
+        return _parse_3d_prompt(response, user_input)
+    
+    async def generate_3d_prompt_stream(self, user_input: str) -> AsyncIterator[Dict]:
+        # Batched and schema-constrained decoding only produce whole replies
+        yield await self.generate_3d_prompt(user_input)
+
+class VLLMLocalProvider(BaseLLMProvider):
+    """
+    Local model served by vLLM's AsyncLLMEngine. Unlike LocalLLMProvider,
+    which runs one generate() call per request, the engine batches decode
+    steps across all concurrent requests and pages the KV cache.
+    """
+    
+    def __init__(self, model_path: str, quantization: str = "none"):
+        super().__init__("")
+        self.model_path = model_path
+        self._request_ids = itertools.count()
         try:
-            import json
-            return json.loads(response)
-        except json.JSONDecodeError:
-            return {
-                "prompt": user_input,
-                "negative_prompt": "",
-                "style": "realistic",
-                "quality": "high",
-                "guidance_scale": 7.5,
-                "inference_steps": 50
-            }
+            from vllm import AsyncEngineArgs, AsyncLLMEngine, SamplingParams
+            
+            print(f"Starting vLLM engine for {model_path}...")
+            self.engine = AsyncLLMEngine.from_engine_args(AsyncEngineArgs(
+                model=model_path,
+                dtype="auto",
+                quantization="fp8" if quantization == "fp8" else None,
+                trust_remote_code=True
+            ))
+            self.sampling_params = SamplingParams(temperature=0.7, max_tokens=512)
+            self.available = True
+            print(f"vLLM engine ready for {model_path}")
+        except Exception as e:
+            print(f"Failed to start vLLM engine: {e}")
+            self.engine = None
+            self.available = False
+    
+    async def generate_text(self, prompt: str, **kwargs) -> str:
+        if not self.available:
+            raise RuntimeError("vLLM engine not available")
+        
+        final = None
+        request_id = f"ai3d-{next(self._request_ids)}"
+        async for output in self.engine.generate(prompt, self.sampling_params, request_id):
+            final = output
+        return final.outputs[0].text if final is not None else ""
+    
+    def _3d_prompt_request(self, user_input: str) -> Dict:
+        # Sampling is set once on the engine
+        return {"prompt": f"{_build_3d_prompt(user_input)}\n\nResponse:"}
 
 class NetworkedLLMProvider(BaseLLMProvider):
+    HEALTH_TIMEOUT = 1.0
+    MIN_HEALTH_BACKOFF = 10.0
+    MAX_HEALTH_BACKOFF = 300.0
+    
     def __init__(self, server_url: str, api_key: Optional[str] = None):
         super().__init__(api_key or "")
         self.server_url = server_url.rstrip('/')
+        self._health_backoff = 0.0
+        self._health_retry_at = 0.0
         try:
             import openai
             base_url = self.server_url
@@ -248,7 +677,8 @@ class NetworkedLLMProvider(BaseLLMProvider):
             
             self.client = openai.AsyncOpenAI(
                 base_url=f"{base_url}/v1",
-                api_key=api_key or "dummy-key"
+                api_key=api_key or "dummy-key",
+                http_client=_shared_http_client()
             )
             self.available = True
             print(f"Networked LLM provider initialized: {server_url}")
@@ -257,6 +687,23 @@ class NetworkedLLMProvider(BaseLLMProvider):
             self.available = False
             print("Failed to initialize OpenAI client for networked LLM")
     
+    async def healthcheck(self) -> bool:
+        if not self.available:
+            return False
+        
+        now = time.monotonic()
+        if now < self._health_retry_at:
+            return False
+        try:
+            await asyncio.wait_for(self.client.models.list(), self.HEALTH_TIMEOUT)
+            self._health_backoff = 0.0
+            return True
+        except Exception:
+            # Probe a server that stays down less and less often
+            self._health_backoff = min(max(self._health_backoff * 2, self.MIN_HEALTH_BACKOFF), self.MAX_HEALTH_BACKOFF)
+            self._health_retry_at = now + self._health_backoff
+            return False
+    
     async def generate_text(self, prompt: str, model: str = "local-model", **kwargs) -> str:
         if not self.available:
             raise RuntimeError("Networked LLM not available")
@@ -272,91 +719,243 @@ class NetworkedLLMProvider(BaseLLMProvider):
             print(f"Error calling networked LLM: {e}")
             raise RuntimeError(f"Networked LLM error: {str(e)}")
     
-    async def generate_3d_prompt(self, user_input: str) -> Dict:
-        system_prompt = """You are a 3D model generation assistant. 
-        Analyze the user's input and create a detailed prompt for 3D model generation.
-        
-        Return your response as JSON with these fields:
-        - "prompt": The main text-to-3D prompt
-        - "negative_prompt": Things to avoid in the 3D model
-        - "style": The artistic style (realistic, stylized, cartoon, etc.)
-        - "quality": Quality settings (high, medium, low)
-        - "guidance_scale": Recommended guidance scale (1-20)
-        - "inference_steps": Recommended number of inference steps (10-100)"""
-        
-        user_prompt = f"""Convert this user request into a 3D model generation prompt:
-        
-        User input: {user_input}
-        
-        Consider:
-        - What object should be created?
-        - What are the key visual details?
-        - What materials should be used?
-        - What size and proportions?
-        - Any specific poses or orientations?"""
-        
-        response = await self.generate_text(
-            prompt=f"{system_prompt}\n\n{user_prompt}",
-            model="local-model",
-            temperature=0.7
-        )
+    async def generate_text_stream(self, prompt: str, model: str = "local-model", **kwargs) -> AsyncIterator[str]:
+        if not self.available:
+            raise RuntimeError("Networked LLM not available")
         
         try:
-            return json.loads(response)
-        except json.JSONDecodeError:
-            return {
-                "prompt": user_input,
-                "negative_prompt": "",
-                "style": "realistic",
-                "quality": "high",
-                "guidance_scale": 7.5,
-                "inference_steps": 50
-            }
-
+            stream = await self.client.chat.completions.create(
+                model=model,
+                messages=[{"role": "user", "content": prompt}],
+                stream=True,
+                **kwargs
+            )
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except Exception as e:
+            print(f"Error calling networked LLM: {e}")
+            raise RuntimeError(f"Networked LLM error: {str(e)}")
+    
 class LLMManager:
-    def __init__(self):
+    AVAILABILITY_TTL = 30.0
+    HEALTH_CHECK_INTERVAL = 10.0
+    PROMPT_CACHE_TTL = 600.0
+    PROMPT_CACHE_SIZE = 1024
+    
+    def __init__(self, prompt_cache_ttl: Optional[float] = None, prompt_cache_dir: Optional[str] = None):
         self.providers = {}
         self.provider_priority = []
+        self._availability: Dict[str, bool] = {}
+        self._availability_at = 0.0
+        # Last background probe result per provider; unprobed counts as healthy
+        self._health: Dict[str, bool] = {}
+        self._health_task: Optional[asyncio.Future] = None
+        # (snapshot time, provider name) of the last get_available_provider()
+        self._selected = None
+        # 0 turns result caching off; in-flight calls are still shared
+        self.prompt_cache_ttl = self.PROMPT_CACHE_TTL if prompt_cache_ttl is None else prompt_cache_ttl
+        # prompt key -> (expires_at, result), least recently used first
+        self._prompt_cache: "OrderedDict[bytes, tuple]" = OrderedDict()
+        self._inflight: Dict[bytes, asyncio.Task] = {}
+        self._prompt_hits = 0
+        self._prompt_misses = 0
+        self._disk_cache = self._open_disk_cache(prompt_cache_dir) if prompt_cache_dir else None
+    
+    def _open_disk_cache(self, directory: str):
+        # Survives restarts and is shared by every server process
+        try:
+            import diskcache
+            return diskcache.FanoutCache(directory, shards=8, size_limit=1 << 30)
+        except ImportError:
+            return None
+        except Exception as e:
+            print(f"Could not open LLM prompt cache at {directory}: {e}")
+            return None
     
     def add_provider(self, name: str, provider: BaseLLMProvider, priority: int = 100) -> None:
         self.providers[name] = provider
-        self.provider_priority.append((priority, name))
-        self.provider_priority.sort()
+        bisect.insort(self.provider_priority, (priority, name))
+        self._availability_at = 0.0
+        self._prompt_cache.clear()
     
     def get_provider(self, name: str) -> Optional[BaseLLMProvider]:
         return self.providers.get(name)
     
+    def availability(self) -> Dict[str, bool]:
+        now = time.monotonic()
+        if not self._availability_at or now - self._availability_at > self.AVAILABILITY_TTL:
+            self._availability = {
+                name: provider.available and self._health.get(name, True)
+                for name, provider in self.providers.items()
+            }
+            self._availability_at = now
+        return self._availability
+    
+    async def check_health(self) -> Dict[str, bool]:
+        names = list(self.providers)
+        results = await asyncio.gather(
+            *(self.providers[name].healthcheck() for name in names), return_exceptions=True
+        )
+        health = {name: result is True for name, result in zip(names, results)}
+        if health != self._health:
+            for name, healthy in health.items():
+                if healthy != self._health.get(name, True):
+                    print(f"LLM provider {name} is {'healthy' if healthy else 'unreachable'}")
+            self._health = health
+            self._availability_at = 0.0
+        return health
+    
+    async def _health_loop(self) -> None:
+        while True:
+            try:
+                await self.check_health()
+            except Exception as e:
+                print(f"Error checking LLM provider health: {e}")
+            await asyncio.sleep(self.HEALTH_CHECK_INTERVAL)
+    
+    def start_health_checks(self, loop: asyncio.AbstractEventLoop) -> None:
+        # Probes run on loop every HEALTH_CHECK_INTERVAL seconds, so
+        # selecting a provider never waits on the network
+        if self._health_task is None:
+            self._health_task = asyncio.run_coroutine_threadsafe(self._health_loop(), loop)
+    
     def get_available_provider(self) -> Optional[str]:
+        # The choice only changes when the availability snapshot is rebuilt
+        availability = self.availability()
+        if self._selected is not None and self._selected[0] == self._availability_at:
+            return self._selected[1]
+        
+        selected = None
         for priority, name in self.provider_priority:
-            provider = self.providers.get(name)
-            if provider and provider.available:
+            if availability.get(name):
                 print(f"Using LLM provider: {name} (priority: {priority})")
-                return name
-        print("No available LLM provider found")
-        return None
+                selected = name
+                break
+        else:
+            print("No available LLM provider found")
+        
+        self._selected = (self._availability_at, selected)
+        return selected
+    
+    @staticmethod
+    def _prompt_key(provider_name: str, user_input: str) -> bytes:
+        return hashlib.blake2b(f"{provider_name}\0{user_input}".encode(), digest_size=16).digest()
     
     async def generate_3d_prompt(self, provider_name: str, user_input: str) -> Dict:
+        # Identical requests share one LLM call while it is running, and its
+        # result for prompt_cache_ttl seconds afterwards
+        key = self._prompt_key(provider_name, user_input)
+        cached = self._cached_prompt(key)
+        if cached is not None:
+            return cached
+        
+        task = self._inflight.get(key)
+        if task is None or task.get_loop() is not asyncio.get_running_loop():
+            task = asyncio.ensure_future(self._generate_3d_prompt(provider_name, user_input))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._finish_prompt(key, t))
+        
+        # shield: one caller disconnecting must not cancel the shared call
+        return dict(await asyncio.shield(task))
+    
+    def _cached_prompt(self, key: bytes) -> Optional[Dict]:
+        # Memory first, then the disk cache shared with other processes;
+        # counts the lookup as a hit or a miss
+        now = time.monotonic()
+        cached = self._prompt_cache.get(key)
+        if cached is not None:
+            if cached[0] > now:
+                self._prompt_cache.move_to_end(key)
+                self._prompt_hits += 1
+                return dict(cached[1])
+            del self._prompt_cache[key]
+        
+        if self._disk_cache is not None and self.prompt_cache_ttl > 0:
+            stored = self._disk_cache.get(key, expire_time=True)
+            if stored is not None and stored[0] is not None:
+                result, expires_at = stored
+                self._remember_prompt(key, result, now + max(0.0, expires_at - time.time()))
+                self._prompt_hits += 1
+                return dict(result)
+        
+        self._prompt_misses += 1
+        return None
+    
+    def _store_prompt(self, key: bytes, result: Dict) -> None:
+        if self.prompt_cache_ttl <= 0 or result.get("provider") == "none":
+            # Fallback prompt: retry the providers next time
+            return
+        
+        self._remember_prompt(key, result, time.monotonic() + self.prompt_cache_ttl)
+        if self._disk_cache is not None:
+            self._disk_cache.set(key, result, expire=self.prompt_cache_ttl)
+    
+    def _finish_prompt(self, key: bytes, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if task.cancelled() or task.exception() is not None:
+            return
+        self._store_prompt(key, task.result())
+    
+    def _remember_prompt(self, key: bytes, result: Dict, expires_at: float) -> None:
+        self._prompt_cache[key] = (expires_at, result)
+        self._prompt_cache.move_to_end(key)
+        while len(self._prompt_cache) > self.PROMPT_CACHE_SIZE:
+            self._prompt_cache.popitem(last=False)
+    
+    def prompt_cache_info(self) -> Dict[str, int]:
+        return {
+            "hits": self._prompt_hits,
+            "misses": self._prompt_misses,
+            "size": len(self._prompt_cache),
+            "inflight": len(self._inflight)
+        }
+    
+    def _resolve_provider(self, provider_name: str) -> Optional[str]:
         if provider_name == "auto":
-            available_provider = self.get_available_provider()
-            if not available_provider:
-                return {
-                    "prompt": user_input,
-                    "negative_prompt": "",
-                    "style": "realistic",
-                    "quality": "high",
-                    "guidance_scale": 7.5,
-                    "inference_steps": 50,
-                    "provider": "none",
-                    "message": "No LLM provider available, using basic prompt"
-                }
-            provider_name = available_provider
-        
-        provider = self.get_provider(provider_name)
-        if not provider:
+            return self.get_available_provider()
+        if not self.get_provider(provider_name):
             raise ValueError(f"Provider {provider_name} not found")
+        return provider_name
+    
+    @staticmethod
+    def _no_provider_prompt(user_input: str) -> Dict:
+        return dict(
+            _fallback_3d_prompt(user_input),
+            provider="none",
+            message="No LLM provider available, using basic prompt"
+        )
+    
+    async def _generate_3d_prompt(self, provider_name: str, user_input: str) -> Dict:
+        resolved = self._resolve_provider(provider_name)
+        if resolved is None:
+            return self._no_provider_prompt(user_input)
         
-        result = await provider.generate_3d_prompt(user_input)
-        result["provider"] = provider_name
+        result = await self.get_provider(resolved).generate_3d_prompt(user_input)
+        result["provider"] = resolved
         return result
+    
+    async def generate_3d_prompt_stream(self, provider_name: str, user_input: str) -> AsyncIterator[Dict]:
+        # Partial prompts as the provider writes them; the last item is the
+        # final prompt, which is cached like a generate_3d_prompt() result
+        key = self._prompt_key(provider_name, user_input)
+        cached = self._cached_prompt(key)
+        if cached is not None:
+            yield cached
+            return
+        
+        resolved = self._resolve_provider(provider_name)
+        if resolved is None:
+            yield self._no_provider_prompt(user_input)
+            return
+        
+        result = None
+        async for result in self.get_provider(resolved).generate_3d_prompt_stream(user_input):
+            result = dict(result, provider=resolved)
+            yield result
+        
+        if result is not None:
+            self._store_prompt(key, result)
 
 llm_manager = LLMManager()
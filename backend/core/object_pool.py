@@ -0,0 +1,189 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+class ObjectPool:
+    """
+    Bounded pool of expensive objects (generators, slicers) addressed by ID.
+    
+    Released objects are kept on a free list and handed back out to the next
+    acquire with the same key instead of being rebuilt. Once the pool holds
+    max_size objects, the least recently used free object (or, failing that,
+    the least recently used active one) is evicted. With a ttl, objects idle
+    for longer than ttl seconds are evicted by prune(). Objects pinned by a
+    running job are never evicted; the pool briefly exceeds max_size instead.
+    
+    Building an object for a given ID is serialized through creation_lock(),
+    a lock striped over LOCK_STRIPES so that concurrent requests for the same
+    missing ID build it once while unrelated IDs proceed in parallel.
+    """
+    
+    LOCK_STRIPES = 16
+    
+    def __init__(
+        self,
+        factory: Callable[..., Any],
+        max_size: int = 4,
+        reset: Optional[Callable[..., None]] = None,
+        on_evict: Optional[Callable[[Any], None]] = None,
+        ttl: Optional[float] = None
+    ):
+        self.factory = factory
+        self.max_size = max(1, max_size)
+        self.reset = reset
+        self.on_evict = on_evict
+        self.ttl = ttl
+        self.active: "OrderedDict[str, Tuple[Hashable, Any]]" = OrderedDict()
+        self.free: List[Tuple[Hashable, Any]] = []
+        self.last_used: Dict[int, float] = {}
+        self.pins: Dict[int, int] = {}
+        self._next_prune = 0.0
+        self._lock = threading.Lock()
+        self._creation_locks = [threading.Lock() for _ in range(self.LOCK_STRIPES)]
+    
+    def __contains__(self, object_id: str) -> bool:
+        return object_id in self.active
+    
+    def __getitem__(self, object_id: str) -> Any:
+        return self._lookup(object_id, pin=False)
+    
+    def _lookup(self, object_id: str, pin: bool) -> Any:
+        with self._lock:
+            _, obj = self.active[object_id]
+            self.active.move_to_end(object_id)
+            self.last_used[id(obj)] = time.monotonic()
+            if pin:
+                self._pin(obj)
+            return obj
+    
+    def __len__(self) -> int:
+        return len(self.active) + len(self.free)
+    
+    def get(self, object_id: str, pin: bool = False) -> Optional[Any]:
+        # pin=True pins the object before the lock is dropped, so a
+        # concurrent acquire cannot evict it before the caller pins it
+        try:
+            return self._lookup(object_id, pin)
+        except KeyError:
+            return None
+    
+    def creation_lock(self, object_id: str) -> threading.Lock:
+        return self._creation_locks[hash(object_id) % self.LOCK_STRIPES]
+    
+    def acquire(self, object_id: str, key: Hashable, *args, pin: bool = False, **kwargs) -> Any:
+        obj = None
+        with self._lock:
+            for i, (free_key, free_obj) in enumerate(self.free):
+                if free_key == key:
+                    obj = free_obj
+                    del self.free[i]
+                    break
+        
+        if obj is not None:
+            if self.reset:
+                self.reset(obj, *args, **kwargs)
+        else:
+            obj = self.factory(*args, **kwargs)
+        
+        with self._lock:
+            self.active[object_id] = (key, obj)
+            self.last_used[id(obj)] = time.monotonic()
+            if pin:
+                self._pin(obj)
+            evicted = self._evict_over_capacity(keep=obj)
+        
+        self._evict(evicted)
+        return obj
+    
+    def release(self, object_id: str) -> bool:
+        with self._lock:
+            entry = self.active.pop(object_id, None)
+            if entry is None:
+                return False
+            self.free.append(entry)
+            self.last_used[id(entry[1])] = time.monotonic()
+            evicted = self._evict_over_capacity()
+        
+        self._evict(evicted)
+        return True
+    
+    def pin(self, obj: Any) -> None:
+        with self._lock:
+            self._pin(obj)
+    
+    def _pin(self, obj: Any) -> None:
+        # Called with self._lock held
+        self.pins[id(obj)] = self.pins.get(id(obj), 0) + 1
+    
+    def unpin(self, obj: Any) -> None:
+        with self._lock:
+            count = self.pins.pop(id(obj), 0) - 1
+            if count > 0:
+                self.pins[id(obj)] = count
+            if id(obj) in self.last_used:
+                self.last_used[id(obj)] = time.monotonic()
+    
+    def release_all(self) -> None:
+        with self._lock:
+            evicted = [obj for _, obj in self.active.values()]
+            evicted.extend(obj for _, obj in self.free)
+            self.active.clear()
+            self.free.clear()
+            self.last_used.clear()
+            self.pins.clear()
+        
+        self._evict(evicted)
+    
+    def prune(self, interval: float = 1.0) -> None:
+        # Cheap to call per request: the scan runs at most once per interval
+        now = time.monotonic()
+        if self.ttl is None or now < self._next_prune:
+            return
+        
+        with self._lock:
+            self._next_prune = now + interval
+            cutoff = now - self.ttl
+            idle = lambda obj: self.last_used.get(id(obj), now) < cutoff and id(obj) not in self.pins
+            evicted = [obj for _, obj in self.free if idle(obj)]
+            self.free = [(k, obj) for k, obj in self.free if not idle(obj)]
+            for object_id, (_, obj) in list(self.active.items()):
+                if idle(obj):
+                    del self.active[object_id]
+                    evicted.append(obj)
+            for obj in evicted:
+                self.last_used.pop(id(obj), None)
+        
+        self._evict(evicted)
+    
+    def _evict_over_capacity(self, keep: Any = None) -> List[Any]:
+        # keep is the object just handed out, which is not pinned yet
+        excess = len(self.active) + len(self.free) - self.max_size
+        if excess <= 0:
+            return []
+        
+        evictable = lambda obj: obj is not keep and id(obj) not in self.pins
+        evicted = [obj for _, obj in self.free if evictable(obj)][:excess]
+        evicted_ids = {id(obj) for obj in evicted}
+        self.free = [entry for entry in self.free if id(entry[1]) not in evicted_ids]
+        
+        for object_id, (_, obj) in list(self.active.items()):
+            if len(evicted) == excess:
+                break
+            if evictable(obj):
+                del self.active[object_id]
+                evicted.append(obj)
+        
+        for obj in evicted:
+            self.last_used.pop(id(obj), None)
+        return evicted
+    
+    def _evict(self, objects: List[Any]) -> None:
+        if not self.on_evict:
+            return
+        
+        for obj in objects:
+            try:
+                self.on_evict(obj)
+            except Exception as e:
+                print(f"Error evicting pooled object: {e}")
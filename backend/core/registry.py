@@ -0,0 +1,53 @@
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+class SpecRegistry:
+    """
+    On-disk map of object ID -> creation parameters.
+    
+    Generators and slicers live in process memory, so when the API runs as
+    several server processes a request can land on a worker that never
+    created the object. Each worker records how it built an object here, and
+    any other worker can rebuild it lazily from that spec.
+    """
+    
+    def __init__(self, directory: Union[str, Path]):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+    
+    def _path(self, object_id: str) -> Path:
+        # IDs come from URLs; never let them escape the registry directory
+        return self.directory / f"{Path(object_id).name}.json"
+    
+    def put(self, object_id: str, spec: Dict[str, Any]) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(spec, f)
+            os.replace(tmp_path, self._path(object_id))
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+    
+    def get(self, object_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(object_id)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def update(self, object_id: str, **changes) -> None:
+        spec = self.get(object_id)
+        if spec is not None:
+            spec.update(changes)
+            self.put(object_id, spec)
+    
+    def delete(self, object_id: str) -> bool:
+        try:
+            self._path(object_id).unlink()
+            return True
+        except OSError:
+            return False
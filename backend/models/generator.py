@@ -1,16 +1,182 @@
+import functools
+import importlib.util
+import threading
 import torch
 import numpy as np
 from pathlib import Path
-from typing import Optional, Dict, Any, Union
+from typing import Optional, Dict, Any, Iterator, List, Tuple, Union
 from PIL import Image
 
-from .device_manager import get_device, get_dtype
+try:
+    import trimesh
+    TRIMESH_AVAILABLE = True
+except ImportError:
+    TRIMESH_AVAILABLE = False
+
+XFORMERS_AVAILABLE = importlib.util.find_spec('xformers') is not None
+
+from config.config import Config
+from backend.core.device_manager import get_device, get_dtype, to_device, wait_for_uploads
+from backend.utils.mesh_io import write_binary_ply, trimesh_to_arrays
+
+@functools.lru_cache(maxsize=None)
+def _open3d() -> Optional[Any]:
+    # open3d is an optional extra and slow to import, so it is only loaded
+    # the first time a mesh is simplified
+    try:
+        import open3d
+        return open3d
+    except ImportError:
+        return None
+
+def _compile(module: Any, device: torch.device) -> Any:
+    # CUDA graphs ("reduce-overhead") clash with model CPU offload hooks, so
+    # only the default kernel-fusion mode is used
+    if module is None or device.type != 'cuda' or not hasattr(torch, 'compile'):
+        return module
+    
+    try:
+        return torch.compile(module, fullgraph=False)
+    except Exception as e:
+        print(f"torch.compile unavailable, running eagerly: {e}")
+        return module
+
+def _enable_efficient_attention(pipe: Any, device: torch.device) -> None:
+    # diffusers already uses PyTorch's fused SDPA kernels by default; xformers
+    # is faster still where installed. Slicing is the fallback for old torch
+    if device.type != 'cuda' or not hasattr(pipe, 'enable_xformers_memory_efficient_attention'):
+        return
+    
+    if XFORMERS_AVAILABLE:
+        try:
+            pipe.enable_xformers_memory_efficient_attention()
+            return
+        except Exception as e:
+            print(f"xformers attention unavailable: {e}")
+    if not hasattr(torch.nn.functional, 'scaled_dot_product_attention'):
+        pipe.enable_attention_slicing()
+
+def _quantize_fp8(module: Any, device: torch.device) -> bool:
+    # Weight-only FP8 halves the bytes read per denoiser step; activations
+    # stay in bf16, so it is only worth it on Hopper's FP8 tensor cores
+    if module is None or not Config.DIFFUSION_FP8 or device.type != 'cuda':
+        return False
+    if torch.cuda.get_device_capability(device) < (9, 0):
+        print("FP8 weights need a Hopper GPU, keeping the denoiser in 16-bit")
+        return False
+    
+    try:
+        from torchao.quantization import quantize_, float8_weight_only
+        quantize_(module, float8_weight_only())
+        return True
+    except Exception as e:
+        print(f"FP8 quantization unavailable: {e}")
+        return False
+
+def _quantize_int8(module: Any, device: torch.device) -> None:
+    # Without fused int8 kernels, dequantizing weights costs more than it
+    # saves, so this is limited to GPUs where quanto's kernels apply
+    if module is None or not Config.QUANTIZE_UNET:
+        return
+    if device.type != 'cuda' or torch.cuda.get_device_capability(device) < (8, 0):
+        print("INT8 UNet weights would run slower than 16-bit on this device, skipping")
+        return
+    
+    try:
+        from optimum.quanto import quantize, freeze, qint8
+        quantize(module, weights=qint8)
+        freeze(module)
+    except Exception as e:
+        print(f"INT8 quantization unavailable: {e}")
+
+def _batches(prompt: Union[str, List[str]], batch_size: int) -> Iterator[List[str]]:
+    # Prompts in one batch share every denoiser forward pass; batch_size caps
+    # how many activations are held in VRAM at once
+    prompts = [prompt] if isinstance(prompt, str) else list(prompt)
+    batch_size = max(1, batch_size)
+    for start in range(0, len(prompts), batch_size):
+        yield prompts[start:start + batch_size]
+
+def _channels_last(module: Any, device: torch.device) -> None:
+    # Tensor-core convolutions run natively on NHWC; NCHW weights and
+    # activations would be transposed around every conv
+    if module is not None and device.type == 'cuda':
+        module.to(memory_format=torch.channels_last)
+
+def _warmup(pipe: Any, device: torch.device, **kwargs) -> None:
+    # Compilation happens on the first call, so make that one at load time
+    # rather than inside the first user request
+    if device.type != 'cuda' or not hasattr(torch, 'compile'):
+        return
+    
+    try:
+        with torch.inference_mode():
+            pipe(**kwargs)
+    except Exception as e:
+        print(f"Warmup run failed: {e}")
+
+class _CachedBlocks(torch.nn.Module):
+    """
+    The deeper transformer blocks of a denoiser, run in full only every
+    interval-th step. Their contribution barely changes between adjacent
+    steps, so in between the last computed residual is added back instead.
+    
+    The step counter and residual belong to one denoising run at a time;
+    the owning generator serializes its runs.
+    """
+    
+    def __init__(self, blocks: List[torch.nn.Module], interval: int):
+        super().__init__()
+        self.blocks = torch.nn.ModuleList(blocks)
+        self.interval = interval
+        self.calls = 0
+        self.residual = None
+    
+    def reset(self) -> None:
+        self.calls = 0
+        self.residual = None
+    
+    def forward(self, hidden_states: torch.Tensor, *args, **kwargs) -> torch.Tensor:
+        reuse = (
+            self.calls % self.interval != 0
+            and self.residual is not None
+            and self.residual.shape == hidden_states.shape
+        )
+        self.calls += 1
+        if reuse:
+            return hidden_states + self.residual
+        
+        output = hidden_states
+        for block in self.blocks:
+            output = block(output, *args, **kwargs)
+        self.residual = output - hidden_states
+        return output
+
+def _cache_deep_blocks(model: Any, interval: int) -> Optional[_CachedBlocks]:
+    # The first quarter of the blocks always runs so every step still sees
+    # its own timestep and noisy input
+    blocks = getattr(model, 'transformer_blocks', None)
+    if blocks is None or interval < 2 or len(blocks) < 4:
+        return None
+    
+    start = len(blocks) // 4
+    cached = _CachedBlocks(list(blocks)[start:], interval)
+    model.transformer_blocks = torch.nn.ModuleList(list(blocks)[:start] + [cached])
+    return cached
 
 class TextTo3DGenerator:
-    def __init__(self, model_path: str = "openai/shap-e"):
+    def __init__(self, model_path: str = "openai/shap-e", block_cache_interval: Optional[int] = None):
         self.model_path = model_path
         self.pipe = None
         self.device = get_device()
+        # Deep prior blocks are recomputed every this many denoising steps.
+        # Reusing them is approximate, so the default of 1 keeps it off
+        if block_cache_interval is None:
+            block_cache_interval = Config.SHAPE_BLOCK_CACHE_INTERVAL
+        self.block_cache_interval = block_cache_interval
+        self._block_cache: Optional[_CachedBlocks] = None
+        # Pipeline calls share scheduler and block-cache state
+        self._run_lock = threading.Lock()
         self._load_model()
     
     def _load_model(self) -> None:
@@ -29,61 +195,105 @@ class TextTo3DGenerator:
             
             if self.device.type == 'cuda':
                 self.pipe.enable_model_cpu_offload()
+            _enable_efficient_attention(self.pipe, self.device)
+            _quantize_fp8(self.pipe.prior, self.device)
+            
+            self._block_cache = _cache_deep_blocks(self.pipe.prior, self.block_cache_interval)
+            if self._block_cache is None:
+                self.pipe.prior = _compile(self.pipe.prior, self.device)
+            else:
+                # The step counter must stay in Python, so compile the
+                # blocks themselves rather than the whole prior
+                for blocks in (self.pipe.prior.transformer_blocks, self._block_cache.blocks):
+                    for i, block in enumerate(blocks):
+                        if block is not self._block_cache:
+                            blocks[i] = _compile(block, self.device)
+            _warmup(self.pipe, self.device, prompt="a cube", num_inference_steps=2, output_type="latent")
             
             print("Shap-E model loaded successfully")
         except Exception as e:
             print(f"Error loading Shap-E model: {e}")
             self.pipe = None
     
+    def unload(self) -> None:
+        self.pipe = None
+        self._block_cache = None
+    
+    def _reset_block_cache(self) -> None:
+        if self._block_cache is not None:
+            self._block_cache.reset()
+    
+    def _run_batched(self, prompt: Union[str, List[str]], batch_size: int, **kwargs) -> Any:
+        # A single prompt returns one output, a list returns a list
+        outputs = []
+        for batch in _batches(prompt, batch_size):
+            with self._run_lock:
+                self._reset_block_cache()
+                outputs.extend(self.pipe(batch, **kwargs).images)
+        return outputs[0] if isinstance(prompt, str) else outputs
+    
     def generate_mesh(
         self,
-        prompt: str,
+        prompt: Union[str, List[str]],
         guidance_scale: float = 15.0,
         num_inference_steps: int = 64,
-        frame_size: int = 256
+        frame_size: int = 256,
+        batch_size: int = 4
     ) -> Optional[Any]:
         if not self.pipe:
             raise RuntimeError("Model not loaded")
         
         try:
-            result = self.pipe(
+            return self._run_batched(
                 prompt,
+                batch_size,
                 guidance_scale=guidance_scale,
                 num_inference_steps=num_inference_steps,
                 frame_size=frame_size,
                 output_type="mesh"
             )
-            return result.images[0]
         except Exception as e:
             print(f"Error generating mesh: {e}")
             return None
     
     def generate_gif(
         self,
-        prompt: str,
+        prompt: Union[str, List[str]],
         guidance_scale: float = 15.0,
         num_inference_steps: int = 64,
-        frame_size: int = 256
+        frame_size: int = 256,
+        batch_size: int = 4
     ) -> Optional[Any]:
         if not self.pipe:
             raise RuntimeError("Model not loaded")
         
         try:
-            result = self.pipe(
+            return self._run_batched(
                 prompt,
+                batch_size,
                 guidance_scale=guidance_scale,
                 num_inference_steps=num_inference_steps,
                 frame_size=frame_size
             )
-            return result.images[0]
         except Exception as e:
             print(f"Error generating GIF: {e}")
             return None
     
+    def mesh_to_arrays(self, mesh: Any) -> Tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]:
+        vertices = mesh.verts.detach().cpu().numpy()
+        faces = mesh.faces.detach().cpu().numpy()
+        
+        colors = None
+        channels = getattr(mesh, 'vertex_channels', None) or {}
+        if all(c in channels for c in "RGB"):
+            rgb = np.stack([channels[c].detach().cpu().numpy() for c in "RGB"], axis=1)
+            colors = (rgb * 255.499).round().astype(np.uint8)
+        
+        return vertices, faces, colors
+    
     def export_mesh_to_ply(self, mesh: Any, output_path: Union[str, Path]) -> bool:
         try:
-            from diffusers.utils import export_to_ply
-            export_to_ply(mesh, str(output_path))
+            write_binary_ply(output_path, *self.mesh_to_arrays(mesh))
             return True
         except Exception as e:
             print(f"Error exporting mesh to PLY: {e}")
@@ -110,15 +320,19 @@ class ImageTo3DGenerator:
                 trust_remote_code=True
             )
             self.model = self.model.to(self.device)
+            _enable_efficient_attention(self.model, self.device)
             
             print("TripoSR model loaded successfully")
         except Exception as e:
             print(f"Error loading TripoSR model: {e}")
             self.model = None
     
+    def unload(self) -> None:
+        self.model = None
+    
     def generate_mesh_from_image(
         self,
-        image: Union[Image.Image, str, Path],
+        image: Union[Image.Image, np.ndarray, str, Path],
         resolution: int = 256,
         threshold: float = 25.0
     ) -> Optional[Any]:
@@ -127,11 +341,25 @@ class ImageTo3DGenerator:
         
         try:
             if isinstance(image, (str, Path)):
-                image = Image.open(image).convert("RGB")
+                image = Image.open(image)
             
-            image = image.resize((resolution, resolution), Image.Resampling.LANCZOS)
+            # Decoded JPEGs arrive as RGB arrays; only resize when needed
+            if isinstance(image, np.ndarray) and image.shape[:2] != (resolution, resolution):
+                image = Image.fromarray(image)
+            if isinstance(image, Image.Image):
+                # The encoder does not need Lanczos quality; reducing_gap
+                # first shrinks large inputs by an integer factor in C
+                image = np.asarray(image.convert("RGB").resize(
+                    (resolution, resolution), Image.Resampling.BILINEAR, reducing_gap=2.0
+                ))
             
-            scene_codes = self.model([image], device=self.device)
+            # Upload as an HWC float tensor in [0, 1] so the pipeline's own
+            # .to(device) is a no-op and the copy runs from pinned memory
+            pixels = torch.from_numpy(image.astype(np.float32) / 255.0)
+            pixels = to_device(pixels)
+            wait_for_uploads()
+            
+            scene_codes = self.model([pixels], device=self.device)
             meshes = self.model.extract_mesh(
                 scene_codes,
                 resolution=resolution,
@@ -146,9 +374,11 @@ class ImageTo3DGenerator:
 class PointCloudToMesh:
     @staticmethod
     def convert_ply_to_obj(ply_path: Union[str, Path], output_path: Union[str, Path]) -> bool:
+        if not TRIMESH_AVAILABLE:
+            print("Trimesh not available, cannot load mesh")
+            return False
+        
         try:
-            import trimesh
-            
             mesh = trimesh.load(str(ply_path))
             mesh.export(str(output_path))
             return True
@@ -158,17 +388,34 @@ class PointCloudToMesh:
     
     @staticmethod
     def simplify_mesh(mesh_path: Union[str, Path], output_path: Union[str, Path], face_count: int = 50000) -> bool:
+        if not TRIMESH_AVAILABLE:
+            print("Trimesh not available, cannot load mesh")
+            return False
+        
         try:
-            import trimesh
-            
             mesh = trimesh.load(str(mesh_path))
             
-            if hasattr(mesh, 'simplify_quadric_decimation'):
+            o3d = _open3d()
+            if o3d is not None and isinstance(mesh, trimesh.Trimesh):
+                # Open3D's decimator is native and multithreaded
+                o3d_mesh = o3d.geometry.TriangleMesh(
+                    o3d.utility.Vector3dVector(np.asarray(mesh.vertices, dtype=np.float64)),
+                    o3d.utility.Vector3iVector(np.asarray(mesh.faces, dtype=np.int32))
+                ).simplify_quadric_decimation(target_number_of_triangles=face_count)
+                simplified = trimesh.Trimesh(
+                    vertices=np.asarray(o3d_mesh.vertices),
+                    faces=np.asarray(o3d_mesh.triangles),
+                    process=False
+                )
+            elif hasattr(mesh, 'simplify_quadric_decimation'):
                 simplified = mesh.simplify_quadric_decimation(face_count)
             else:
                 simplified = mesh
             
-            simplified.export(str(output_path))
+            if Path(output_path).suffix.lower() == '.ply':
+                write_binary_ply(output_path, *trimesh_to_arrays(simplified))
+            else:
+                simplified.export(str(output_path))
             return True
         except Exception as e:
             print(f"Error simplifying mesh: {e}")
@@ -180,52 +427,92 @@ class TextToImageTo3DPipeline:
         text_to_image_model: str = "stabilityai/stable-diffusion-2-1",
         image_to_3d_model: str = "stabilityai/triposr"
     ):
-        self.text_to_3d = TextTo3DGenerator()
-        self.image_to_3d = ImageTo3DGenerator(image_to_3d_model)
-        self.text_to_image_pipe = None
+        self.text_to_image_model = text_to_image_model
+        self.image_to_3d_model = image_to_3d_model
         self.device = get_device()
-        self._load_text_to_image_model(text_to_image_model)
     
-    def _load_text_to_image_model(self, model_path: str) -> None:
+    # Each model loads on first use, so a caller that only takes one path
+    # never waits for (or holds memory for) the others
+    @functools.cached_property
+    def text_to_3d(self) -> TextTo3DGenerator:
+        return TextTo3DGenerator()
+    
+    @functools.cached_property
+    def image_to_3d(self) -> ImageTo3DGenerator:
+        return ImageTo3DGenerator(self.image_to_3d_model)
+    
+    @functools.cached_property
+    def text_to_image_pipe(self) -> Optional[Any]:
+        return self._load_text_to_image_model(self.text_to_image_model)
+    
+    def _load_text_to_image_model(self, model_path: str) -> Optional[Any]:
         try:
             from diffusers import StableDiffusionPipeline
             
             print(f"Loading Stable Diffusion model from {model_path}...")
             dtype = get_dtype()
             
-            self.text_to_image_pipe = StableDiffusionPipeline.from_pretrained(
+            pipe = StableDiffusionPipeline.from_pretrained(
                 model_path,
                 torch_dtype=dtype,
                 safety_checker=None
             )
-            self.text_to_image_pipe = self.text_to_image_pipe.to(self.device)
+            pipe = pipe.to(self.device)
             
             if self.device.type == 'cuda':
-                self.text_to_image_pipe.enable_model_cpu_offload()
+                pipe.enable_model_cpu_offload()
+            _enable_efficient_attention(pipe, self.device)
+            # Decode batched latents one image at a time
+            pipe.enable_vae_slicing()
+            
+            if not _quantize_fp8(pipe.unet, self.device):
+                _quantize_int8(pipe.unet, self.device)
+            _channels_last(pipe.unet, self.device)
+            _channels_last(pipe.vae, self.device)
+            pipe.unet = _compile(pipe.unet, self.device)
+            # The pipeline only calls vae.decode(), not the module's forward
+            pipe.vae.decode = _compile(pipe.vae.decode, self.device)
+            _warmup(pipe, self.device, prompt="a cube", num_inference_steps=2)
             
             print("Stable Diffusion model loaded successfully")
+            return pipe
         except Exception as e:
             print(f"Error loading Stable Diffusion model: {e}")
-            self.text_to_image_pipe = None
+            return None
+    
+    def unload(self) -> None:
+        for name in ('text_to_3d', 'image_to_3d'):
+            model = self.__dict__.pop(name, None)
+            if model is not None:
+                model.unload()
+        self.__dict__.pop('text_to_image_pipe', None)
     
-    def generate_image(self, prompt: str, num_inference_steps: int = 50) -> Optional[Image.Image]:
+    def generate_image(
+        self,
+        prompt: Union[str, List[str]],
+        num_inference_steps: int = 50,
+        batch_size: int = 4
+    ) -> Optional[Any]:
         if not self.text_to_image_pipe:
             raise RuntimeError("Text-to-image model not loaded")
         
         try:
-            result = self.text_to_image_pipe(
-                prompt,
-                num_inference_steps=num_inference_steps,
-                guidance_scale=7.5
-            )
-            return result.images[0]
+            images = []
+            for batch in _batches(prompt, batch_size):
+                result = self.text_to_image_pipe(
+                    batch,
+                    num_inference_steps=num_inference_steps,
+                    guidance_scale=7.5
+                )
+                images.extend(result.images)
+            return images[0] if isinstance(prompt, str) else images
         except Exception as e:
             print(f"Error generating image: {e}")
             return None
     
     def generate_3d_from_text(
         self,
-        prompt: str,
+        prompt: Union[str, List[str]],
         use_text_to_3d: bool = True,
         use_image_pipeline: bool = False,
         **kwargs
@@ -234,9 +521,11 @@ class TextToImageTo3DPipeline:
             return self.text_to_3d.generate_mesh(prompt, **kwargs)
         
         if use_image_pipeline:
-            image = self.generate_image(prompt)
-            if image:
-                return self.image_to_3d.generate_mesh_from_image(image, **kwargs)
+            images = self.generate_image(prompt)
+            if isinstance(prompt, str):
+                return self.image_to_3d.generate_mesh_from_image(images, **kwargs) if images else None
+            if images:
+                return [self.image_to_3d.generate_mesh_from_image(image, **kwargs) for image in images]
         
         return None
 
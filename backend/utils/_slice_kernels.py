@@ -0,0 +1,83 @@
+import numpy as np
+from typing import Tuple
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# Face/plane intersection for every layer in one sweep over the faces.
+# trimesh's mesh_multiplane tests every face against every plane; here each
+# face only visits the planes between its lowest and highest vertex, found
+# by binary search. A vertex counts as above a plane when its z is strictly
+# greater, so faces touching a plane at a vertex are handled consistently.
+
+if NUMBA_AVAILABLE:
+    @njit(parallel=True, cache=True)
+    def _count_crossings(vertices, faces, z_levels, first_level, counts):
+        for f in prange(faces.shape[0]):
+            z0 = vertices[faces[f, 0], 2]
+            z1 = vertices[faces[f, 1], 2]
+            z2 = vertices[faces[f, 2], 2]
+            lo = np.searchsorted(z_levels, min(z0, z1, z2), side='left')
+            hi = np.searchsorted(z_levels, max(z0, z1, z2), side='left')
+            first_level[f] = lo
+            counts[f] = hi - lo
+    
+    @njit(inline='always')
+    def _edge_point(vertices, a, b, z, out, slot):
+        za = vertices[a, 2]
+        t = (z - za) / (vertices[b, 2] - za)
+        out[slot, 0] = vertices[a, 0] + t * (vertices[b, 0] - vertices[a, 0])
+        out[slot, 1] = vertices[a, 1] + t * (vertices[b, 1] - vertices[a, 1])
+    
+    @njit(parallel=True, cache=True)
+    def _fill_segments(vertices, faces, z_levels, first_level, counts, offsets, segments, levels):
+        for f in prange(faces.shape[0]):
+            a, b, c = faces[f, 0], faces[f, 1], faces[f, 2]
+            for k in range(counts[f]):
+                level = first_level[f] + k
+                z = z_levels[level]
+                row = offsets[f] + k
+                point = segments[row]
+                slot = 0
+                if (vertices[a, 2] > z) != (vertices[b, 2] > z):
+                    _edge_point(vertices, a, b, z, point, slot)
+                    slot += 1
+                if (vertices[b, 2] > z) != (vertices[c, 2] > z):
+                    _edge_point(vertices, b, c, z, point, slot)
+                    slot += 1
+                if slot < 2 and (vertices[c, 2] > z) != (vertices[a, 2] > z):
+                    _edge_point(vertices, c, a, z, point, slot)
+                levels[row] = level
+
+def slice_faces(vertices: np.ndarray, faces: np.ndarray, z_levels: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Intersect a mesh with horizontal planes at z_levels (ascending).
+    
+    Returns (segments, level_offsets): (n, 2, 2) XY segments grouped by
+    level, where level i's segments are segments[level_offsets[i]:level_offsets[i + 1]].
+    """
+    vertices = np.ascontiguousarray(vertices, dtype=np.float64)
+    faces = np.ascontiguousarray(faces, dtype=np.int64)
+    z_levels = np.ascontiguousarray(z_levels, dtype=np.float64)
+    
+    first_level = np.empty(len(faces), dtype=np.int64)
+    counts = np.empty(len(faces), dtype=np.int64)
+    _count_crossings(vertices, faces, z_levels, first_level, counts)
+    
+    offsets = np.zeros(len(faces) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    segments = np.empty((offsets[-1], 2, 2), dtype=np.float64)
+    levels = np.empty(offsets[-1], dtype=np.int64)
+    _fill_segments(vertices, faces, z_levels, first_level, counts, offsets, segments, levels)
+    
+    # A face touching a plane only at a vertex yields a zero-length segment
+    keep = np.abs(segments[:, 0] - segments[:, 1]).max(axis=1) > 1e-9
+    segments, levels = segments[keep], levels[keep]
+    
+    order = np.argsort(levels, kind='stable')
+    level_offsets = np.zeros(len(z_levels) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(levels, minlength=len(z_levels)), out=level_offsets[1:])
+    return segments[order], level_offsets
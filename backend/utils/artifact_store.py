@@ -0,0 +1,300 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterator, NamedTuple, Optional, Tuple, Union
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+ARTIFACT_SCHEME = 'artifact://'
+
+class Artifact(NamedTuple):
+    offset: int
+    length: int
+    mimetype: str
+    etag: str
+    # Blob generation the offset refers to, so a read that started before a
+    # compaction keeps reading the old blob
+    generation: int = 0
+
+def _write_all(fd: int, data: Union[bytes, memoryview]) -> None:
+    view = memoryview(data)
+    written = 0
+    while written < len(view):
+        written += os.write(fd, view[written:])
+
+class ArtifactStore:
+    """
+    Generated files kept in one append-only blob with a SQLite index.
+    
+    Thousands of small per-job output files cost an inode lookup, permission
+    check and open per access; a single long-lived descriptor lets reads hit
+    the page cache directly. Rewriting a name appends a new copy and repoints
+    the index entry.
+    
+    Superseded and deleted copies are reclaimed by compact(), which copies
+    the live entries into a new blob generation and runs automatically once
+    more than half of a blob of at least COMPACT_MIN_BYTES is dead. Other
+    processes sharing the store notice the new generation on their next
+    access and reopen it. A replaced blob's descriptor stays open until the
+    last reader streaming from it is closed.
+    """
+    
+    COMPACT_MIN_BYTES = 64 * 1024 * 1024
+    
+    def __init__(self, directory: Union[str, Path]):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        
+        self.index = sqlite3.connect(str(self.directory / 'artifacts.idx'), check_same_thread=False)
+        self.index.execute(
+            'CREATE TABLE IF NOT EXISTS artifacts '
+            '(name TEXT PRIMARY KEY, offset INTEGER, length INTEGER, mimetype TEXT, etag TEXT)'
+        )
+        self.index.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER)')
+        self.index.commit()
+        # Reentrant: a reader collected while the lock is held releases itself
+        self._lock = threading.RLock()
+        self._seek_lock = threading.Lock()
+        # generation -> descriptor of a replaced blob, and generation ->
+        # number of open readers
+        self._retired: Dict[int, int] = {}
+        self._readers: Dict[int, int] = {}
+        self.generation = self._stored_generation()
+        self.fd = self._open_blob(self.generation)
+    
+    def _blob_path(self, generation: int) -> Path:
+        # Generation 0 keeps the original file name
+        if generation == 0:
+            return self.directory / 'artifacts.blob'
+        return self.directory / f'artifacts.{generation}.blob'
+    
+    def _open_blob(self, generation: int) -> int:
+        flags = os.O_RDWR | os.O_CREAT | os.O_APPEND | getattr(os, 'O_BINARY', 0)
+        return os.open(str(self._blob_path(generation)), flags, 0o644)
+    
+    def _stored_generation(self) -> int:
+        row = self.index.execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()
+        return row[0] if row else 0
+    
+    def _sync_generation(self) -> None:
+        # Called with self._lock held; another process may have compacted
+        generation = self._stored_generation()
+        if generation != self.generation:
+            self._retire(self.generation, self.fd)
+            self.fd = self._open_blob(generation)
+            self.generation = generation
+    
+    def _retire(self, generation: int, fd: int) -> None:
+        # Called with self._lock held
+        if self._readers.get(generation):
+            self._retired[generation] = fd
+        else:
+            os.close(fd)
+    
+    def _acquire_reader(self, generation: int) -> int:
+        with self._lock:
+            if generation == self.generation:
+                fd = self.fd
+            elif generation in self._retired:
+                fd = self._retired[generation]
+            else:
+                raise OSError(f"Artifact blob generation {generation} was compacted away; look the artifact up again")
+            self._readers[generation] = self._readers.get(generation, 0) + 1
+            return fd
+    
+    def _release_reader(self, generation: int) -> None:
+        with self._lock:
+            count = self._readers.pop(generation, 0) - 1
+            if count > 0:
+                self._readers[generation] = count
+            elif generation in self._retired:
+                os.close(self._retired.pop(generation))
+    
+    def _lock_blob(self) -> None:
+        # Locks the current generation's blob against other processes. A
+        # compaction that finished while we waited moved the store to a new
+        # blob, so follow it and lock that one instead
+        if not FCNTL_AVAILABLE:
+            self._sync_generation()
+            return
+        
+        while True:
+            self._sync_generation()
+            fd = self.fd
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            if self._stored_generation() == self.generation:
+                return
+            fcntl.flock(fd, fcntl.LOCK_UN)
+    
+    def _unlock_blob(self, fd: int) -> None:
+        if FCNTL_AVAILABLE:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+    
+    def put(self, name: str, data: Union[bytes, bytearray], mimetype: str = 'application/octet-stream') -> Artifact:
+        etag = hashlib.sha256(data).hexdigest()[:32]
+        view = memoryview(data)
+        
+        with self._lock:
+            # Other server processes append to the same blob
+            self._lock_blob()
+            fd, generation = self.fd, self.generation
+            try:
+                offset = os.lseek(fd, 0, os.SEEK_END)
+                _write_all(fd, view)
+                
+                self.index.execute(
+                    'INSERT OR REPLACE INTO artifacts VALUES (?, ?, ?, ?, ?)',
+                    (name, offset, len(view), mimetype, etag)
+                )
+                self.index.commit()
+            finally:
+                self._unlock_blob(fd)
+        
+        self._maybe_compact()
+        return Artifact(offset, len(view), mimetype, etag, generation)
+    
+    def delete(self, name: str) -> bool:
+        with self._lock:
+            deleted = self.index.execute('DELETE FROM artifacts WHERE name = ?', (name,)).rowcount > 0
+            self.index.commit()
+        
+        if deleted:
+            self._maybe_compact()
+        return deleted
+    
+    def get(self, name: str) -> Optional[Artifact]:
+        with self._lock:
+            while True:
+                self._sync_generation()
+                row = self.index.execute(
+                    'SELECT offset, length, mimetype, etag FROM artifacts WHERE name = ?', (name,)
+                ).fetchone()
+                # A compaction committed by another process between the two
+                # reads moved the offsets to the next generation; retry
+                if self._stored_generation() == self.generation:
+                    break
+        return Artifact(*row, self.generation) if row else None
+    
+    def _dead_bytes(self) -> Tuple[int, int]:
+        with self._lock:
+            self._sync_generation()
+            size = os.fstat(self.fd).st_size
+            live = self.index.execute('SELECT COALESCE(SUM(length), 0) FROM artifacts').fetchone()[0]
+        return size, size - live
+    
+    def _maybe_compact(self) -> None:
+        size, dead = self._dead_bytes()
+        if size >= self.COMPACT_MIN_BYTES and dead * 2 > size:
+            self.compact()
+    
+    def compact(self) -> None:
+        with self._lock:
+            self._lock_blob()
+            old_fd, old_generation = self.fd, self.generation
+            try:
+                new_generation = old_generation + 1
+                new_path = self._blob_path(new_generation)
+                new_fd = os.open(str(new_path), os.O_RDWR | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0), 0o644)
+                
+                rows = self.index.execute('SELECT name, offset, length FROM artifacts ORDER BY offset').fetchall()
+                moved = []
+                new_offset = 0
+                for name, offset, length in rows:
+                    for chunk in _read_range(old_fd, offset, length, self._pread):
+                        _write_all(new_fd, chunk)
+                    moved.append((new_offset, name))
+                    new_offset += length
+                os.close(new_fd)
+                
+                self.index.executemany('UPDATE artifacts SET offset = ? WHERE name = ?', moved)
+                self.index.execute(
+                    "INSERT OR REPLACE INTO meta VALUES ('generation', ?)", (new_generation,)
+                )
+                self.index.commit()
+                
+                self.fd = self._open_blob(new_generation)
+                self.generation = new_generation
+            finally:
+                self._unlock_blob(old_fd)
+            
+            if self.generation != old_generation:
+                self._retire(old_generation, old_fd)
+                try:
+                    # Open descriptors keep the data readable until closed
+                    self._blob_path(old_generation).unlink()
+                except OSError:
+                    pass
+    
+    def _pread(self, fd: int, size: int, offset: int) -> bytes:
+        if hasattr(os, 'pread'):
+            return os.pread(fd, size, offset)
+        with self._seek_lock:
+            os.lseek(fd, offset, os.SEEK_SET)
+            return os.read(fd, size)
+    
+    def iter_chunks(self, artifact: Artifact, chunk_size: int = 1024 * 1024) -> '_ChunkReader':
+        # The reader holds its blob open until it is exhausted or closed;
+        # WSGI servers close response iterables even when they are not sent
+        return _ChunkReader(self, artifact, chunk_size)
+    
+    def read(self, name: str) -> Optional[bytes]:
+        artifact = self.get(name)
+        if artifact is None:
+            return None
+        with self.iter_chunks(artifact) as chunks:
+            return b''.join(chunks)
+    
+    def close(self) -> None:
+        self.index.close()
+        for fd in self._retired.values():
+            os.close(fd)
+        self._retired.clear()
+        os.close(self.fd)
+
+def _read_range(fd: int, offset: int, length: int, pread, chunk_size: int = 1024 * 1024) -> Iterator[bytes]:
+    end = offset + length
+    while offset < end:
+        chunk = pread(fd, min(chunk_size, end - offset), offset)
+        if not chunk:
+            break
+        offset += len(chunk)
+        yield chunk
+
+class _ChunkReader:
+    def __init__(self, store: ArtifactStore, artifact: Artifact, chunk_size: int):
+        self._open = False
+        self.store = store
+        self.generation = artifact.generation
+        fd = store._acquire_reader(self.generation)
+        self._chunks = _read_range(fd, artifact.offset, artifact.length, store._pread, chunk_size)
+        self._open = True
+    
+    def __iter__(self) -> '_ChunkReader':
+        return self
+    
+    def __next__(self) -> bytes:
+        try:
+            return next(self._chunks)
+        except StopIteration:
+            self.close()
+            raise
+    
+    def __enter__(self) -> '_ChunkReader':
+        return self
+    
+    def __exit__(self, *exc) -> None:
+        self.close()
+    
+    def close(self) -> None:
+        if self._open:
+            self._open = False
+            self.store._release_reader(self.generation)
+    
+    def __del__(self):
+        self.close()
@@ -0,0 +1,68 @@
+import io
+from typing import BinaryIO, Optional, Tuple, Union
+
+import numpy as np
+from PIL import Image
+
+try:
+    from turbojpeg import TurboJPEG, TJPF_RGB
+    _turbojpeg = TurboJPEG()
+    TURBOJPEG_AVAILABLE = True
+except Exception:
+    # Either PyTurboJPEG or the libturbojpeg shared library is missing
+    _turbojpeg = None
+    TURBOJPEG_AVAILABLE = False
+
+JPEG_MAGIC = b'\xff\xd8\xff'
+
+def _scaling_factor(width: int, height: int, min_size: int) -> Optional[Tuple[int, int]]:
+    # Smallest DCT-domain scale that still leaves both sides >= min_size
+    best = None
+    for num, denom in _turbojpeg.scaling_factors:
+        if num >= denom:
+            continue
+        w = (width * num + denom - 1) // denom
+        h = (height * num + denom - 1) // denom
+        if w >= min_size and h >= min_size and (best is None or num / denom < best[0] / best[1]):
+            best = (num, denom)
+    return best
+
+def decode_image(data: bytes, min_size: Optional[int] = None) -> Union[Image.Image, np.ndarray]:
+    """
+    Decode an uploaded image, using libjpeg-turbo's SIMD decoder for JPEGs
+    when available and Pillow for everything else.
+    
+    JPEGs decoded by libjpeg-turbo come back as an (H, W, 3) RGB uint8 array.
+    With min_size, they are downscaled during the IDCT to the smallest size
+    that still covers min_size on both sides, so large photos are never
+    decoded at full resolution only to be resized away.
+    """
+    if TURBOJPEG_AVAILABLE and data[:3] == JPEG_MAGIC:
+        try:
+            scaling_factor = None
+            if min_size:
+                width, height, _, _ = _turbojpeg.decode_header(data)
+                scaling_factor = _scaling_factor(width, height, min_size)
+            return _turbojpeg.decode(data, pixel_format=TJPF_RGB, scaling_factor=scaling_factor)
+        except Exception as e:
+            print(f"TurboJPEG decode failed, falling back to Pillow: {e}")
+    
+    image = Image.open(io.BytesIO(data))
+    image.load()
+    return image
+
+def open_image(stream: BinaryIO, min_size: Optional[int] = None) -> Union[Image.Image, np.ndarray]:
+    """
+    Open an uploaded image from a seekable stream. Only JPEGs bound for
+    libjpeg-turbo are read into memory; Pillow reads everything else from
+    the stream directly instead of from an extra in-memory copy.
+    """
+    if TURBOJPEG_AVAILABLE:
+        magic = stream.read(len(JPEG_MAGIC))
+        stream.seek(0)
+        if magic == JPEG_MAGIC:
+            return decode_image(stream.read(), min_size)
+    
+    image = Image.open(stream)
+    image.load()
+    return image
@@ -0,0 +1,116 @@
+import mmap
+import os
+from pathlib import Path
+from typing import Any, Optional, Tuple, Union
+
+import numpy as np
+
+def _ply_header(vertex_count: int, face_count: int, has_colors: bool) -> bytes:
+    lines = [
+        "ply",
+        "format binary_little_endian 1.0",
+        f"element vertex {vertex_count}",
+        "property float x",
+        "property float y",
+        "property float z",
+    ]
+    if has_colors:
+        lines += [
+            "property uchar red",
+            "property uchar green",
+            "property uchar blue",
+        ]
+    lines += [
+        f"element face {face_count}",
+        "property list uchar int vertex_index",
+        "end_header",
+    ]
+    return ("\n".join(lines) + "\n").encode("ascii")
+
+def _ply_layout(vertex_count: int, face_count: int, has_colors: bool):
+    vertex_dtype = [('xyz', '<f4', (3,))]
+    if has_colors:
+        vertex_dtype.append(('rgb', 'u1', (3,)))
+    vertex_dtype = np.dtype(vertex_dtype)
+    face_dtype = np.dtype([('count', 'u1'), ('indices', '<i4', (3,))])
+    
+    header = _ply_header(vertex_count, face_count, has_colors)
+    face_offset = len(header) + vertex_count * vertex_dtype.itemsize
+    size = face_offset + face_count * face_dtype.itemsize
+    return header, vertex_dtype, face_dtype, face_offset, size
+
+def _fill_ply(buffer, vertices: np.ndarray, faces: np.ndarray, colors: Optional[np.ndarray]) -> None:
+    header, vertex_dtype, face_dtype, face_offset, _ = _ply_layout(len(vertices), len(faces), colors is not None)
+    buffer[:len(header)] = header
+    
+    vertex_block = np.ndarray((len(vertices),), dtype=vertex_dtype, buffer=buffer, offset=len(header))
+    vertex_block['xyz'] = vertices
+    if colors is not None:
+        vertex_block['rgb'] = colors
+    
+    face_block = np.ndarray((len(faces),), dtype=face_dtype, buffer=buffer, offset=face_offset)
+    face_block['count'] = 3
+    face_block['indices'] = faces
+
+def write_binary_ply(
+    output_path: Union[str, Path],
+    vertices: np.ndarray,
+    faces: np.ndarray,
+    colors: Optional[np.ndarray] = None
+) -> None:
+    """
+    Write a triangle mesh as binary little-endian PLY.
+    
+    The file is preallocated to its final size and filled through a single
+    memory map, so vertex and face data are copied once instead of being
+    packed and written element by element.
+    
+    Args:
+        output_path: Destination file
+        vertices: (V, 3) vertex positions
+        faces: (F, 3) triangle vertex indices
+        colors: Optional (V, 3) uint8 vertex colors
+    """
+    size = _ply_layout(len(vertices), len(faces), colors is not None)[-1]
+    
+    fd = os.open(str(output_path), os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        try:
+            os.posix_fallocate(fd, 0, size)
+        except (AttributeError, OSError):
+            os.ftruncate(fd, size)
+        
+        with mmap.mmap(fd, size) as mm:
+            _fill_ply(mm, vertices, faces, colors)
+            mm.flush()
+    finally:
+        os.close(fd)
+
+def encode_binary_ply(
+    vertices: np.ndarray,
+    faces: np.ndarray,
+    colors: Optional[np.ndarray] = None
+) -> bytearray:
+    """
+    Encode a triangle mesh as binary little-endian PLY in memory.
+    
+    Same layout as write_binary_ply, for callers that store the bytes
+    somewhere other than a file of their own.
+    """
+    buffer = bytearray(_ply_layout(len(vertices), len(faces), colors is not None)[-1])
+    _fill_ply(buffer, vertices, faces, colors)
+    return buffer
+
+def trimesh_to_arrays(mesh: Any) -> Tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]:
+    """
+    Pull vertex, face and (if present) RGB vertex color arrays out of a
+    trimesh.Trimesh without constructing or validating a new mesh.
+    """
+    vertices = np.asarray(mesh.vertices)
+    faces = np.asarray(mesh.faces)
+    
+    colors = None
+    visual = getattr(mesh, 'visual', None)
+    if getattr(visual, 'kind', None) == 'vertex':
+        colors = np.asarray(visual.vertex_colors)[:, :3]
+    return vertices, faces, colors
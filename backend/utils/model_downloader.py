@@ -1,19 +1,54 @@
+import json
 import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional, List, Callable
 import requests
-from huggingface_hub import snapshot_download, hf_hub_download
-import tqdm
 
 from config.config import Config
 
+# Model files run to gigabytes; 1 MiB copies keep syscalls and per-chunk
+# Python work negligible next to the transfer itself
+DOWNLOAD_BUFFER_SIZE = 1024 * 1024
+PROGRESS_INTERVAL = 0.05
+
+# Hub downloads are latency-bound per file, so files and models are fetched
+# concurrently; rate-limited requests are retried with exponential backoff
+DOWNLOAD_WORKERS = 8
+DOWNLOAD_RETRIES = 4
+
+# Written into a model directory once its snapshot is fully downloaded, so
+# later starts skip snapshot_download's per-file hub checks entirely
+COMPLETE_MARKER = ".cache_complete"
+
+class _ProgressWriter:
+    """File wrapper that reports bytes written at most every PROGRESS_INTERVAL seconds."""
+    
+    def __init__(self, f, total_size: int, progress_callback: Callable):
+        self.f = f
+        self.total_size = total_size
+        self.progress_callback = progress_callback
+        self.written = 0
+        self._last_report = 0.0
+    
+    def write(self, data) -> int:
+        self.f.write(data)
+        self.written += len(data)
+        now = time.monotonic()
+        if now - self._last_report >= PROGRESS_INTERVAL:
+            self._last_report = now
+            self.progress_callback(self.written, self.total_size)
+        return len(data)
+
 class ModelDownloader:
     def __init__(self):
-        self.models_dir = Config.MODELS_DIR
+        self.models_dir = Path(Config.MODELS_DIR)
         self.download_queue = []
     
     def download_model(self, repo_id: str, model_type: str = "3d", 
-                   progress_callback: Optional[Callable] = None) -> Path:
+                   progress_callback: Optional[Callable] = None, force: bool = False) -> Path:
         """
         Download a model from Hugging Face Hub.
         
@@ -21,13 +56,16 @@ class ModelDownloader:
             repo_id: Model repository ID (e.g., "stabilityai/stable-diffusion-2-1")
             model_type: Type of model ("3d", "llm", "image")
             progress_callback: Optional callback function for progress updates
+            force: Download again even if a complete copy exists
         
         Returns:
             Path to downloaded model
         """
+        # huggingface_hub is only imported once something is downloaded
+        from huggingface_hub import snapshot_download
+        from huggingface_hub.utils import HfHubHTTPError
+        
         try:
-            print(f"Downloading model: {repo_id}")
-            
             if model_type == "3d":
                 target_dir = self.models_dir / "3d" / repo_id.replace("/", "_")
             elif model_type == "llm":
@@ -37,15 +75,31 @@ class ModelDownloader:
             else:
                 target_dir = self.models_dir / repo_id.replace("/", "_")
             
+            marker = target_dir / COMPLETE_MARKER
+            if marker.exists() and not force:
+                print(f"Model already downloaded: {repo_id}")
+                return target_dir
+            
+            print(f"Downloading model: {repo_id}")
             target_dir.mkdir(parents=True, exist_ok=True)
             
-            downloaded_path = snapshot_download(
-                repo_id=repo_id,
-                local_dir=target_dir,
-                local_dir_use_symlinks=False,
-                progress_bar=progress_callback or True
-            )
+            for attempt in range(DOWNLOAD_RETRIES):
+                try:
+                    downloaded_path = snapshot_download(
+                        repo_id=repo_id,
+                        local_dir=target_dir,
+                        local_dir_use_symlinks=False,
+                        max_workers=DOWNLOAD_WORKERS
+                    )
+                    break
+                except HfHubHTTPError as e:
+                    if attempt == DOWNLOAD_RETRIES - 1:
+                        raise
+                    delay = 2 ** attempt
+                    print(f"Download of {repo_id} failed ({e}), retrying in {delay}s")
+                    time.sleep(delay)
             
+            marker.write_text(json.dumps({"repo_id": repo_id, "revision": self._revision(repo_id)}))
             print(f"Model downloaded to: {downloaded_path}")
             return target_dir
         
@@ -80,16 +134,16 @@ class ModelDownloader:
             if progress_callback:
                 progress_callback(0, total_size)
             
-            chunk_size = 8192
-            downloaded = 0
+            # Undo any Content-Encoding, as iter_content() would
+            response.raw.decode_content = True
             
             with open(output_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=chunk_size):
-                    f.write(chunk)
-                    downloaded += len(chunk)
-                    
-                    if progress_callback and total_size > 0:
-                        progress_callback(downloaded, total_size)
+                if progress_callback and total_size > 0:
+                    writer = _ProgressWriter(f, total_size, progress_callback)
+                    shutil.copyfileobj(response.raw, writer, DOWNLOAD_BUFFER_SIZE)
+                    progress_callback(writer.written, total_size)
+                else:
+                    shutil.copyfileobj(response.raw, f, DOWNLOAD_BUFFER_SIZE)
             
             print(f"Model downloaded to: {output_path}")
             return output_path
@@ -98,9 +152,16 @@ class ModelDownloader:
             print(f"Error downloading from URL: {e}")
             raise
     
+    def _revision(self, repo_id: str) -> Optional[str]:
+        from huggingface_hub import model_info
+        
+        try:
+            return model_info(repo_id).sha
+        except Exception:
+            return None
+    
     def get_available_disk_space(self) -> int:
         """Get available disk space in bytes."""
-        import shutil
         return shutil.disk_usage(self.models_dir).free
     
     def get_model_size(self, repo_id: str) -> Optional[int]:
@@ -110,8 +171,9 @@ class ModelDownloader:
         Returns:
             Size in bytes, or None if not available
         """
+        from huggingface_hub import model_info
+        
         try:
-            from huggingface_hub import model_info
             info = model_info(repo_id)
             if info.safetensors:
                 return sum(f.safetensors.size for f in info.safetensors)
@@ -135,23 +197,23 @@ class ModelDownloader:
             ("stabilityai/triposr", "3d"),
         ]
         
-        downloaded_paths = []
-        
-        for repo_id, model_type in required_models:
+        def fetch(model: tuple) -> Optional[Path]:
+            repo_id, model_type = model
             model_dir = self.models_dir / model_type / repo_id.replace("/", "_")
             
-            if not model_dir.exists() or force:
+            # A directory without the marker is an interrupted download
+            if not (model_dir / COMPLETE_MARKER).exists() or force:
                 try:
                     print(f"Auto-downloading: {repo_id}")
-                    path = self.download_model(repo_id, model_type)
-                    downloaded_paths.append(path)
+                    return self.download_model(repo_id, model_type, force=force)
                 except Exception as e:
                     print(f"Failed to auto-download {repo_id}: {e}")
-            else:
-                print(f"Model already exists: {repo_id}")
-                downloaded_paths.append(model_dir)
+                    return None
+            print(f"Model already exists: {repo_id}")
+            return model_dir
         
-        return downloaded_paths
+        with ThreadPoolExecutor(max_workers=len(required_models)) as executor:
+            return [path for path in executor.map(fetch, required_models) if path is not None]
 
 class ProgressCallback:
     """Custom progress callback for model downloads."""
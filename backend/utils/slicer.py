@@ -1,7 +1,11 @@
+import os
 import numpy as np
-from typing import List, Tuple, Optional, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple, Optional, Dict, Any, BinaryIO, Union
 from pathlib import Path
+import hashlib
 import json
+import orjson
 
 try:
     import trimesh
@@ -9,6 +13,17 @@ try:
 except ImportError:
     TRIMESH_AVAILABLE = False
 
+from backend.utils._slice_kernels import NUMBA_AVAILABLE, slice_faces
+
+GCODE_BUFFER_SIZE = 1024 * 1024
+_GCODE_EXTRUDE = "G1 X%.3f Y%.3f E1.0\n"
+
+def _to_builtin(obj: Any) -> Any:
+    # Array subclasses (trimesh's TrackedArray) and non-contiguous views
+    if isinstance(obj, np.ndarray):
+        return np.ascontiguousarray(obj).tolist()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
 class SlicerConfig:
     def __init__(
         self,
@@ -34,9 +49,28 @@ class Layer:
     def __init__(self, z_height: float, layer_index: int):
         self.z_height = z_height
         self.layer_index = layer_index
-        self.contours: List[np.ndarray] = []
-        self.infill: List[np.ndarray] = []
+        # Every contour's points back to back; contour i is
+        # contour_points[contour_offsets[i]:contour_offsets[i + 1]]
+        self.contour_points = np.empty((0, 3))
+        self.contour_offsets = np.zeros(1, dtype=np.int64)
+        # (lines, 2 endpoints, xyz)
+        self.infill: np.ndarray = np.empty((0, 2, 3), dtype=np.float32)
         self.supports: List[np.ndarray] = []
+    
+    @property
+    def contours(self) -> List[np.ndarray]:
+        # Views into contour_points, no copies
+        if len(self.contour_offsets) < 2:
+            return []
+        return np.split(self.contour_points, self.contour_offsets[1:-1])
+    
+    def set_contours(self, contours: List[np.ndarray]) -> None:
+        if not contours:
+            self.contour_points = np.empty((0, 3))
+            self.contour_offsets = np.zeros(1, dtype=np.int64)
+            return
+        self.contour_points = np.concatenate(contours)
+        self.contour_offsets = np.concatenate([[0], np.cumsum([len(c) for c in contours])])
 
 class Slicer:
     def __init__(self, config: Optional[SlicerConfig] = None):
@@ -44,14 +78,31 @@ class Slicer:
         self.mesh = None
         self.layers: List[Layer] = []
         self.bounding_box = None
+        # Digest of the mesh and config the current layers were sliced from
+        self.slice_hash: Optional[str] = None
+        # get_statistics() result for the current layers
+        self._statistics: Optional[Dict[str, Any]] = None
+        # Fraction of layers built by the running (or last) slice_mesh()
+        self.progress = 0.0
+    
+    def reset(self, config: Optional[SlicerConfig] = None) -> None:
+        self.config = config or SlicerConfig()
+        self.mesh = None
+        self.layers = []
+        self.bounding_box = None
+        self.slice_hash = None
+        self._statistics = None
+        self.progress = 0.0
     
-    def load_mesh(self, mesh_path: str) -> bool:
+    def load_mesh(self, mesh_path: Union[str, BinaryIO], file_type: Optional[str] = None) -> bool:
         if not TRIMESH_AVAILABLE:
             print("Trimesh not available, cannot load mesh")
             return False
         
         try:
-            self.mesh = trimesh.load(mesh_path)
+            self.slice_hash = None
+            self._statistics = None
+            self.mesh = trimesh.load(mesh_path, file_type=file_type)
             
             if isinstance(self.mesh, trimesh.Scene):
                 self.mesh = trimesh.util.concatenate(
@@ -87,37 +138,72 @@ class Slicer:
             raise RuntimeError("Trimesh not available")
         
         self.layers = []
+        self.progress = 0.0
         z_min = self.bounding_box['min'][2]
         z_max = self.bounding_box['max'][2]
         
-        layer_height = self.config.first_layer_height
-        z = z_min + layer_height
+        z_levels = np.arange(z_min + self.config.first_layer_height, z_max, self.config.layer_height)
         
-        layer_index = 0
-        total_layers = int(np.ceil((z_max - z_min - layer_height) / self.config.layer_height)) + 1
+        # Every plane is intersected with the mesh in one pass instead of
+        # one mesh.section() call per layer
+        if NUMBA_AVAILABLE:
+            segments, offsets = slice_faces(self.mesh.vertices, self.mesh.faces, z_levels)
+            sections = [segments[offsets[i]:offsets[i + 1]] for i in range(len(z_levels))]
+            to_3d = np.tile(np.eye(4), (len(z_levels), 1, 1))
+            to_3d[:, 2, 3] = z_levels
+        else:
+            sections, to_3d, _ = trimesh.intersections.mesh_multiplane(
+                self.mesh, plane_origin=[0, 0, 0], plane_normal=[0, 0, 1], heights=z_levels
+            )
         
-        while z < z_max:
-            if progress_callback:
-                progress_callback(layer_index / total_layers)
-            
-            layer = Layer(z, layer_index)
-            self._slice_layer(z, layer)
-            self.layers.append(layer)
-            
-            layer_index += 1
-            z += self.config.layer_height
+        def build_layer(layer_index: int) -> Layer:
+            layer = Layer(float(z_levels[layer_index]), layer_index)
+            self._build_contours(sections[layer_index], to_3d[layer_index], layer)
+            self.generate_infill(layer)
+            return layer
+        
+        # Layers are independent once the planes are intersected; map()
+        # yields them back in order
+        total_layers = len(z_levels)
+        layers = []
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+            for layer in executor.map(build_layer, range(total_layers)):
+                if progress_callback:
+                    progress_callback(layer.layer_index / total_layers)
+                layers.append(layer)
+                self.progress = len(layers) / total_layers
+        self.layers = layers
+        self.progress = 1.0
+        self._statistics = None
         
+        self.slice_hash = self._compute_slice_hash()
         return self.layers
     
-    def _slice_layer(self, z: float, layer: Layer) -> None:
+    def _compute_slice_hash(self) -> str:
+        # Content-based, so every process that slices the same mesh with the
+        # same config arrives at the same value
+        digest = hashlib.blake2b(digest_size=8)
+        digest.update(np.ascontiguousarray(self.mesh.vertices).tobytes())
+        digest.update(np.ascontiguousarray(self.mesh.faces).tobytes())
+        digest.update(json.dumps(vars(self.config), sort_keys=True).encode())
+        return digest.hexdigest()
+    
+    def _build_contours(self, segments: np.ndarray, transform: np.ndarray, layer: Layer) -> None:
+        # Chain the plane's (n, 2, 2) segments into closed polylines and
+        # lift them back to 3D
+        if len(segments) == 0:
+            return
+        
         try:
-            section = self.mesh.section(plane_normal=[0, 0, 1], plane_origin=[0, 0, z])
+            path = trimesh.load_path(segments)
+            # discrete() returns the polyline's own vertices, so contour size
+            # tracks the layer outline rather than the mesh
+            contours = [entity.discrete(path.vertices) for entity in path.entities]
+            layer.set_contours(contours)
             
-            if section is not None and hasattr(section, 'entities'):
-                for entity in section.entities:
-                    if hasattr(entity, 'discrete'):
-                        points = entity.discretize(self.mesh.vertices.shape[0])
-                        layer.contours.append(points)
+            # One transform for the whole layer instead of one per contour
+            points = np.column_stack([layer.contour_points, np.zeros(len(layer.contour_points))])
+            layer.contour_points = trimesh.transform_points(points, transform)
         except Exception as e:
             pass
     
@@ -125,11 +211,11 @@ class Slicer:
         if not TRIMESH_AVAILABLE:
             return
         
-        if not layer.contours:
+        if len(layer.contour_points) == 0:
             return
         
         try:
-            all_contours = np.vstack(layer.contours)
+            all_contours = layer.contour_points
             
             min_x, min_y = all_contours.min(axis=0)[:2]
             max_x, max_y = all_contours.max(axis=0)[:2]
@@ -139,26 +225,38 @@ class Slicer:
             if self.config.fill_pattern == "grid":
                 lines_x = np.arange(min_x, max_x, spacing)
                 lines_y = np.arange(min_y, max_y, spacing)
+                nx = len(lines_x)
                 
-                for x in lines_x:
-                    line = np.array([[x, min_y], [x, max_y, z=layer.z_height]])
-                    layer.infill.append(line)
-                
-                for y in lines_y:
-                    line = np.array([[min_x, y], [max_x, y, z=layer.z_height]])
-                    layer.infill.append(line)
+                # Vertical lines first, then horizontal, all in one array
+                infill = np.empty((nx + len(lines_y), 2, 3), dtype=np.float32)
+                infill[:nx, :, 0] = lines_x[:, None]
+                infill[:nx, 0, 1] = min_y
+                infill[:nx, 1, 1] = max_y
+                infill[nx:, 0, 0] = min_x
+                infill[nx:, 1, 0] = max_x
+                infill[nx:, :, 1] = lines_y[:, None]
+                infill[..., 2] = layer.z_height
+                layer.infill = infill
             
         except Exception as e:
             pass
     
-    def get_layer_preview(self, layer_index: int) -> Optional[Dict[str, Any]]:
+    def get_layer_preview(self, layer_index: int, as_lists: bool = True) -> Optional[Dict[str, Any]]:
         if 0 <= layer_index < len(self.layers):
             layer = self.layers[layer_index]
+            if not as_lists:
+                return {
+                    'z_height': layer.z_height,
+                    'layer_index': layer.layer_index,
+                    'contours': list(layer.contours),
+                    'infill': layer.infill,
+                    'supports': list(layer.supports)
+                }
             return {
                 'z_height': layer.z_height,
                 'layer_index': layer.layer_index,
                 'contours': [c.tolist() for c in layer.contours],
-                'infill': [i.tolist() for i in layer.infill],
+                'infill': layer.infill.tolist(),
                 'supports': [s.tolist() for s in layer.supports]
             }
         return None
@@ -166,12 +264,14 @@ class Slicer:
     def get_statistics(self) -> Dict[str, Any]:
         if not self.layers:
             return {}
+        if self._statistics is not None:
+            return dict(self._statistics)
         
-        total_height = sum(self.config.layer_height for _ in self.layers)
+        total_height = len(self.layers) * self.config.layer_height
         first_layer_height = self.layers[0].z_height - (self.bounding_box['min'][2] if self.bounding_box else 0)
         total_height += first_layer_height
         
-        return {
+        self._statistics = {
             'total_layers': len(self.layers),
             'total_height_mm': total_height,
             'first_layer_height_mm': self.config.first_layer_height,
@@ -179,10 +279,59 @@ class Slicer:
             'bounding_box': self.bounding_box,
             'estimated_time_minutes': total_height / self.config.layer_height * 0.5
         }
+        return dict(self._statistics)
+    
+    def save_layers(self, output_path: str) -> None:
+        # Flat arrays per field plus per-layer start offsets, written with
+        # np.savez so another process can restore the layers without slicing
+        def starts(lengths):
+            return np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+        
+        data = {
+            'z_heights': np.array([layer.z_height for layer in self.layers], dtype=np.float64),
+            'points': np.concatenate([layer.contour_points for layer in self.layers]) if self.layers else np.empty((0, 3)),
+            'point_starts': starts([len(layer.contour_points) for layer in self.layers]),
+            'contour_offsets': np.concatenate([layer.contour_offsets for layer in self.layers]) if self.layers else np.zeros(0, dtype=np.int64),
+            'offset_starts': starts([len(layer.contour_offsets) for layer in self.layers]),
+            'infill': np.concatenate([layer.infill for layer in self.layers]) if self.layers else np.empty((0, 2, 3), dtype=np.float32),
+            'infill_starts': starts([len(layer.infill) for layer in self.layers]),
+            'slice_hash': np.array(self.slice_hash or '')
+        }
+        
+        tmp_path = output_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **data)
+        os.replace(tmp_path, output_path)
+    
+    def load_layers(self, input_path: str) -> bool:
+        try:
+            with np.load(input_path) as data:
+                z_heights = data['z_heights']
+                points, point_starts = data['points'], data['point_starts']
+                offsets, offset_starts = data['contour_offsets'], data['offset_starts']
+                infill, infill_starts = data['infill'], data['infill_starts']
+                slice_hash = str(data['slice_hash'])
+        except (OSError, KeyError, ValueError) as e:
+            print(f"Error loading layers: {e}")
+            return False
+        
+        layers = []
+        for i, z_height in enumerate(z_heights):
+            layer = Layer(float(z_height), i)
+            layer.contour_points = points[point_starts[i]:point_starts[i + 1]]
+            layer.contour_offsets = offsets[offset_starts[i]:offset_starts[i + 1]]
+            layer.infill = infill[infill_starts[i]:infill_starts[i + 1]]
+            layers.append(layer)
+        
+        self.layers = layers
+        self.progress = 1.0
+        self._statistics = None
+        self.slice_hash = slice_hash or None
+        return True
     
     def export_to_gcode(self, output_path: str) -> bool:
         try:
-            with open(output_path, 'w') as f:
+            with open(output_path, 'w', buffering=GCODE_BUFFER_SIZE) as f:
                 f.write("; Generated by AI 3D Model Generator Slicer\n")
                 f.write(f"; Layer height: {self.config.layer_height}\n")
                 f.write(f"; Nozzle diameter: {self.config.nozzle_diameter}\n")
@@ -197,11 +346,13 @@ class Slicer:
                     f.write(f"G1 Z{layer.z_height} F3000\n")
                     
                     for contour in layer.contours:
-                        for j, point in enumerate(contour):
-                            if j == 0:
-                                f.write(f"G1 X{point[0]:.3f} Y{point[1]:.3f} F1800\n")
-                            else:
-                                f.write(f"G1 X{point[0]:.3f} Y{point[1]:.3f} E1.0\n")
+                        if len(contour) == 0:
+                            continue
+                        f.write("G1 X%.3f Y%.3f F1800\n" % (contour[0, 0], contour[0, 1]))
+                        # One %-format call per contour: the formatting loop
+                        # runs in C instead of once per point in Python
+                        extrusions = contour[1:, :2]
+                        f.write(_GCODE_EXTRUDE * len(extrusions) % tuple(extrusions.ravel().tolist()))
                     
                     f.write("\n")
             
@@ -225,20 +376,22 @@ class Slicer:
                 },
                 'bounding_box': self.bounding_box,
                 'statistics': self.get_statistics(),
+                # orjson writes the arrays directly from their buffers
+                # instead of through nested tolist() lists
                 'layers': [
                     {
                         'z_height': layer.z_height,
                         'layer_index': layer.layer_index,
-                        'contours': [c.tolist() for c in layer.contours],
-                        'infill': [i.tolist() for i in layer.infill],
-                        'supports': [s.tolist() for s in layer.supports]
+                        'contours': layer.contours,
+                        'infill': layer.infill,
+                        'supports': layer.supports
                     }
                     for layer in self.layers
                 ]
             }
             
-            with open(output_path, 'w') as f:
-                json.dump(data, f, indent=2)
+            with open(output_path, 'wb') as f:
+                f.write(orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY, default=_to_builtin))
             
             return True
         except Exception as e:
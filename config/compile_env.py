@@ -0,0 +1,25 @@
+"""
+Snapshot .env into config/_env_frozen.py.
+
+    python -m config.compile_env
+
+Config imports the snapshot instead of parsing .env while the file's
+modification time still matches; rerun after editing .env. The snapshot
+holds the same secrets as .env and is not committed.
+"""
+from dotenv import dotenv_values
+
+from config.config import ENV_FILE
+
+FROZEN_FILE = ENV_FILE.parent / 'config' / '_env_frozen.py'
+
+def compile_env() -> int:
+    values = {key: value for key, value in dotenv_values(ENV_FILE).items() if value is not None}
+    with open(FROZEN_FILE, 'w') as f:
+        f.write("# Generated by `python -m config.compile_env` from .env; do not edit\n")
+        f.write(f"SOURCE_MTIME = {ENV_FILE.stat().st_mtime_ns}\n")
+        f.write(f"FROZEN = {values!r}\n")
+    return len(values)
+
+if __name__ == '__main__':
+    print(f"Wrote {compile_env()} settings to {FROZEN_FILE}")
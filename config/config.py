@@ -1,52 +1,235 @@
+import functools
 import os
+import platform
 from pathlib import Path
+from types import MappingProxyType
+from typing import Mapping
 from dotenv import load_dotenv
 
-load_dotenv()
+ENV_FILE = Path(__file__).parent.parent / '.env'
 
-class Config:
-    BASE_DIR = Path(__file__).parent.parent
-    
-    API_KEYS = {
-        'openai': os.getenv('OPENAI_API_KEY', ''),
-        'anthropic': os.getenv('ANTHROPIC_API_KEY', ''),
-        'openrouter': os.getenv('OPENROUTER_API_KEY', '')
-    }
-    
-    DEVICE = os.getenv('DEVICE', 'auto')
-    
-    API_HOST = os.getenv('API_HOST', '0.0.0.0')
-    API_PORT = int(os.getenv('API_PORT', 5000))
-    DEBUG = os.getenv('DEBUG', 'False').lower() == 'true'
-    
-    DEFAULT_LLM = os.getenv('DEFAULT_LLM', 'auto')
-    LOCAL_LLM_ENABLED = os.getenv('LOCAL_LLM_ENABLED', 'True').lower() == 'true'
-    LOCAL_LLM_PATH = os.getenv('LOCAL_LLM_PATH', './models/llm')
-    LOCAL_LLM_TYPE = os.getenv('LOCAL_LLM_TYPE', 'transformers')
-    NETWORKED_LLM_URL = os.getenv('NETWORKED_LLM_URL', '')
-    NETWORKED_LLM_API_KEY = os.getenv('NETWORKED_LLM_API_KEY', '')
-    
-    SHAP_E_MODEL = os.getenv('SHAP_E_MODEL', 'openai/shap-e')
-    TRIPOSR_MODEL = os.getenv('TRIPOSR_MODEL', 'stabilityai/triposr')
+def _load_frozen_env() -> bool:
+    # `python -m config.compile_env` snapshots .env into a module, which
+    # imports from its cached bytecode instead of being parsed as text
+    try:
+        from config._env_frozen import FROZEN, SOURCE_MTIME
+    except ImportError:
+        return False
+    # The snapshot is only trusted while .env exists unchanged; a deleted
+    # .env must not bring back stale values
+    try:
+        if ENV_FILE.stat().st_mtime_ns != SOURCE_MTIME:
+            return False
+    except OSError:
+        return False
+    for key, value in FROZEN.items():
+        os.environ.setdefault(key, value)
+    return True
+
+# Worker processes inherit the parent's already-loaded environment, and
+# deployments that inject variables directly can skip the file with
+# SKIP_DOTENV=1
+if os.environ.get('SKIP_DOTENV') != '1' and not os.environ.get('CONFIG_LOADED'):
+    if not _load_frozen_env():
+        load_dotenv(ENV_FILE, override=False)
+    os.environ['CONFIG_LOADED'] = '1'
+
+_dirs_ready = False
+
+# Read once after .env is loaded; each setting is then a single dict lookup
+_env = os.environ
+
+def _get(key: str, default: str) -> str:
+    return _env.get(key, default)
+
+def _get_int(key: str, default: int) -> int:
+    return int(_env.get(key, default))
+
+def _get_float(key: str, default: float) -> float:
+    return float(_env.get(key, default))
+
+_BOOL = {
+    'true': True, 'True': True, 'TRUE': True, '1': True, 'yes': True, 'on': True,
+    'false': False, 'False': False, 'FALSE': False, '0': False, 'no': False, 'off': False,
+}
+
+def _get_bool(key: str, default: bool) -> bool:
+    # Common spellings hit the table directly; anything else is normalized
+    value = _env.get(key)
+    if value is None:
+        return default
+    result = _BOOL.get(value)
+    if result is None:
+        result = _BOOL.get(value.strip().lower(), default)
+    return result
+
+def _get_lower(key: str, default: str) -> str:
+    return _get(key, default).lower()
+
+def _get_path(key: str, default: str) -> str:
+    # Plain absolute strings: callers join and open them directly, without
+    # Path allocation or __fspath__ dispatch on every use
+    return os.path.abspath(_get(key, default))
+
+# Device nodes created by the NVIDIA driver, the ROCm driver and WSL's GPU
+# paravirtualization; without any of them torch cannot find a Linux GPU
+_LINUX_GPU_DEVICES = ('/dev/nvidiactl', '/dev/nvidia0', '/dev/kfd', '/dev/dxg')
+
+def _gpu_possible() -> bool:
+    # A CUDA build of torch probes the driver in is_available(), which is
+    # slow and noisy on hosts without one; rule those hosts out up front
+    system = platform.system()
+    if system == 'Linux':
+        return any(os.path.exists(path) for path in _LINUX_GPU_DEVICES)
+    if system == 'Darwin':
+        return platform.machine() == 'arm64'
+    return True
+
+def _get_device(key: str, default: str) -> str:
+    # 'auto' is resolved once, on first access, to a concrete torch device
+    # string; torch is only imported by processes that ask for DEVICE
+    value = _get(key, default).lower()
+    if value != 'auto':
+        return value
+    if not _gpu_possible():
+        return 'cpu'
+    try:
+        import torch
+    except ImportError:
+        return 'cpu'
+    # ROCm builds report AMD GPUs through torch.cuda as well
+    if platform.system() != 'Darwin' and torch.cuda.is_available():
+        return 'cuda'
+    if torch.backends.mps.is_available():
+        return 'mps'
+    return 'cpu'
+
+def _get_api_keys(key: str, default: None) -> Mapping[str, str]:
+    # Read-only, and only providers that actually have a key are present
+    keys = (
+        ('openai', _get('OPENAI_API_KEY', '')),
+        ('anthropic', _get('ANTHROPIC_API_KEY', '')),
+        ('openrouter', _get('OPENROUTER_API_KEY', ''))
+    )
+    return MappingProxyType({name: value for name, value in keys if value})
+
+def _get_llm_cache_dir(key: str, default: None) -> str:
+    return _get(key, os.path.join(Config.STATE_DIR, 'llm_prompts'))
+
+class _LazyConfig(type):
+    # Settings are read and cast on first access, then stored on the class so
+    # later reads are plain attribute lookups; keys a process never touches
+    # (WINDOW_* in the API server, TTLs in the GUI) cost nothing
+    def __getattr__(cls, name):
+        try:
+            reader, default = cls._SPEC[name]
+        except KeyError:
+            raise AttributeError(f"type object 'Config' has no attribute '{name}'") from None
+        try:
+            value = reader(name, default)
+        except ValueError as e:
+            raise ValueError(f"Invalid value for {name}: {e}") from None
+        setattr(cls, name, value)
+        return value
     
-    DEFAULT_INFERENCE_STEPS = int(os.getenv('DEFAULT_INFERENCE_STEPS', 50))
-    DEFAULT_GUIDANCE_SCALE = float(os.getenv('DEFAULT_GUIDANCE_SCALE', 7.5))
-    DEFAULT_FRAME_SIZE = int(os.getenv('DEFAULT_FRAME_SIZE', 256))
-    MESH_RESOLUTION = int(os.getenv('MESH_RESOLUTION', 256))
+    def __dir__(cls):
+        return sorted(set(super().__dir__()) | set(cls._SPEC))
+
+class Config(metaclass=_LazyConfig):
+    BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     
-    OUTPUT_DIR = Path(os.getenv('OUTPUT_DIR', './output'))
-    MODELS_DIR = Path(os.getenv('MODELS_DIR', './models'))
-    LOGS_DIR = Path(os.getenv('LOGS_DIR', './logs'))
+    _SPEC = {
+        'API_KEYS': (_get_api_keys, None),
+        
+        'DEVICE': (_get_device, 'auto'),
+        'GPU_MEMORY_FRACTION': (_get_float, 0.9),
+        
+        'API_HOST': (_get, '0.0.0.0'),
+        'API_PORT': (_get_int, 5000),
+        'API_SERVER': (_get, 'hypercorn'),
+        'API_WORKERS': (_get_int, 1),
+        'WSGI_THREADS': (_get_int, 8),
+        'MAX_UPLOAD_SIZE': (_get_int, 64 * 1024 * 1024),
+        'SENDFILE_MODE': (_get_lower, ''),
+        'SENDFILE_ACCEL_PREFIX': (_get, '/internal-output/'),
+        'DEBUG': (_get_bool, False),
+        
+        'DEFAULT_LLM': (_get, 'auto'),
+        'LOCAL_LLM_ENABLED': (_get_bool, True),
+        'LOCAL_LLM_PATH': (_get, './models/llm'),
+        'LOCAL_LLM_TYPE': (_get, 'transformers'),
+        'LOCAL_LLM_QUANTIZATION': (_get_lower, 'none'),
+        'LOCAL_LLM_COMPILE': (_get_bool, False),
+        'NETWORKED_LLM_URL': (_get, ''),
+        'NETWORKED_LLM_API_KEY': (_get, ''),
+        'LLM_CACHE_TTL': (_get_float, 3600),
+        
+        'SHAP_E_MODEL': (_get, 'openai/shap-e'),
+        'TRIPOSR_MODEL': (_get, 'stabilityai/triposr'),
+        'DIFFUSION_FP8': (_get_bool, False),
+        'QUANTIZE_UNET': (_get_bool, False),
+        'SHAPE_BLOCK_CACHE_INTERVAL': (_get_int, 1),
+        
+        'DEFAULT_INFERENCE_STEPS': (_get_int, 50),
+        'DEFAULT_GUIDANCE_SCALE': (_get_float, 7.5),
+        'DEFAULT_FRAME_SIZE': (_get_int, 256),
+        'MESH_RESOLUTION': (_get_int, 256),
+        
+        'MAX_GENERATORS': (_get_int, 2),
+        'MAX_SLICERS': (_get_int, 16),
+        'GENERATOR_TTL': (_get_float, 1800),
+        'SLICER_TTL': (_get_float, 3600),
+        'INFERENCE_WORKERS': (_get_int, 0),
+        'JOB_TTL': (_get_float, 3600),
+        
+        'OUTPUT_DIR': (_get_path, './output'),
+        'MODELS_DIR': (_get_path, './models'),
+        'LOGS_DIR': (_get_path, './logs'),
+        'STATE_DIR': (_get_path, './state'),
+        'LLM_CACHE_DIR': (_get_llm_cache_dir, None),
+        'OUTPUT_ZSTD_LEVEL': (_get_int, 10),
+        'ARTIFACT_STORE': (_get_bool, False),
+        
+        'WINDOW_WIDTH': (_get_int, 1400),
+        'WINDOW_HEIGHT': (_get_int, 900),
+        
+        'WEB_PORT': (_get_int, 8000),
+    }
     
-    WINDOW_WIDTH = int(os.getenv('WINDOW_WIDTH', 1400))
-    WINDOW_HEIGHT = int(os.getenv('WINDOW_HEIGHT', 900))
+    @classmethod
+    def load_all(cls):
+        # One pass over the schema, so a malformed value fails at startup
+        # rather than on the first request that reads it
+        loaded = cls.__dict__
+        for name in cls._SPEC:
+            if name not in loaded:
+                getattr(cls, name)
     
-    WEB_PORT = int(os.getenv('WEB_PORT', 8000))
+    @classmethod
+    def reload(cls, env_file: bool = False):
+        # Forget every value read so far, including assignments such as the
+        # --host/--port overrides; the next access reads os.environ again.
+        # .env is otherwise parsed once per process tree, so edits to it are
+        # only picked up when env_file is set.
+        if env_file:
+            load_dotenv(ENV_FILE, override=True)
+        for name in cls._SPEC:
+            if name in cls.__dict__:
+                delattr(cls, name)
     
     @classmethod
     def ensure_directories(cls):
-        cls.OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-        cls.MODELS_DIR.mkdir(parents=True, exist_ok=True)
-        cls.LOGS_DIR.mkdir(parents=True, exist_ok=True)
+        global _dirs_ready
+        if _dirs_ready:
+            return
+        for directory in (cls.OUTPUT_DIR, cls.MODELS_DIR, cls.LOGS_DIR, cls.STATE_DIR):
+            os.makedirs(directory, exist_ok=True)
+        _dirs_ready = True
 
-Config.ensure_directories()
+@functools.lru_cache(maxsize=1)
+def get_config() -> type:
+    # Directories are created once, by the first caller that writes output,
+    # instead of as a side effect of every import (GUI client, gunicorn.conf)
+    Config.load_all()
+    Config.ensure_directories()
+    return Config
@@ -1,9 +1,16 @@
 import sys
 import asyncio
+import threading
+import time
+from collections import OrderedDict
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional
+import aiohttp
 import requests
 import json
+import orjson
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
@@ -11,58 +18,114 @@ from PyQt6.QtWidgets import (
     QTabWidget, QProgressBar, QFileDialog, QMessageBox, QGroupBox,
     QFormLayout, QScrollArea
 )
-from PyQt6.QtCore import Qt, QThread, pyqtSignal
+from PyQt6.QtCore import Qt, QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
 from PyQt6.QtGui import QPixmap
 
 from config.config import Config
 
 class APIClient:
-    def __init__(self, base_url: str = f"http://{Config.API_HOST}:{Config.API_PORT}"):
+    # A server that is not listening fails fast; reads stay unbounded by
+    # default because generation requests block until the mesh is built
+    CONNECT_TIMEOUT = 2.0
+    
+    def __init__(
+        self,
+        base_url: str = f"http://{Config.API_HOST}:{Config.API_PORT}",
+        timeout: Optional[float] = None
+    ):
         self.base_url = base_url
+        self.timeout = (self.CONNECT_TIMEOUT, timeout)
+        # Every call goes to the same API server, so keep connections open
+        # instead of reconnecting per click; worker threads share the pool
+        self._session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=20,
+            max_retries=Retry(total=2, backoff_factor=0.1)
+        )
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+        self._json_headers = {'Content-Type': 'application/json', 'Accept': 'application/json'}
+        self._urls = {}
+    
+    def _url(self, endpoint: str) -> str:
+        url = self._urls.get(endpoint)
+        if url is None:
+            url = self._urls.setdefault(endpoint, self.base_url + endpoint)
+        return url
+    
+    def close(self):
+        self._session.close()
     
     def get(self, endpoint: str) -> dict:
         try:
-            response = requests.get(f"{self.base_url}{endpoint}")
+            response = self._session.get(self._url(endpoint), timeout=self.timeout)
             response.raise_for_status()
-            return response.json()
+            return orjson.loads(response.content)
         except Exception as e:
             return {'error': str(e)}
     
     def post(self, endpoint: str, data: dict) -> dict:
         try:
-            response = requests.post(f"{self.base_url}{endpoint}", json=data)
+            response = self._session.post(
+                self._url(endpoint),
+                data=orjson.dumps(data),
+                headers=self._json_headers,
+                timeout=self.timeout
+            )
             response.raise_for_status()
-            return response.json()
+            return orjson.loads(response.content)
         except Exception as e:
             return {'error': str(e)}
 
-class GeneratorThread(QThread):
+# Jobs run on thread pools, which reuse their worker threads across clicks.
+# Generation and slicing hold a worker for as long as the job runs, so they
+# get their own pool; short requests (layer prefetches, the device probe) use
+# QThreadPool.globalInstance(). QRunnable is not a QObject, so each job
+# reports through a signal holder created on the GUI thread; emits from the
+# worker are queued.
+
+# Short requests wait on the network, not the CPU
+IO_THREADS = 8
+# One generation and one slice can run at once
+JOB_THREADS = 2
+
+_job_pool: Optional[QThreadPool] = None
+
+def job_pool() -> QThreadPool:
+    global _job_pool
+    if _job_pool is None:
+        _job_pool = QThreadPool()
+        _job_pool.setMaxThreadCount(JOB_THREADS)
+    return _job_pool
+
+class GeneratorSignals(QObject):
     finished = pyqtSignal(dict)
     error = pyqtSignal(str)
     progress = pyqtSignal(str)
-    
+
+class SlicerSignals(QObject):
+    finished = pyqtSignal(dict)
+    error = pyqtSignal(str)
+    progress = pyqtSignal(int, int)
+
+class DeviceInfoSignals(QObject):
+    ready = pyqtSignal(dict)
+
+class GeneratorJob(QRunnable):
     def __init__(self, client: APIClient, prompt: str, params: dict):
         super().__init__()
         self.client = client
         self.prompt = prompt
         self.params = params
+        self.signals = GeneratorSignals()
     
     def run(self):
-        self.progress.emit("Creating generator...")
-        gen_result = self.client.post('/api/generator/create', {
+        self.signals.progress.emit("Generating 3D model...")
+        # One round trip: the server creates the generator and runs it
+        result = self.client.post('/api/generator/run', {
             'type': self.params.get('type', 'text-to-3d'),
-            'model_path': self.params.get('model_path')
-        })
-        
-        if 'error' in gen_result:
-            self.error.emit(gen_result['error'])
-            return
-        
-        generator_id = gen_result['generator_id']
-        self.progress.emit("Generating 3D model...")
-        
-        result = self.client.post('/api/generator/text-to-3d', {
-            'generator_id': generator_id,
+            'model_path': self.params.get('model_path'),
             'prompt': self.prompt,
             'guidance_scale': self.params.get('guidance_scale', 7.5),
             'num_inference_steps': self.params.get('num_inference_steps', 50),
@@ -70,55 +133,70 @@ class GeneratorThread(QThread):
         })
         
         if 'error' in result:
-            self.error.emit(result['error'])
+            self.signals.error.emit(result['error'])
         else:
-            self.finished.emit(result)
+            self.signals.finished.emit(result)
 
-class SlicerThread(QThread):
-    finished = pyqtSignal(dict)
-    error = pyqtSignal(str)
-    progress = pyqtSignal(int, int)
-    
+class SlicerJob(QRunnable):
     def __init__(self, client: APIClient, mesh_path: str, config: dict):
         super().__init__()
         self.client = client
         self.mesh_path = mesh_path
         self.config = config
+        self.signals = SlicerSignals()
+    
+    POLL_INTERVAL = 0.25
     
     def run(self):
-        self.progress.emit(0, 100)
-        
-        self.progress.emit(10, 100)
-        slicer_result = self.client.post('/api/slicer/create', self.config)
-        
-        if 'error' in slicer_result:
-            self.error.emit(slicer_result['error'])
-            return
-        
-        slicer_id = slicer_result['slicer_id']
-        self.progress.emit(20, 100)
-        
-        load_result = self.client.post('/api/slicer/load', {
-            'slicer_id': slicer_id,
-            'mesh_path': self.mesh_path
-        })
-        
-        if 'error' in load_result:
-            self.error.emit(load_result['error'])
-            return
-        
-        self.progress.emit(40, 100)
-        
-        slice_result = self.client.post('/api/slicer/slice', {
-            'slicer_id': slicer_id
-        })
-        
-        if 'error' in slice_result:
-            self.error.emit(slice_result['error'])
-        else:
-            slice_result['slicer_id'] = slicer_id
-            self.progress.emit(100, 100)
-            self.finished.emit(slice_result)
+        try:
+            asyncio.run(self._run())
+        except Exception as e:
+            self.signals.error.emit(str(e))
+    
+    async def _run(self):
+        base_url = self.client.base_url
+        connector = aiohttp.TCPConnector(limit=4, keepalive_timeout=30)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            self.signals.progress.emit(10, 100)
+            # The server creates the slicer, loads and slices as one queued
+            # job; layer progress and job status are then polled together
+            queued = await self._request(session, 'POST', f"{base_url}/api/slicer/run", {
+                **self.config, 'mesh_path': self.mesh_path, 'async': True
+            })
+            if 'error' in queued:
+                self.signals.error.emit(queued['error'])
+                return
+            
+            job_url = f"{base_url}/api/jobs/{queued['job_id']}"
+            progress_url = f"{base_url}/api/slicer/progress/{queued['slicer_id']}"
+            while True:
+                await asyncio.sleep(self.POLL_INTERVAL)
+                job, progress = await asyncio.gather(
+                    self._request(session, 'GET', job_url),
+                    self._request(session, 'GET', progress_url)
+                )
+                
+                if 'progress' in progress:
+                    self.signals.progress.emit(10 + int(progress['progress'] * 90), 100)
+                
+                status = job.get('status')
+                if status == 'done':
+                    self.signals.progress.emit(100, 100)
+                    self.signals.finished.emit(job['result'])
+                    return
+                if status == 'error' or 'error' in job:
+                    self.signals.error.emit(job.get('error', 'Slicing failed'))
+                    return
+    
+    async def _request(self, session: aiohttp.ClientSession, method: str, url: str,
+                       data: Optional[dict] = None) -> dict:
+        try:
+            body = orjson.dumps(data) if data is not None else None
+            headers = {'Content-Type': 'application/json'} if body is not None else None
+            async with session.request(method, url, data=body, headers=headers) as response:
+                return orjson.loads(await response.read())
+        except Exception as e:
+            return {'error': str(e)}
 
 class TextTo3DTab(QWidget):
     def __init__(self, client: APIClient):
@@ -240,11 +318,13 @@ class TextTo3DTab(QWidget):
             'frame_size': self.resolution_spin.value()
         }
         
-        self.thread = GeneratorThread(self.client, prompt, params)
-        self.thread.progress.connect(self.update_progress)
-        self.thread.finished.connect(self.on_generation_finished)
-        self.thread.error.connect(self.on_generation_error)
-        self.thread.start()
+        job = GeneratorJob(self.client, prompt, params)
+        job.signals.progress.connect(self.update_progress)
+        job.signals.finished.connect(self.on_generation_finished)
+        job.signals.error.connect(self.on_generation_error)
+        # Keep the signal holder alive until its queued emits are delivered
+        self.job_signals = job.signals
+        job_pool().start(job)
     
     def update_progress(self, message: str):
         self.status_label.setText(message)
@@ -263,10 +343,24 @@ class TextTo3DTab(QWidget):
         self.progress_bar.setVisible(False)
 
 class SlicerTab(QWidget):
+    # Spinning through layers only fetches the one the user stops on
+    LAYER_DEBOUNCE_MS = 75
+    LAYER_CACHE_SIZE = 128
+    
+    # Emitted by prefetch workers once a layer request finishes
+    layer_prefetched = pyqtSignal(str, int)
+    
     def __init__(self, client: APIClient):
         super().__init__()
         self.client = client
         self.current_slicer_id = None
+        # (slicer_id, layer_index) -> layer response, least recently used first.
+        # Neighbouring layers are prefetched on the thread pool, so the cache
+        # and the set of in-flight prefetches are guarded by a lock.
+        self._layer_cache: "OrderedDict[tuple, dict]" = OrderedDict()
+        self._layer_prefetching = set()
+        self._layer_lock = threading.Lock()
+        self.layer_prefetched.connect(self._on_layer_prefetched)
         self.init_ui()
     
     def init_ui(self):
@@ -373,9 +467,13 @@ class SlicerTab(QWidget):
         
         layer_controls = QHBoxLayout()
         
+        self._layer_timer = QTimer(self)
+        self._layer_timer.setSingleShot(True)
+        self._layer_timer.timeout.connect(self.show_layer)
+        
         self.layer_spin = QSpinBox()
         self.layer_spin.setRange(0, 1000)
-        self.layer_spin.valueChanged.connect(self.show_layer)
+        self.layer_spin.valueChanged.connect(lambda _: self._layer_timer.start(self.LAYER_DEBOUNCE_MS))
         
         load_layer_btn = QPushButton("Show Layer")
         load_layer_btn.clicked.connect(self.show_layer)
@@ -420,16 +518,19 @@ class SlicerTab(QWidget):
             'perimeter_count': self.perimeter_spin.value()
         }
         
-        self.thread = SlicerThread(self.client, mesh_path, config)
-        self.thread.progress.connect(self.update_progress)
-        self.thread.finished.connect(self.on_slicing_finished)
-        self.thread.error.connect(self.on_slicing_error)
-        self.thread.start()
+        job = SlicerJob(self.client, mesh_path, config)
+        job.signals.progress.connect(self.update_progress)
+        job.signals.finished.connect(self.on_slicing_finished)
+        job.signals.error.connect(self.on_slicing_error)
+        self.job_signals = job.signals
+        job_pool().start(job)
     
     def update_progress(self, current: int, total: int):
         self.progress_bar.setValue(int(current / total * 100))
     
     def on_slicing_finished(self, result: dict):
+        with self._layer_lock:
+            self._layer_cache.clear()
         self.current_slicer_id = result.get('slicer_id')
         self.status_label.setText(f"Slicing complete! {result.get('total_layers', 0)} layers")
         
@@ -454,13 +555,66 @@ class SlicerTab(QWidget):
         if not self.current_slicer_id:
             return
         
+        slicer_id = self.current_slicer_id
         layer_index = self.layer_spin.value()
-        result = self.client.get(f'/api/slicer/layer/{self.current_slicer_id}/{layer_index}')
+        result = self._cached_layer(slicer_id, layer_index)
+        if result is None:
+            with self._layer_lock:
+                in_flight = (slicer_id, layer_index) in self._layer_prefetching
+            if in_flight:
+                # Shown by _on_layer_prefetched when the prefetch lands
+                self.preview_label.setText(f"Loading layer {layer_index}...")
+                return
+            result = self._fetch_layer(slicer_id, layer_index)
         
         if 'error' not in result:
             self.preview_label.setText(f"Layer {layer_index} at Z={result.get('z_height', 0):.3f}")
         else:
             self.preview_label.setText("Error loading layer")
+        
+        # The next request is almost always one layer up or down
+        for neighbor in (layer_index - 1, layer_index + 1):
+            if 0 <= neighbor <= self.layer_spin.maximum():
+                self._prefetch_layer(slicer_id, neighbor)
+    
+    def _cached_layer(self, slicer_id: str, layer_index: int) -> Optional[dict]:
+        key = (slicer_id, layer_index)
+        with self._layer_lock:
+            result = self._layer_cache.get(key)
+            if result is not None:
+                self._layer_cache.move_to_end(key)
+            return result
+    
+    def _fetch_layer(self, slicer_id: str, layer_index: int) -> dict:
+        result = self.client.get(f'/api/slicer/layer/{slicer_id}/{layer_index}')
+        if 'error' not in result:
+            with self._layer_lock:
+                self._layer_cache[(slicer_id, layer_index)] = result
+                if len(self._layer_cache) > self.LAYER_CACHE_SIZE:
+                    self._layer_cache.popitem(last=False)
+        return result
+    
+    def _prefetch_layer(self, slicer_id: str, layer_index: int) -> None:
+        key = (slicer_id, layer_index)
+        with self._layer_lock:
+            if key in self._layer_cache or key in self._layer_prefetching:
+                return
+            self._layer_prefetching.add(key)
+        
+        def fetch():
+            try:
+                self._fetch_layer(slicer_id, layer_index)
+            finally:
+                with self._layer_lock:
+                    self._layer_prefetching.discard(key)
+                self.layer_prefetched.emit(slicer_id, layer_index)
+        
+        QThreadPool.globalInstance().start(QRunnable.create(fetch))
+    
+    def _on_layer_prefetched(self, slicer_id: str, layer_index: int) -> None:
+        # The user may have moved on while the request was in flight
+        if slicer_id == self.current_slicer_id and layer_index == self.layer_spin.value():
+            self.show_layer()
     
     def export_gcode(self):
         if not self.current_slicer_id:
@@ -501,9 +655,18 @@ class SlicerTab(QWidget):
                 QMessageBox.information(self, "Success", "JSON exported successfully")
 
 class MainWindow(QMainWindow):
+    # The device does not change while the API runs; probing it can be slow
+    DEVICE_INFO_TTL = 60.0
+    
     def __init__(self):
         super().__init__()
         self.client = APIClient()
+        self._device_info_cache: Optional[dict] = None
+        self._device_info_ts = 0.0
+        self._device_info_pending = False
+        self.device_info_signals = DeviceInfoSignals()
+        self.device_info_signals.ready.connect(self.on_device_info)
+        QThreadPool.globalInstance().setMaxThreadCount(IO_THREADS)
         self.init_ui()
     
     def init_ui(self):
@@ -520,6 +683,14 @@ class MainWindow(QMainWindow):
         self.device_info_label = QLabel("Checking device...")
         self.device_info_label.setStyleSheet("padding: 5px;")
         
+        refresh_device_btn = QPushButton("Refresh Device")
+        refresh_device_btn.clicked.connect(self.refresh_device_info)
+        
+        device_layout = QHBoxLayout()
+        device_layout.addWidget(self.device_info_label)
+        device_layout.addStretch()
+        device_layout.addWidget(refresh_device_btn)
+        
         self.tab_widget = QTabWidget()
         
         self.text_to_3d_tab = TextTo3DTab(self.client)
@@ -529,7 +700,7 @@ class MainWindow(QMainWindow):
         self.tab_widget.addTab(self.slicer_tab, "Slicer Preview")
         
         main_layout.addWidget(header)
-        main_layout.addWidget(self.device_info_label)
+        main_layout.addLayout(device_layout)
         main_layout.addWidget(self.tab_widget)
         
         central_widget.setLayout(main_layout)
@@ -538,22 +709,62 @@ class MainWindow(QMainWindow):
         self.check_device_info()
     
     def check_device_info(self):
-        result = self.client.get('/api/device/info')
+        if (self._device_info_cache is not None
+                and time.monotonic() - self._device_info_ts < self.DEVICE_INFO_TTL):
+            self.set_device_info_text(self.format_device_info(self._device_info_cache))
+            return
+        
+        # Repeated clicks while a request is in flight share its answer
+        if self._device_info_pending:
+            return
+        self._device_info_pending = True
+        
+        # Fetched on the pool so the window paints without waiting for the API;
+        # the signal delivers the result back on the GUI thread
+        signals = self.device_info_signals
+        QThreadPool.globalInstance().start(QRunnable.create(
+            lambda: signals.ready.emit(self.client.get('/api/device/info'))
+        ))
+    
+    def refresh_device_info(self):
+        self._device_info_ts = 0.0
+        self.check_device_info()
+    
+    def on_device_info(self, result: dict):
+        self._device_info_pending = False
+        # Only successful answers are cached, so a later check retries
         if 'error' not in result:
-            device_type = result.get('type', 'Unknown')
-            if device_type == 'cuda':
-                name = result.get('name', 'NVIDIA GPU')
-                memory = result.get('memory_total', 0) / (1024**3)
-                self.device_info_label.setText(f"Device: {name} ({memory:.1f} GB VRAM)")
-            elif device_type == 'mps':
-                self.device_info_label.setText("Device: Apple Silicon GPU (MPS)")
-            else:
-                self.device_info_label.setText("Device: CPU")
-        else:
-            self.device_info_label.setText("Device: Unknown (API not connected)")
+            self._device_info_cache = result
+            self._device_info_ts = time.monotonic()
+        self.set_device_info_text(self.format_device_info(result))
+    
+    def set_device_info_text(self, text: str):
+        # setText re-lays out the header even for identical text
+        if text != self.device_info_label.text():
+            self.device_info_label.setText(text)
+    
+    @staticmethod
+    def format_device_info(result: dict) -> str:
+        if 'error' in result:
+            return "Device: Unknown (API not connected)"
+        
+        device_type = result.get('type', 'Unknown')
+        if device_type == 'cuda':
+            name = result.get('name', 'NVIDIA GPU')
+            memory = result.get('memory_total', 0) / (1024**3)
+            return f"Device: {name} ({memory:.1f} GB VRAM)"
+        elif device_type == 'mps':
+            return "Device: Apple Silicon GPU (MPS)"
+        return "Device: CPU"
+    
+    def closeEvent(self, event):
+        self.client.close()
+        super().closeEvent(event)
 
-def main():
+def main(on_quit: Optional[Callable[[], None]] = None):
     app = QApplication(sys.argv)
+    if on_quit is not None:
+        app.aboutToQuit.connect(on_quit)
     window = MainWindow()
     window.show()
     sys.exit(app.exec())
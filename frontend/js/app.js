@@ -336,7 +336,7 @@ class App {
         this.updateStatus('Loading mesh into viewer...');
         
         const filename = result.output_filename;
-        this.viewer.loadPLY(`/api/output/${filename}`);
+        this.viewer.loadPLY(result.output_url || `/api/output/${filename}`);
         
         this.updateStatus('Model generated successfully!', 'success');
         this.showProgress(false);
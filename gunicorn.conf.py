@@ -0,0 +1,39 @@
+import os
+import subprocess
+
+from config.config import Config
+
+def _gpu_count() -> int:
+    try:
+        output = subprocess.run(['nvidia-smi', '-L'], capture_output=True, text=True, timeout=10).stdout
+        return len([line for line in output.splitlines() if line.startswith('GPU')])
+    except (OSError, subprocess.SubprocessError):
+        return 0
+
+GPU_COUNT = _gpu_count()
+
+bind = f"{Config.API_HOST}:{Config.API_PORT}"
+workers = int(os.getenv('GUNICORN_WORKERS', max(GPU_COUNT, 1)))
+# gevent would turn the inference executor into greenlets, so a CUDA call
+# would stall every request on the worker; real threads keep I/O responsive
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.getenv('GUNICORN_THREADS', 8))
+worker_connections = 64
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 600))
+
+def pre_fork(server, worker):
+    # Give each worker a stable slot so a respawned worker reuses its GPU
+    taken = {getattr(w, 'slot', None) for w in server.WORKERS.values()}
+    worker.slot = next(i for i in range(len(taken) + 1) if i not in taken)
+
+def post_fork(server, worker):
+    # Runs before the app (and torch) is imported in the worker
+    if GPU_COUNT:
+        os.environ['CUDA_VISIBLE_DEVICES'] = str(worker.slot % GPU_COUNT)
+    
+    if hasattr(os, 'sched_setaffinity'):
+        cpus = sorted(os.sched_getaffinity(0))
+        share = len(cpus) // workers
+        if share:
+            start = (worker.slot % workers) * share
+            os.sched_setaffinity(0, cpus[start:start + share])
@@ -1,36 +1,82 @@
 #!/usr/bin/env python3
 
+import os
+import socket
 import sys
+import time
 import argparse
 from pathlib import Path
 
+# Load CUDA kernels on first use instead of all at context creation; must be
+# set before torch is imported
+os.environ.setdefault('CUDA_MODULE_LOADING', 'LAZY')
+
 from config.config import Config
-from backend.api.app import run_server
+
+def _api_connect_host() -> str:
+    # A wildcard bind address is reached through loopback
+    host = Config.API_HOST
+    if host in ('0.0.0.0', '::', ''):
+        return '127.0.0.1'
+    return host
+
+def _port_in_use(host: str, port: int) -> bool:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.settimeout(0.2)
+        return s.connect_ex((host, port)) == 0
+
+def _wait_api_ready(timeout: float = 10.0) -> bool:
+    # Returns as soon as the server accepts connections
+    host = _api_connect_host()
+    
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection((host, Config.API_PORT), timeout=0.05).close()
+            return True
+        except OSError:
+            time.sleep(0.01)
+    return False
+
+# Built once; the defaults come from Config, so parsed values can be
+# assigned back unconditionally
+_PARSER = argparse.ArgumentParser(description='AI 3D Model Generator')
+_PARSER.add_argument('--mode', choices=['api', 'gui', 'web'], default='api',
+                     help='Run mode: api (server only), gui (desktop app), web (web viewer)')
+_PARSER.add_argument('--host', default=Config.API_HOST, help='API host')
+_PARSER.add_argument('--port', type=int, default=Config.API_PORT, help='API port')
 
 def main():
-    parser = argparse.ArgumentParser(description='AI 3D Model Generator')
-    parser.add_argument('--mode', choices=['api', 'gui', 'web'], default='api',
-                       help='Run mode: api (server only), gui (desktop app), web (web viewer)')
-    parser.add_argument('--host', default=None, help='API host')
-    parser.add_argument('--port', type=int, default=None, help='API port')
+    args = _PARSER.parse_args()
+    
+    Config.API_HOST = args.host
+    Config.API_PORT = args.port
     
-    args = parser.parse_args()
+    # An API already running (e.g. --mode api in another terminal) is reused
+    # by the GUI instead of starting a second server that cannot bind
+    serve_locally = args.mode != 'gui' or not _port_in_use(_api_connect_host(), Config.API_PORT)
     
-    if args.host:
-        Config.API_HOST = args.host
-    if args.port:
-        Config.API_PORT = args.port
+    # Resolving DEVICE probes the GPU, so it is only shown when this process
+    # runs the server
     
-    print("=" * 60)
-    print("AI 3D Model Generator")
-    print("=" * 60)
-    print(f"Mode: {args.mode}")
-    print(f"Device: Config.DEVICE = 'auto'")
-    print(f"Output directory: {Config.OUTPUT_DIR}")
-    print(f"Models directory: {Config.MODELS_DIR}")
-    print("=" * 60)
+    # One write, so the banner is not interleaved with API thread output
+    banner = "\n".join([
+        "=" * 60,
+        "AI 3D Model Generator",
+        "=" * 60,
+        f"Mode: {args.mode}",
+        *([f"Device: {Config.DEVICE}"] if serve_locally else []),
+        f"Output directory: {Config.OUTPUT_DIR}",
+        f"Models directory: {Config.MODELS_DIR}",
+        "=" * 60,
+    ])
+    sys.stdout.write(banner + "\n")
+    sys.stdout.flush()
     
+    # run_server is imported per mode: the API pulls in torch, which only a
+    # process that actually serves needs
     if args.mode == 'api':
+        from backend.api.app import run_server
         print("Starting API server only...")
         run_server()
     
@@ -39,37 +85,45 @@ def main():
         
         import threading
         
-        def run_api_thread():
-            run_server()
+        # Stopped from the GUI's aboutToQuit rather than killed with the process
+        api_shutdown = threading.Event()
+        api_thread = None
         
-        api_thread = threading.Thread(target=run_api_thread, daemon=True)
-        api_thread.start()
+        if not serve_locally:
+            print(f"API server already listening on port {Config.API_PORT}, connecting to it")
+        else:
+            # Only needed when this process serves: the API pulls in torch,
+            # diffusers and the LLM manager
+            from backend.api.app import run_server
+            api_thread = threading.Thread(target=run_server, args=(api_shutdown,), name='ai3d-api', daemon=True)
+            api_thread.start()
+            
+            if not _wait_api_ready():
+                print("Warning: API server did not start listening in time")
         
-        import time
-        time.sleep(2)
+        def stop_api():
+            if api_thread is not None:
+                api_shutdown.set()
+                api_thread.join(timeout=5)
         
-        from frontend.gui.main import main as gui_main
-        gui_main()
+        try:
+            from frontend.gui.main import main as gui_main
+        except ImportError as e:
+            print(f"Desktop GUI unavailable ({e}); install it with: pip install .[gui]")
+            stop_api()
+            return
+        gui_main(on_quit=stop_api)
     
     elif args.mode == 'web':
         print("Starting web interface...")
-        
-        import threading
-        
-        def run_api_thread():
-            run_server()
-        
-        api_thread = threading.Thread(target=run_api_thread, daemon=True)
-        api_thread.start()
-        
-        import time
-        time.sleep(2)
-        
         print(f"\nWeb interface available at: http://{Config.API_HOST}:{Config.API_PORT}/")
         print("Press Ctrl+C to stop the server\n")
         
+        from backend.api.app import run_server
+        
+        # The server runs on the main thread, so it handles Ctrl+C itself
         try:
-            api_thread.join()
+            run_server()
         except KeyboardInterrupt:
             print("\nShutting down...")
 
@@ -12,7 +12,11 @@ setup(
     long_description=long_description,
     long_description_content_type="text/markdown",
     url="https://github.com/LordRelentless/AI3DModelGenerator",
-    packages=find_packages(),
+    # Only the source trees; output/, models/ and logs/ can hold many GB
+    packages=find_packages(
+        include=("backend*", "frontend*", "config*"),
+        exclude=("*.tests", "output*", "models*", "logs*", "state*", "build*", "dist*")
+    ),
     classifiers=[
         "Development Status :: 4 - Beta",
         "Intended Audience :: Developers",
@@ -27,34 +31,25 @@ setup(
         "Programming Language :: Python :: 3.11",
     ],
     python_requires=">=3.8",
+    # Core runtime for the API server; model, LLM, GUI and visualization
+    # stacks are extras so server images only install what they use
     install_requires=[
-        "diffusers>=0.28.0",
-        "transformers>=4.39.0",
-        "accelerate>=0.28.0",
         "torch>=2.1.0",
-        "torchvision>=0.16.0",
         "Pillow>=10.0.0",
         "numpy>=1.24.0",
         "trimesh>=4.0.0",
-        "open3d>=0.17.0",
-        "openai>=1.12.0",
-        "anthropic>=0.18.0",
+        "scipy>=1.12.0",
         "requests>=2.31.0",
-        "flask>=3.0.0",
+        "flask[async]>=3.0.0",
         "flask-cors>=4.0.0",
-        "PyQt6>=6.6.0",
-        "pyopengl>=3.1.7",
-        "pyqtgraph>=0.13.0",
-        "numpy-stl>=3.0.0",
-        "plyfile>=1.0.0",
-        "plotly>=5.18.0",
-        "python-dotenv>=1.0.0",
-        "onnxruntime>=1.16.0",
-        "onnx>=1.15.0",
+        "hypercorn>=0.14.0",
+        "uvicorn>=0.23.0",
+        "waitress>=3.0.0",
+        "asgiref>=3.7.0",
+        "orjson>=3.9.0",
+        "gunicorn>=21.2.0; sys_platform != 'win32'",
         "aiohttp>=3.9.0",
-        "websockets>=12.0",
-        "scipy>=1.12.0",
-        "scikit-learn>=1.4.0",
+        "python-dotenv>=1.0.0",
     ],
     extras_require={
         "dev": [
@@ -64,9 +59,53 @@ setup(
             "flake8>=6.0.0",
             "mypy>=1.0.0",
         ],
+        "llm": [
+            "openai>=1.12.0",
+            "httpx[http2]>=0.25.0",
+            "anthropic>=0.18.0",
+            "transformers>=4.39.0",
+            "accelerate>=0.28.0",
+            "diffusers>=0.28.0",
+        ],
+        "gui": [
+            "PyQt6>=6.6.0",
+            "pyopengl>=3.1.7",
+            "pyqtgraph>=0.13.0",
+        ],
+        "viz": [
+            "open3d>=0.17.0",
+            "plotly>=5.18.0",
+        ],
+        "onnx": [
+            "onnxruntime>=1.16.0",
+            "onnx>=1.15.0",
+        ],
         "build": [
             "pyinstaller>=6.3.0",
         ],
+        "accel": [
+            "PyTurboJPEG>=1.7.0",
+            "msgpack>=1.0.0",
+            "msgspec>=0.18.0",
+            "flask-compress>=1.15",
+            "zstandard>=0.22.0",
+            "diskcache>=5.6.0",
+            "numba>=0.59.0",
+        ],
+        "quant": [
+            "bitsandbytes>=0.43.0",
+            "torchao>=0.5.0",
+            "optimum-quanto>=0.2.0",
+        ],
+        "xformers": [
+            "xformers>=0.0.23",
+        ],
+        "structured": [
+            "outlines>=0.0.46,<1.0",
+        ],
+        "vllm": [
+            "vllm>=0.6.0; sys_platform == 'linux'",
+        ],
     },
     entry_points={
         "console_scripts": [
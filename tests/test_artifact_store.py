@@ -0,0 +1,83 @@
+import pytest
+
+from backend.utils.artifact_store import ArtifactStore
+
+@pytest.fixture
+def store(tmp_path):
+    store = ArtifactStore(tmp_path)
+    yield store
+    store.close()
+
+def test_put_get_round_trip(store):
+    artifact = store.put('mesh.ply', b'ply data', 'application/octet-stream')
+    
+    assert store.get('mesh.ply') == artifact
+    assert store.read('mesh.ply') == b'ply data'
+    assert store.get('missing.ply') is None
+    assert store.read('missing.ply') is None
+
+def test_overwrite_repoints_name(store):
+    first = store.put('out.json', b'{"v": 1}', 'application/json')
+    second = store.put('out.json', b'{"v": 2}', 'application/json')
+    
+    assert second.offset > first.offset
+    assert second.etag != first.etag
+    assert store.read('out.json') == b'{"v": 2}'
+
+def test_delete(store):
+    store.put('a', b'aaa')
+    
+    assert store.delete('a')
+    assert store.get('a') is None
+    assert not store.delete('a')
+
+def test_compact_keeps_live_entries(store):
+    store.put('a', b'old a')
+    store.put('b', b'b' * 1000)
+    store.put('a', b'new a')
+    store.delete('b')
+    store.compact()
+    
+    assert store.generation == 1
+    assert store.get('a').offset == 0
+    assert store.read('a') == b'new a'
+    assert store.get('b') is None
+
+def test_compacts_automatically(store):
+    store.COMPACT_MIN_BYTES = 0
+    store.put('a', b'x' * 100)
+    store.put('a', b'y' * 100)
+    assert store.generation == 0
+    # More than half of the blob is dead now
+    store.put('a', b'z' * 100)
+    
+    assert store.generation == 1
+    assert store.read('a') == b'z' * 100
+
+def test_reader_survives_compaction(store):
+    store.put('a', b'first' * 10)
+    artifact = store.get('a')
+    with store.iter_chunks(artifact, chunk_size=5) as chunks:
+        first = next(chunks)
+        store.put('a', b'second')
+        store.compact()
+        # The replaced blob stays open until this reader is closed
+        assert first + b''.join(chunks) == b'first' * 10
+    
+    assert store.read('a') == b'second'
+    with pytest.raises(OSError):
+        store.iter_chunks(artifact)
+
+def test_reopen_sees_compacted_store(tmp_path):
+    store = ArtifactStore(tmp_path)
+    store.put('a', b'old')
+    store.put('a', b'new')
+    store.compact()
+    store.close()
+    
+    reopened = ArtifactStore(tmp_path)
+    try:
+        assert reopened.generation == 1
+        assert reopened.read('a') == b'new'
+    finally:
+        reopened.close()
@@ -0,0 +1,45 @@
+from backend.core.llm_manager import _IncrementalJsonObject
+
+def _feed_all(parser: _IncrementalJsonObject, chunks):
+    # feed() reports at most one result per chunk, the most complete one
+    return [result for result in map(parser.feed, chunks) if result is not None]
+
+def test_partial_results_as_members_complete():
+    parser = _IncrementalJsonObject()
+    results = _feed_all(parser, [
+        'Sure! {"prompt": "a red', ' chair", "neg', 'ative": "blurry",',
+        ' "style": "low poly"} trailing text'
+    ])
+    
+    assert results == [
+        {'prompt': 'a red chair'},
+        {'prompt': 'a red chair', 'negative': 'blurry'},
+        {'prompt': 'a red chair', 'negative': 'blurry', 'style': 'low poly'},
+    ]
+    assert parser.complete == results[-1]
+
+def test_braces_and_commas_inside_strings():
+    parser = _IncrementalJsonObject()
+    results = _feed_all(parser, ['{"prompt": "a {tall}, \\"thin\\" vase",', ' "tags": ["a", "b"]}'])
+    
+    assert results[0] == {'prompt': 'a {tall}, "thin" vase'}
+    assert parser.complete == {'prompt': 'a {tall}, "thin" vase', 'tags': ['a', 'b']}
+
+def test_nested_members_are_not_split():
+    parser = _IncrementalJsonObject()
+    results = _feed_all(parser, ['{"params": {"a": 1,', ' "b": 2},', ' "prompt": "x"}'])
+    
+    assert results == [{'params': {'a': 1, 'b': 2}}, {'params': {'a': 1, 'b': 2}, 'prompt': 'x'}]
+
+def test_nothing_after_complete():
+    parser = _IncrementalJsonObject()
+    parser.feed('{"prompt": "x"}')
+    
+    assert parser.feed('{"prompt": "y"}') is None
+    assert parser.complete == {'prompt': 'x'}
+
+def test_no_object():
+    parser = _IncrementalJsonObject()
+    
+    assert parser.feed('no json here') is None
+    assert parser.complete is None
@@ -0,0 +1,56 @@
+import time
+
+from backend.core.object_pool import ObjectPool
+
+class Resource:
+    def __init__(self, name: str):
+        self.name = name
+
+def _pool(**kwargs):
+    evicted = []
+    return ObjectPool(Resource, on_evict=evicted.append, **kwargs), evicted
+
+def test_pinned_object_survives_acquire_over_capacity():
+    pool, evicted = _pool(max_size=1)
+    first = pool.acquire('a', 'k', 'first', pin=True)
+    second = pool.acquire('b', 'k', 'second')
+    
+    assert evicted == []
+    assert pool.get('a') is first and pool.get('b') is second
+    
+    pool.unpin(first)
+    pool.acquire('c', 'k', 'third')
+    assert first in evicted and second in evicted
+
+def test_pin_nests():
+    pool, evicted = _pool(max_size=1)
+    obj = pool.acquire('a', 'k', 'obj')
+    pool.pin(obj)
+    assert pool.get('a', pin=True) is obj
+    
+    pool.unpin(obj)
+    pool.acquire('b', 'k', 'other')
+    assert evicted == []
+    
+    pool.unpin(obj)
+    pool.acquire('c', 'k', 'another')
+    assert obj in evicted
+
+def test_prune_skips_pinned_objects():
+    pool, evicted = _pool(max_size=4, ttl=0.01)
+    pinned = pool.acquire('a', 'k', 'pinned', pin=True)
+    idle = pool.acquire('b', 'k', 'idle')
+    time.sleep(0.05)
+    pool.prune(interval=0)
+    
+    assert evicted == [idle]
+    assert pool.get('a') is pinned
+
+def test_released_object_is_reused_for_same_key():
+    pool, evicted = _pool(max_size=2)
+    obj = pool.acquire('a', 'k', 'obj')
+    pool.release('a')
+    
+    assert pool.acquire('b', 'k', 'ignored') is obj
+    assert pool.acquire('c', 'other', 'new') is not obj
+    assert evicted == []
@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('numba')
+trimesh = pytest.importorskip('trimesh')
+
+from backend.utils._slice_kernels import slice_faces
+
+def _normalized(segments: np.ndarray) -> list:
+    # Segment direction and order differ between the two implementations
+    segments = np.round(np.asarray(segments, dtype=np.float64).reshape(-1, 2, 2), 6)
+    return sorted(tuple(sorted(map(tuple, segment))) for segment in segments)
+
+@pytest.mark.parametrize('mesh', [
+    # Twice-subdivided 2 mm cube: vertex rings at z = -0.5, 0 and 0.5
+    trimesh.creation.box(extents=(2, 2, 2)).subdivide().subdivide(),
+    trimesh.creation.icosphere(subdivisions=2),
+], ids=['box', 'icosphere'])
+def test_slice_faces_matches_mesh_multiplane(mesh):
+    z_levels = np.array([-0.5, 0.0, 0.25, 0.5])
+    segments, offsets = slice_faces(mesh.vertices, mesh.faces, z_levels)
+    sections, to_3d, _ = trimesh.intersections.mesh_multiplane(
+        mesh, plane_origin=[0, 0, 0], plane_normal=[0, 0, 1], heights=z_levels
+    )
+    
+    for i in range(len(z_levels)):
+        # Back to world XY so both sides are in the same frame
+        points = sections[i].reshape(-1, 2)
+        points = np.c_[points, np.zeros(len(points)), np.ones(len(points))] @ to_3d[i].T
+        expected = _normalized(points[:, :2])
+        assert expected
+        assert _normalized(segments[offsets[i]:offsets[i + 1]]) == expected
@@ -0,0 +1,5 @@
+from backend.api.app import app, initialize_app
+
+initialize_app()
+
+application = app